@@ -1,16 +1,34 @@
 import streamlit as st
 import asyncio
+import concurrent.futures
+import hashlib
+import threading
+import tempfile
 import sys
 import os
+import uuid
+from datetime import datetime, timedelta
 
 # 프로젝트 경로 추가
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from services.naver_auth import NaverAuth
+from services.browser_manager import BrowserManager, BrowserCrashedError
 from services.review_scraper import ReviewScraper
-from services.ai_generator import AIReplyGenerator, AIProvider, ReplyTone, get_tone_from_string
+from services.ai_generator import (AIReplyGenerator, AIProvider, ReplyTone, RoutingRules, ReplyGenerationError,
+                                   get_tone_from_string)
 from services.reply_poster import ReplyPoster
-from database.db import init_db, save_setting, get_setting, save_reply_history, get_reply_history
+from services.photo_service import PhotoService
+from services.scheduler import prioritize
+from services.watcher import ReviewWatcher
+from services.drafts import agenerate_with_drafts, draft_params, reusable_drafts
+from services.supervisor import BrowserSupervisor
+from database.db import (init_db, save_setting, get_setting, save_reply_history, get_reply_history_page, sync_reviews,
+                         get_review_counts, add_reply_template, get_reply_templates, delete_reply_template,
+                         get_watch_events, get_last_watch_event_id, save_reply_draft, set_reply_draft_status,
+                         delete_reply_drafts)
+from database.export import export_csv, export_parquet, import_rows
+from utils.metrics import metrics, start_metrics_server, write_prometheus, configure_json_logging
 
 # 페이지 설정
 st.set_page_config(
@@ -20,10 +38,121 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# 데이터베이스 초기화
-init_db()
+# ============ 공유 리소스 (프로세스당 한 번만 생성, rerun 간 재사용) ============
+@st.cache_resource
+def setup_resources():
+    """데이터베이스 초기화 및 메트릭 엔드포인트 시작"""
+    init_db()
+    # LOG_JSON: 서비스 로그와 스팬을 한 줄짜리 JSON으로 출력 (로그 수집기용)
+    if os.getenv("LOG_JSON", "0") != "0":
+        configure_json_logging()
+    # METRICS_PORT: /metrics 엔드포인트, METRICS_FILE: Prometheus 텍스트 파일
+    if os.getenv("METRICS_PORT"):
+        start_metrics_server(int(os.getenv("METRICS_PORT")))
+    return True
+
+@st.cache_resource
+def get_event_loop():
+    """공용 이벤트 루프 (백그라운드 스레드에서 계속 실행)
+    
+    Playwright 객체와 백그라운드 작업(업체 목록 갱신 등)이 같은 루프에 묶여 있어야 하므로
+    rerun마다 루프를 새로 만들지 않고 재사용합니다.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="browser-loop").start()
+    return loop
+
+@st.cache_resource
+def get_browser_manager() -> BrowserManager:
+    """공유 Chromium 관리자 (모든 세션/계정이 브라우저 프로세스 하나를 공유)"""
+    memory_limit = os.getenv("BROWSER_MEMORY_LIMIT_MB")
+    return BrowserManager(
+        max_contexts=int(os.getenv("BROWSER_MAX_CONTEXTS", "20")),
+        idle_timeout=float(os.getenv("BROWSER_IDLE_TIMEOUT", "900")),
+        memory_limit_mb=float(memory_limit) if memory_limit else None
+    )
+
+@st.cache_resource
+def get_photo_service() -> PhotoService:
+    """리뷰 사진 썸네일 서비스 (디스크 캐시는 모든 세션이 공유)"""
+    return PhotoService(max_cache_mb=float(os.getenv("PHOTO_CACHE_MB", "200")))
+
+def get_generator(provider: AIProvider, api_key: str, fallback_key: str = None) -> AIReplyGenerator:
+    """
+    AI 답글 생성기 (세션 안에서 제공자/키 조합별로 재사용, 예비 키가 있으면 다른 제공자로 장애 전환)
+    
+    라우팅 기준과 route_counts 가 생성기에 들어 있으므로 세션끼리 공유하지 않으며,
+    캐시 키에는 API 키 원문 대신 해시만 둡니다.
+    """
+    key_id = hashlib.sha256(f"{api_key}\x1f{fallback_key or ''}".encode()).hexdigest()[:16]
+    cache_key = (provider, key_id)
+    cached = st.session_state.get('generator')
+    if cached is None or cached[0] != cache_key:
+        other = AIProvider.GEMINI if provider == AIProvider.OPENAI else AIProvider.OPENAI
+        generator = AIReplyGenerator(provider, api_key, fallback_keys={other: fallback_key} if fallback_key else None)
+        st.session_state.generator = cached = (cache_key, generator)
+    return cached[1]
+
+@st.cache_resource
+def get_review_watchers() -> dict:
+    """계정별 새 리뷰 감시자 {account_key: ReviewWatcher} (같은 계정의 세션끼리 공유)"""
+    return {}
+
+@st.cache_resource
+def get_watcher_sessions() -> dict:
+    """계정별 감시를 켠 세션 {account_key: {session_id, ...}} (마지막 세션이 끌 때만 감시자 중지)"""
+    return {}
+
+def ensure_watcher(auth, businesses: list) -> ReviewWatcher:
+    """계정 감시자를 시작하거나(없거나 멈췄으면) 업체 목록만 갱신"""
+    get_watcher_sessions().setdefault(auth.account_key, set()).add(st.session_state.session_id)
+    watchers = get_review_watchers()
+    watcher = watchers.get(auth.account_key)
+    if watcher is None or not watcher.running:
+        watcher = ReviewWatcher(
+            auth,
+            businesses,
+            min_interval=float(os.getenv("WATCH_MIN_INTERVAL", "60")),
+            max_interval=float(os.getenv("WATCH_MAX_INTERVAL", "1800")),
+            supervisor=session_supervisor(auth)
+        )
+        watcher.start(get_event_loop())
+        watchers[auth.account_key] = watcher
+    elif set(watcher.businesses) != {b['id'] for b in businesses}:
+        watcher.set_businesses(businesses)
+    return watcher
+
+def session_supervisor(auth) -> BrowserSupervisor:
+    """
+    세션 계정의 브라우저 감시자 (브라우저가 죽거나 멈추면 세션을 복구하고 작업을 다시 실행)
+    
+    같은 계정의 세션과 리뷰 감시자가 감시자 하나를 공유하고, 주기 상태 확인은 공용 루프에서 실행합니다.
+    """
+    supervisor = get_browser_manager().supervisor(
+        auth,
+        op_timeout=float(os.getenv("BROWSER_OP_TIMEOUT", "180")),
+        check_interval=float(os.getenv("BROWSER_HEALTH_INTERVAL", "60"))
+    )
+    supervisor.start(get_event_loop())
+    st.session_state.browser_supervisor = supervisor
+    return supervisor
+
+def stop_watcher(auth):
+    """이 세션의 감시 끄기 (같은 계정에서 감시를 켠 다른 세션이 없을 때만 감시자 중지)"""
+    sessions = get_watcher_sessions().get(auth.account_key, set())
+    sessions.discard(st.session_state.session_id)
+    if sessions:
+        return
+    get_watcher_sessions().pop(auth.account_key, None)
+    watcher = get_review_watchers().pop(auth.account_key, None)
+    if watcher:
+        watcher.stop()
+
+setup_resources()
 
 # 세션 상태 초기화
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
 if 'naver_auth' not in st.session_state:
@@ -36,6 +165,10 @@ if 'reviews' not in st.session_state:
     st.session_state.reviews = []
 if 'generated_replies' not in st.session_state:
     st.session_state.generated_replies = {}
+if 'watch_seen_id' not in st.session_state:
+    st.session_state.watch_seen_id = get_last_watch_event_id()
+if 'watch_unread' not in st.session_state:
+    st.session_state.watch_unread = {}
 
 # CSS 스타일
 st.markdown("""
@@ -107,14 +240,51 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ============ 헬퍼 함수 ============
+def discard_export_file():
+    """만들어 둔 내보내기 임시 파일 삭제 (새 파일을 만들거나 다운로드한 뒤)"""
+    export_file = st.session_state.pop('export_file', None)
+    if export_file and os.path.exists(export_file[0]):
+        os.unlink(export_file[0])
+
 def run_async(coro):
     """비동기 함수 실행 헬퍼"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(coro)
-    finally:
-        loop.close()
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
+
+def run_async_polling(coro, poll, interval: float = 0.2):
+    """비동기 함수를 실행하면서 끝날 때까지 스크립트 스레드에서 poll() 을 주기적으로 호출
+    
+    Streamlit 요소는 스크립트 스레드에서만 갱신할 수 있으므로, 이벤트 루프 쪽 콜백은
+    값만 기록하고 화면 갱신은 poll() 에서 합니다.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    while True:
+        try:
+            result = future.result(timeout=interval)
+            break
+        except concurrent.futures.TimeoutError:
+            poll()
+    poll()
+    return result
+
+@st.fragment(run_every=float(os.getenv("WATCH_NOTIFY_INTERVAL", "20")))
+def show_watch_notifications():
+    """감시자가 남긴 새 리뷰 알림 표시 (이 부분만 주기적으로 다시 실행)"""
+    names = {b['id']: b['name'] for b in st.session_state.businesses}
+    for event in get_watch_events(list(names), st.session_state.watch_seen_id):
+        st.toast(f"{names[event['business_id']]}: 새 리뷰 {event['new_count']}개", icon="🔔")
+        unread = st.session_state.watch_unread
+        unread[event['business_id']] = unread.get(event['business_id'], 0) + event['new_count']
+        st.session_state.watch_seen_id = event['id']
+    
+    for business_id, count in st.session_state.watch_unread.items():
+        if count and business_id in names:
+            st.caption(f"🔔 {names[business_id]}: 새 리뷰 {count}개")
+    auth = st.session_state.naver_auth
+    watcher = get_review_watchers().get(auth.account_key) if auth else None
+    if watcher and watcher.running:
+        next_in = watcher.seconds_until_next()
+        if next_in is not None:
+            st.caption(f"다음 확인까지 {int(next_in // 60)}분 {int(next_in % 60)}초")
 
 # ============ 사이드바 ============
 with st.sidebar:
@@ -149,7 +319,7 @@ with st.sidebar:
             if cookie_input:
                 with st.spinner("로그인 중... 잠시만 기다려주세요"):
                     async def do_login():
-                        auth = NaverAuth()
+                        auth = NaverAuth(manager=get_browser_manager())
                         await auth.init_browser()
                         success = await auth.login_with_cookies(cookie_input)
                         if success:
@@ -175,9 +345,12 @@ with st.sidebar:
         st.success("✅ 로그인됨")
         if st.button("🚪 로그아웃", use_container_width=True):
             if st.session_state.naver_auth:
+                stop_watcher(st.session_state.naver_auth)
                 run_async(st.session_state.naver_auth.close())
             st.session_state.logged_in = False
             st.session_state.naver_auth = None
+            st.session_state.browser_supervisor = None
+            st.session_state.watch_unread = {}
             st.session_state.businesses = []
             st.session_state.selected_business = None
             st.session_state.reviews = []
@@ -189,6 +362,12 @@ with st.sidebar:
     if st.session_state.logged_in:
         st.markdown("### 🏬 업체 선택")
         
+        # 백그라운드 갱신이 끝났으면 목록 교체
+        if st.session_state.naver_auth:
+            refreshed = st.session_state.naver_auth.pop_refreshed_business_list()
+            if refreshed:
+                st.session_state.businesses = refreshed
+        
         if st.session_state.businesses:
             business_options = {b['name']: b for b in st.session_state.businesses}
             selected_name = st.selectbox(
@@ -202,6 +381,17 @@ with st.sidebar:
                 if st.session_state.selected_business != selected:
                     st.session_state.selected_business = selected
                     st.session_state.reviews = []
+                    st.session_state.site_stats = {}
+            
+            st.caption(f"업체 {len(st.session_state.businesses)}개")
+            if st.button("🔄 업체 목록 새로고침", use_container_width=True):
+                with st.spinner("업체 목록 불러오는 중..."):
+                    businesses = run_async(st.session_state.naver_auth.get_business_list(use_cache=False))
+                if businesses:
+                    st.session_state.businesses = businesses
+                    st.rerun()
+                else:
+                    st.warning("업체 목록을 불러오지 못했습니다.")
         else:
             st.info("등록된 업체가 없습니다.")
             
@@ -218,6 +408,16 @@ with st.sidebar:
                     })
                     st.rerun()
         
+        # 새 리뷰 감시 (첫 페이지만 가볍게 확인, 바뀐 업체만 동기화)
+        if st.session_state.naver_auth and st.session_state.businesses:
+            watch_enabled = st.toggle("🔔 새 리뷰 자동 확인", value=os.getenv("WATCH_ENABLED", "1") != "0",
+                                      key="watch_enabled")
+            if watch_enabled:
+                ensure_watcher(st.session_state.naver_auth, st.session_state.businesses)
+                show_watch_notifications()
+            else:
+                stop_watcher(st.session_state.naver_auth)
+        
         st.markdown("---")
     
     # AI 설정
@@ -236,8 +436,17 @@ with st.sidebar:
         key="api_key"
     )
     
-    if api_key:
+    fallback_api_key = st.text_input(
+        "예비 API 키 (선택)",
+        type="password",
+        placeholder="Gemini 키" if "OpenAI" in ai_provider else "OpenAI 키",
+        help="선택한 AI 서비스에 장애가 나거나 응답이 늦으면 다른 서비스로 자동 전환합니다.",
+        key="fallback_api_key"
+    )
+    
+    if api_key and st.session_state.get('api_key_hint') != api_key[:10]:
         save_setting('api_key_hint', api_key[:10] + '...')
+        st.session_state.api_key_hint = api_key[:10]
     
     tone = st.selectbox(
         "답글 톤",
@@ -248,18 +457,205 @@ with st.sidebar:
     include_emoji = st.checkbox("이모지 포함", value=True, key="emoji_check")
     max_length = st.slider("최대 글자 수", 50, 300, 150, key="max_length")
     
+    # 템플릿 답글 (짧고 긍정적인 리뷰는 AI 호출 없이 답함)
+    with st.expander("⚡ 템플릿 답글", expanded=False):
+        use_templates = st.checkbox("간단한 리뷰는 템플릿으로 답글", value=True, key="use_templates")
+        template_min_rating = st.slider("템플릿 사용 최소 별점", 1, 5, 4, key="template_min_rating")
+        template_max_review_length = st.slider("템플릿 사용 최대 리뷰 길이", 0, 200, 40, key="template_max_review_length")
+        
+        templates = get_reply_templates()
+        if templates:
+            for template in templates:
+                col1, col2 = st.columns([5, 1])
+                rating_label = f"{template['for_rating']}점" if template['for_rating'] else "모든 별점"
+                col1.caption(f"**{template['name']}** ({rating_label})  \n{template['content']}")
+                if col2.button("🗑️", key=f"delete_template_{template['id']}"):
+                    delete_reply_template(template['id'])
+                    st.rerun()
+        else:
+            st.caption("저장된 템플릿이 없어 기본 템플릿을 사용합니다.")
+        
+        with st.form("add_template", clear_on_submit=True):
+            template_name = st.text_input("템플릿 이름")
+            template_content = st.text_area(
+                "내용",
+                placeholder="[소중한 리뷰|좋은 후기] 감사합니다! {keyword:을} 좋게 봐주셔서 기쁩니다{emoji}",
+                help="{store_name}, {keyword}, {emoji}, [표현1|표현2] 를 사용할 수 있습니다."
+            )
+            template_rating = st.selectbox("적용 별점", ["모든 별점", 5, 4, 3, 2, 1])
+            if st.form_submit_button("템플릿 추가") and template_name and template_content:
+                add_reply_template(
+                    template_name,
+                    template_content,
+                    for_rating=None if template_rating == "모든 별점" else template_rating
+                )
+                st.rerun()
+    
+    routing_rules = RoutingRules(
+        enabled=use_templates,
+        min_rating=template_min_rating,
+        max_review_length=template_max_review_length
+    )
+    
     st.markdown("---")
     
-    # 통계
-    if st.session_state.reviews:
+    # 통계 (저장된 리뷰 집계 + 마지막 새로고침 때 같은 페이지에서 읽은 사이트 합계, 추가 접속 없음)
+    if st.session_state.selected_business and st.session_state.reviews:
         st.markdown("### 📊 통계")
-        total = len(st.session_state.reviews)
-        no_reply = len([r for r in st.session_state.reviews if not r.has_reply])
-        has_reply = total - no_reply
+        counts = get_review_counts(st.session_state.selected_business['id'])
+        site_total = st.session_state.get('site_stats', {}).get('total', 0)
+        total = max(site_total, counts['total'])
+        no_reply = counts['no_reply_count']
+        has_reply = counts['total'] - no_reply
         
         col1, col2 = st.columns(2)
         col1.metric("전체", total)
         col2.metric("미답글", no_reply, delta=f"-{has_reply}" if has_reply > 0 else None, delta_color="normal")
+        if counts['total']:
+            st.caption(f"⭐ 평균 {counts['average_rating']:.2f} (저장된 리뷰 {counts['total']}개 기준)")
+    
+    # 내보내기/가져오기 (전체 기간 데이터를 파일로)
+    with st.expander("📦 내보내기/가져오기", expanded=False):
+        export_labels = {"답글 히스토리": "reply_history", "저장된 리뷰": "reviews"}
+        export_table = export_labels[st.selectbox("데이터", list(export_labels), key="export_table")]
+        export_format = st.radio("형식", ["csv", "parquet"], horizontal=True, key="export_format")
+        export_current_only = st.checkbox(
+            "선택한 업체만", value=False, key="export_current_only",
+            disabled=not st.session_state.selected_business
+        )
+        
+        if st.button("📤 파일 만들기", use_container_width=True):
+            business_filter = (st.session_state.selected_business or {}).get('id') if export_current_only else None
+            discard_export_file()
+            # 행을 메모리에 모으지 않고 임시 파일에 바로 씀
+            export_file = tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False)
+            export_file.close()
+            try:
+                exporter = export_csv if export_format == "csv" else export_parquet
+                with st.spinner("내보내는 중..."):
+                    exported = exporter(export_table, export_file.name, business_id=business_filter)
+                st.session_state.export_file = (export_file.name, export_table, export_format, exported)
+            except Exception as e:
+                os.unlink(export_file.name)
+                st.error(f"❌ {e}")
+        
+        if st.session_state.get('export_file'):
+            path, table_name, file_format, exported = st.session_state.export_file
+            if os.path.exists(path):
+                with open(path, "rb") as fh:
+                    st.download_button(
+                        f"📥 {exported}행 다운로드",
+                        fh,
+                        file_name=f"{table_name}_{datetime.now():%Y%m%d}.{file_format}",
+                        mime="text/csv" if file_format == "csv" else "application/octet-stream",
+                        on_click=discard_export_file,
+                        use_container_width=True
+                    )
+        
+        uploaded = st.file_uploader("가져오기 (내보낸 파일 형식)", type=["csv", "parquet"], key="import_file")
+        if uploaded and st.button("📥 가져오기", use_container_width=True):
+            try:
+                imported = import_rows(
+                    export_table, uploaded,
+                    fmt="parquet" if uploaded.name.endswith(".parquet") else "csv"
+                )
+                st.success(f"✅ {imported}행 저장 완료")
+            except Exception as e:
+                st.error(f"❌ 가져오기 실패 (저장된 내용 없음): {e}")
+    
+    # 진단 (단계별 소요 시간)
+    with st.expander("🩺 진단", expanded=False):
+        summary = metrics.summary()
+        if summary:
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+            prometheus_text = metrics.export_prometheus()
+            st.download_button(
+                "📥 Prometheus 메트릭",
+                prometheus_text,
+                file_name="metrics.prom",
+                mime="text/plain",
+                use_container_width=True
+            )
+            if os.getenv("METRICS_FILE"):
+                write_prometheus(os.getenv("METRICS_FILE"))
+            if st.checkbox("최근 스팬 보기", key="show_spans"):
+                st.json(metrics.recent_spans(30))
+        else:
+            st.caption("아직 기록된 작업이 없습니다.")
+        st.caption("공유 브라우저")
+        st.json(get_browser_manager().stats(), expanded=False)
+        if st.session_state.get('browser_supervisor'):
+            st.caption("브라우저 상태 감시")
+            st.json(st.session_state.browser_supervisor.stats(), expanded=False)
+
+def configured_generator() -> AIReplyGenerator:
+    """사이드바 설정(제공자, 키, 템플릿 기준)을 반영한 답글 생성기"""
+    provider = AIProvider.OPENAI if "OpenAI" in ai_provider else AIProvider.GEMINI
+    generator = get_generator(provider, api_key, fallback_api_key or None)
+    generator.routing = routing_rules
+    # 템플릿 편집 내용 반영
+    generator.template_engine.invalidate()
+    return generator
+
+HISTORY_PAGE_SIZE = 20
+
+def show_reply_history(business: dict):
+    """답글 히스토리 (필터 + 이전/다음 페이지, 키셋 페이지네이션)"""
+    col1, col2, col3, col4 = st.columns([1, 1, 1, 2])
+    with col1:
+        scope = st.selectbox("업체", ["이 업체", "전체 업체"], key="history_scope")
+    with col2:
+        rating = st.selectbox("별점", ["전체", 5, 4, 3, 2, 1], key="history_rating")
+    with col3:
+        author = st.selectbox("작성", ["전체", "AI", "직접"], key="history_ai")
+    with col4:
+        period = st.date_input("기간", value=(), key="history_period")
+    
+    filters = {
+        'business_id': business['id'] if scope == "이 업체" else None,
+        'rating': None if rating == "전체" else rating,
+        'ai_generated': None if author == "전체" else author == "AI",
+        'since': str(period[0]) if len(period) >= 1 else None,
+        'until': str(period[1] + timedelta(days=1)) if len(period) == 2 else None,
+    }
+    # 필터가 바뀌면 첫 페이지부터 (커서 목록: 각 페이지의 시작 위치)
+    if st.session_state.get('history_filters') != filters:
+        st.session_state.history_filters = filters
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+    
+    page = get_reply_history_page(limit=HISTORY_PAGE_SIZE, cursor=cursors[-1], **filters)
+    if not page['items']:
+        st.info("조건에 맞는 답글 기록이 없습니다.")
+        return
+    
+    st.dataframe(
+        [
+            {
+                '등록 시각': item['created_at'],
+                '업체': item['business_name'],
+                '별점': '⭐' * (item['review_rating'] or 0),
+                '리뷰': item['review_content'],
+                '답글': item['reply_content'],
+                'AI': '🤖' if item['ai_generated'] else '',
+            }
+            for item in page['items']
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ 이전", disabled=len(cursors) == 1, key="history_prev", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"{len(cursors)} 페이지")
+    with col3:
+        if st.button("다음 ▶", disabled=page['next_cursor'] is None, key="history_next", use_container_width=True):
+            cursors.append(page['next_cursor'])
+            st.rerun()
 
 # ============ 메인 콘텐츠 ============
 st.markdown('<p class="main-header">🏪 네이버 플레이스 리뷰 관리</p>', unsafe_allow_html=True)
@@ -341,212 +737,305 @@ else:
     
     st.markdown("---")
     
-    # 필터 및 새로고침
-    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    review_tab, history_tab = st.tabs(["📝 리뷰", "📜 답글 히스토리"])
+
+    with history_tab:
+        show_reply_history(business)
+
+    with review_tab:
+        # 필터 및 새로고침
+        col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    
+        with col1:
+            filter_option = st.selectbox(
+                "필터",
+                ["전체", "답글 미작성", "답글 완료"],
+                key="filter_option",
+                label_visibility="collapsed"
+            )
     
-    with col1:
-        filter_option = st.selectbox(
-            "필터",
-            ["전체", "답글 미작성", "답글 완료"],
-            key="filter_option",
-            label_visibility="collapsed"
-        )
+        with col2:
+            sort_option = st.selectbox(
+                "정렬",
+                ["최신순", "별점 높은순", "별점 낮은순"],
+                key="sort_option",
+                label_visibility="collapsed"
+            )
     
-    with col2:
-        sort_option = st.selectbox(
-            "정렬",
-            ["최신순", "별점 높은순", "별점 낮은순"],
-            key="sort_option",
-            label_visibility="collapsed"
-        )
+        with col3:
+            search_query = st.text_input(
+                "검색",
+                placeholder="🔍 리뷰 내용 검색...",
+                key="search_query",
+                label_visibility="collapsed"
+            )
     
-    with col3:
-        search_query = st.text_input(
-            "검색",
-            placeholder="🔍 리뷰 내용 검색...",
-            key="search_query",
-            label_visibility="collapsed"
-        )
+        with col4:
+            refresh_btn = st.button("🔄 새로고침", use_container_width=True)
     
-    with col4:
-        refresh_btn = st.button("🔄 새로고침", use_container_width=True)
-    
-    if refresh_btn:
-        with st.spinner("리뷰 불러오는 중..."):
-            async def load_reviews():
-                scraper = ReviewScraper(st.session_state.naver_auth.context)
-                filter_map = {
-                    "전체": "all",
-                    "답글 미작성": "no_reply",
-                    "답글 완료": "has_reply"
-                }
-                reviews = await scraper.get_reviews(
-                    business_id=business['id'],
-                    filter_type=filter_map[filter_option]
-                )
-                return reviews
+        unread = st.session_state.watch_unread.get(business['id'], 0)
+        if unread and not refresh_btn:
+            st.info(f"🔔 새 리뷰 {unread}개가 있습니다. **새로고침**을 눌러 불러오세요.")
+    
+        if refresh_btn:
+            st.session_state.watch_unread.pop(business['id'], None)
+            with st.spinner("리뷰 불러오는 중..."):
+                auth = st.session_state.naver_auth
+                
+                async def load_reviews():
+                    scraper = ReviewScraper(auth.context)
+                    filter_map = {
+                        "전체": "all",
+                        "답글 미작성": "no_reply",
+                        "답글 완료": "has_reply"
+                    }
+                    reviews = await scraper.get_reviews(
+                        business_id=business['id'],
+                        filter_type=filter_map[filter_option]
+                    )
+                    # 리뷰 목록을 읽으면서 같은 페이지에서 수집한 사이트 통계 + 목록을 끝까지 읽었는지
+                    return (reviews, scraper.page_stats.get(business['id'], {}),
+                            scraper.list_complete.get(business['id'], False))
             
-            st.session_state.reviews = run_async(load_reviews())
+                try:
+                    st.session_state.reviews, st.session_state.site_stats, list_complete = run_async(
+                        session_supervisor(auth).call(load_reviews, "scrape")
+                    )
+                except BrowserCrashedError as e:
+                    st.error(f"❌ 브라우저 세션을 복구하지 못했습니다. 다시 로그인해주세요. ({e})")
+                    st.stop()
             
-            if st.session_state.reviews:
-                st.success(f"✅ {len(st.session_state.reviews)}개 리뷰 로드 완료")
-            else:
-                st.warning("리뷰를 찾을 수 없습니다. 업체 ID를 확인해주세요.")
+                if st.session_state.reviews:
+                    # 저장된 리뷰와 비교해 본문이 바뀐 리뷰의 생성 답글만 버림 (나머지는 재사용)
+                    # 목록 끝까지 읽었다고 스크래퍼가 확인한 경우에만 안 보인 리뷰를 삭제로 표시
+                    changes = sync_reviews(business['id'], st.session_state.reviews, complete=list_complete)
+                    for review_id in changes['edited'] + changes['deleted']:
+                        st.session_state.generated_replies.pop(review_id, None)
+                    delete_reply_drafts(business['id'], changes['edited'] + changes['deleted'])
+                
+                    st.success(f"✅ {len(st.session_state.reviews)}개 리뷰 로드 완료")
+                    st.caption(
+                        f"신규 {len(changes['new'])} · 수정 {len(changes['edited'])} · "
+                        f"답글 변경 {len(changes['reply_changed'])} · 삭제 {len(changes['deleted'])}"
+                    )
+                else:
+                    st.warning("리뷰를 찾을 수 없습니다. 업체 ID를 확인해주세요.")
     
-    st.markdown("---")
+        st.markdown("---")
     
-    # 일괄 처리 버튼
-    if st.session_state.reviews:
-        no_reply_reviews = [r for r in st.session_state.reviews if not r.has_reply]
+        # 일괄 처리 버튼
+        if st.session_state.reviews:
+            no_reply_reviews = [r for r in st.session_state.reviews if not r.has_reply]
+            # 저장된 초안 불러오기 (끊긴 일괄 생성, 다른 세션/워커가 만든 답글 중 현재 말투/옵션으로 만든 것만)
+            for review_id, draft in reusable_drafts(
+                business['id'], [r for r in no_reply_reviews if r.id not in st.session_state.generated_replies],
+                draft_params(get_tone_from_string(tone), include_emoji=include_emoji, max_length=max_length)
+            ).items():
+                st.session_state.generated_replies[review_id] = draft
+            # 이미 생성한 답글이 있는 리뷰는 다시 생성하지 않음
+            pending_reviews = [r for r in no_reply_reviews if r.id not in st.session_state.generated_replies]
         
-        if no_reply_reviews:
-            st.markdown(f"**미답글 리뷰: {len(no_reply_reviews)}개**")
+            if no_reply_reviews:
+                st.markdown(f"**미답글 리뷰: {len(no_reply_reviews)}개** (답글 생성 필요: {len(pending_reviews)}개)")
             
-            if st.button(f"🤖 미답글 {len(no_reply_reviews)}개 AI 답글 일괄 생성", type="primary"):
-                if not api_key:
-                    st.error("❌ AI API 키를 입력해주세요.")
-                else:
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
+                if pending_reviews and st.button(f"🤖 미답글 {len(pending_reviews)}개 AI 답글 일괄 생성", type="primary"):
+                    if not api_key:
+                        st.error("❌ AI API 키를 입력해주세요.")
+                    else:
+                        progress_bar = st.progress(0)
+                        status_text = st.empty()
+                    
+                        generator = configured_generator()
+                        routes_before = dict(generator.route_counts)
+                        # 낮은 별점/오래된 리뷰부터 생성
+                        pending_reviews = prioritize(pending_reviews, business['id'])
+                    
+                        progress = {'done': 0, 'total': len(pending_reviews)}
                     
-                    provider = AIProvider.OPENAI if "OpenAI" in ai_provider else AIProvider.GEMINI
-                    generator = AIReplyGenerator(provider, api_key)
+                        def on_progress(done, total):
+                            progress.update(done=done, total=total)
                     
-                    for i, review in enumerate(no_reply_reviews):
-                        status_text.text(f"생성 중... ({i+1}/{len(no_reply_reviews)})")
-                        
-                        reply = generator.generate_reply(
-                            review_content=review.content,
-                            store_name=business['name'],
-                            rating=review.rating,
-                            tone=get_tone_from_string(tone),
-                            include_emoji=include_emoji,
-                            max_length=max_length
+                        def show_progress():
+                            status_text.text(f"생성 중... ({progress['done']}/{progress['total']})")
+                            progress_bar.progress(progress['done'] / max(1, progress['total']))
+                    
+                        # 비슷한 짧은 리뷰는 묶어서 한 번에, 나머지는 여러 개를 동시에 생성
+                        # (답글이 나올 때마다 초안으로 저장되므로 중간에 새로고침해도 이어서 생성)
+                        results = run_async_polling(
+                            agenerate_with_drafts(
+                                generator,
+                                business['id'],
+                                pending_reviews,
+                                store_name=business['name'],
+                                tone=get_tone_from_string(tone),
+                                include_emoji=include_emoji,
+                                max_length=max_length,
+                                on_progress=on_progress
+                            ),
+                            show_progress
                         )
-                        
-                        st.session_state.generated_replies[review.id] = reply
-                        progress_bar.progress((i + 1) / len(no_reply_reviews))
+                        failed = [r for r in results if not r['reply']]
+                        for result in results:
+                            if result['reply']:
+                                st.session_state.generated_replies[result['review_id']] = result['reply']
                     
-                    status_text.text("✅ 완료!")
-                    st.success(f"✅ {len(no_reply_reviews)}개 답글 생성 완료!")
+                        status_text.text("✅ 완료!")
+                        st.success(f"✅ {len(results) - len(failed)}개 답글 생성 완료!")
+                        if failed:
+                            st.warning(f"⚠️ {len(failed)}개 생성 실패: {failed[0]['error']}")
+                        st.caption(
+                            f"템플릿 {generator.route_counts['template'] - routes_before['template']}개 · "
+                            f"AI {generator.route_counts['llm'] - routes_before['llm']}개 "
+                            f"(누적 템플릿 비율 {generator.template_hit_rate():.0%})"
+                        )
     
-    # 리뷰 목록
-    reviews_to_show = st.session_state.reviews
+        # 리뷰 목록
+        reviews_to_show = st.session_state.reviews
     
-    # 검색 필터
-    if search_query:
-        reviews_to_show = [r for r in reviews_to_show if search_query.lower() in r.content.lower()]
+        # 검색 필터
+        if search_query:
+            reviews_to_show = [r for r in reviews_to_show if search_query.lower() in r.content.lower()]
     
-    # 정렬
-    if sort_option == "별점 높은순":
-        reviews_to_show = sorted(reviews_to_show, key=lambda x: x.rating, reverse=True)
-    elif sort_option == "별점 낮은순":
-        reviews_to_show = sorted(reviews_to_show, key=lambda x: x.rating)
+        # 정렬
+        if sort_option == "별점 높은순":
+            reviews_to_show = sorted(reviews_to_show, key=lambda x: x.rating, reverse=True)
+        elif sort_option == "별점 낮은순":
+            reviews_to_show = sorted(reviews_to_show, key=lambda x: x.rating)
     
-    if not reviews_to_show:
-        if st.session_state.reviews:
-            st.info("검색 결과가 없습니다.")
-        else:
-            st.info("🔄 **새로고침** 버튼을 눌러 리뷰를 불러오세요.")
+        if not reviews_to_show:
+            if st.session_state.reviews:
+                st.info("검색 결과가 없습니다.")
+            else:
+                st.info("🔄 **새로고침** 버튼을 눌러 리뷰를 불러오세요.")
     
-    for review in reviews_to_show:
-        with st.container():
-            # 리뷰 헤더
-            col1, col2, col3 = st.columns([3, 2, 1])
+        for review in reviews_to_show:
+            with st.container():
+                # 리뷰 헤더
+                col1, col2, col3 = st.columns([3, 2, 1])
             
-            with col1:
-                st.markdown(f"**{review.author}**")
-            with col2:
-                st.markdown(f"<span class='rating-stars'>{'⭐' * review.rating}</span>", unsafe_allow_html=True)
-            with col3:
-                st.caption(review.date)
+                with col1:
+                    st.markdown(f"**{review.author}**")
+                with col2:
+                    st.markdown(f"<span class='rating-stars'>{'⭐' * review.rating}</span>", unsafe_allow_html=True)
+                with col3:
+                    st.caption(review.date)
             
-            # 리뷰 내용
-            st.markdown(f"> {review.content}")
+                # 리뷰 내용
+                st.markdown(f"> {review.content}")
+                
+                # 사진 (펼쳤을 때만 받아옴, 한 번 받은 사진은 디스크 캐시에서)
+                if review.photos and st.toggle(f"📷 사진 {len(review.photos)}장", key=f"photos_{review.id}"):
+                    photo_paths = run_async(get_photo_service().get_thumbnails(
+                        st.session_state.naver_auth.context, review.photos
+                    ))
+                    loaded = [path for path in photo_paths if path]
+                    if loaded:
+                        st.image(loaded, width=160)
+                    if len(loaded) < len(photo_paths):
+                        st.caption(f"⚠️ 사진 {len(photo_paths) - len(loaded)}장을 불러오지 못했습니다.")
             
-            if review.visit_count:
-                st.caption(f"🚶 {review.visit_count}")
+                if review.visit_count:
+                    st.caption(f"🚶 {review.visit_count}")
             
-            # 답글 상태
-            if review.has_reply:
-                st.markdown('<span class="has-reply-badge">✅ 답글 완료</span>', unsafe_allow_html=True)
-                if review.reply_content:
-                    with st.expander("💬 사장님 답글 보기"):
-                        st.info(review.reply_content)
-                        if review.reply_date:
-                            st.caption(f"작성일: {review.reply_date}")
-            else:
-                st.markdown('<span class="no-reply-badge">⏳ 답글 미작성</span>', unsafe_allow_html=True)
+                # 답글 상태
+                if review.has_reply:
+                    st.markdown('<span class="has-reply-badge">✅ 답글 완료</span>', unsafe_allow_html=True)
+                    if review.reply_content:
+                        with st.expander("💬 사장님 답글 보기"):
+                            st.info(review.reply_content)
+                            if review.reply_date:
+                                st.caption(f"작성일: {review.reply_date}")
+                else:
+                    st.markdown('<span class="no-reply-badge">⏳ 답글 미작성</span>', unsafe_allow_html=True)
                 
-                # 답글 작성 UI
-                col1, col2 = st.columns([1, 1])
+                    # 답글 작성 UI
+                    col1, col2 = st.columns([1, 1])
                 
-                with col1:
-                    if st.button("🤖 AI 답글 생성", key=f"ai_{review.id}"):
-                        if not api_key:
-                            st.error("❌ AI API 키를 입력해주세요.")
-                        else:
-                            with st.spinner("답글 생성 중..."):
-                                provider = AIProvider.OPENAI if "OpenAI" in ai_provider else AIProvider.GEMINI
-                                generator = AIReplyGenerator(provider, api_key)
-                                
-                                generated_reply = generator.generate_reply(
-                                    review_content=review.content,
-                                    store_name=business['name'],
-                                    rating=review.rating,
-                                    tone=get_tone_from_string(tone),
-                                    include_emoji=include_emoji,
-                                    max_length=max_length
-                                )
+                    with col1:
+                        if st.button("🤖 AI 답글 생성", key=f"ai_{review.id}"):
+                            if not api_key:
+                                st.error("❌ AI API 키를 입력해주세요.")
+                            else:
+                                with st.spinner("답글 생성 중..."):
+                                    generator = configured_generator()
                                 
-                                st.session_state.generated_replies[review.id] = generated_reply
-                                st.rerun()
+                                    try:
+                                        generated_reply = run_async(generator.agenerate_reply(
+                                            review_content=review.content,
+                                            store_name=business['name'],
+                                            rating=review.rating,
+                                            tone=get_tone_from_string(tone),
+                                            include_emoji=include_emoji,
+                                            max_length=max_length
+                                        ))
+                                    except ReplyGenerationError as e:
+                                        st.error(f"❌ 답글 생성 실패: {e}")
+                                    else:
+                                        st.session_state.generated_replies[review.id] = generated_reply
+                                        save_reply_draft(
+                                            business['id'], review.id, generated_reply,
+                                            provider=generator.provider.value,
+                                            params=draft_params(get_tone_from_string(tone),
+                                                                include_emoji=include_emoji, max_length=max_length),
+                                            review_hash=review.content_hash
+                                        )
+                                        st.rerun()
                 
-                # 답글 입력창
-                default_reply = st.session_state.generated_replies.get(review.id, "")
+                    # 답글 입력창
+                    default_reply = st.session_state.generated_replies.get(review.id, "")
                 
-                reply_content = st.text_area(
-                    "답글 내용",
-                    value=default_reply,
-                    key=f"textarea_{review.id}",
-                    height=100,
-                    placeholder="답글을 입력하거나 AI로 생성하세요..."
-                )
+                    reply_content = st.text_area(
+                        "답글 내용",
+                        value=default_reply,
+                        key=f"textarea_{review.id}",
+                        height=100,
+                        placeholder="답글을 입력하거나 AI로 생성하세요..."
+                    )
                 
-                with col2:
-                    if st.button("📤 답글 등록", key=f"post_{review.id}", type="primary"):
-                        if not reply_content:
-                            st.error("답글 내용을 입력해주세요.")
-                        else:
-                            with st.spinner("답글 등록 중..."):
-                                async def post():
-                                    poster = ReplyPoster(st.session_state.naver_auth.context)
-                                    result = await poster.post_reply(
-                                        business_id=business['id'],
-                                        review_id=review.id,
-                                        reply_content=reply_content
-                                    )
-                                    return result
+                    with col2:
+                        if st.button("📤 답글 등록", key=f"post_{review.id}", type="primary"):
+                            if not reply_content:
+                                st.error("답글 내용을 입력해주세요.")
+                            else:
+                                with st.spinner("답글 등록 중..."):
+                                    auth = st.session_state.naver_auth
+                                    
+                                    async def post():
+                                        poster = ReplyPoster(auth.context)
+                                        result = await poster.post_reply(
+                                            business_id=business['id'],
+                                            review_id=review.id,
+                                            reply_content=reply_content
+                                        )
+                                        return result
                                 
-                                result = run_async(post())
+                                    try:
+                                        # 등록 버튼을 누른 뒤 멈췄을 수 있으므로 시간 초과는 다시 시도하지 않음
+                                        result = run_async(session_supervisor(auth).call(
+                                            post, "post_reply", retry_on_timeout=False
+                                        ))
+                                    except BrowserCrashedError as e:
+                                        result = {'success': False, 'message': f'브라우저 오류로 등록하지 못했습니다: {e}'}
                                 
-                                if result['success']:
-                                    st.success(result['message'])
-                                    # 히스토리 저장
-                                    save_reply_history(
-                                        business_id=business['id'],
-                                        business_name=business['name'],
-                                        review_id=review.id,
-                                        review_author=review.author,
-                                        review_content=review.content,
-                                        review_rating=review.rating,
-                                        reply_content=reply_content,
-                                        ai_generated=review.id in st.session_state.generated_replies
-                                    )
-                                else:
-                                    st.error(result['message'])
+                                    if result['success']:
+                                        st.success(result['message'])
+                                        # 히스토리 저장
+                                        save_reply_history(
+                                            business_id=business['id'],
+                                            business_name=business['name'],
+                                            review_id=review.id,
+                                            review_author=review.author,
+                                            review_content=review.content,
+                                            review_rating=review.rating,
+                                            reply_content=reply_content,
+                                            ai_generated=review.id in st.session_state.generated_replies
+                                        )
+                                        set_reply_draft_status(business['id'], review.id, 'posted', reply_content)
+                                    else:
+                                        st.error(result['message'])
             
-            st.markdown("---")
+                st.markdown("---")
+
 
 # ============ 푸터 ============
 st.markdown("---")
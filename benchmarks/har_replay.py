@@ -0,0 +1,221 @@
+"""
+HAR 녹화/재생 기반 스크래퍼 성능 회귀 테스트
+
+실제 네이버 세션을 한 번 HAR 로 녹화해 두면, 이후에는 네트워크 없이 같은 응답으로
+ReviewScraper/ReplyPoster 를 실행해 추출 시간, 요청(왕복) 수, 파싱한 리뷰 수를 기준값과 비교합니다.
+
+    # 녹화 (NAVER_COOKIES 필요, 쿠키/인증 헤더는 저장 전에 제거됨)
+    python -m benchmarks.har_replay record --business-id 1234567890 --out benchmarks/har/store1
+
+    # 재생 (기준값보다 느려지거나 요청이 늘거나 리뷰가 덜 파싱되면 실패)
+    python -m benchmarks.har_replay replay benchmarks/har/store1
+
+녹화 결과는 store1.har (세션) 와 store1.json (설정/기준값) 두 파일입니다.
+--post-review-id 를 주면 실제로 답글이 등록되므로 테스트용 리뷰에만 사용하세요.
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse
+import asyncio
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 재생할 때 쓰는 가짜 쿠키 (HAR 에 쿠키가 없으므로 값은 의미 없음)
+REPLAY_COOKIES = "NID_AUT=replay; NID_SES=replay"
+
+
+async def run_session(cookies: str, business_id: str, limit: int,
+                      post_review_id: str = None, reply: str = None) -> Dict[str, float]:
+    """
+    로그인 → 리뷰 수집 → 통계 → (선택) 답글 등록을 실행하고 단계별 지표 반환
+
+    녹화와 재생이 같은 함수를 쓰므로 요청 순서가 같습니다.
+    """
+    # 환경변수(HAR_*, SMARTPLACE_BASE_URL, REVIEW_DB_PATH)를 설정한 뒤에 import 해야 함
+    from database.db import init_db
+    from services.naver_auth import NaverAuth
+    from services.review_scraper import ReviewScraper
+    from services.reply_poster import ReplyPoster
+
+    init_db()
+    metrics = {'round_trips': 0}
+    auth = NaverAuth()
+    try:
+        await auth.init_browser()
+        start = time.perf_counter()
+        if not await auth.login_with_cookies(cookies):
+            raise RuntimeError("로그인 실패 (쿠키 또는 HAR 를 확인하세요)")
+        metrics['login_s'] = time.perf_counter() - start
+
+        def count_request(_request):
+            metrics['round_trips'] += 1
+        auth.context.on("request", count_request)
+
+        scraper = ReviewScraper(auth.context)
+        start = time.perf_counter()
+        reviews = await scraper.get_reviews(business_id, limit=limit)
+        metrics['extract_s'] = time.perf_counter() - start
+        metrics['reviews'] = len(reviews)
+        metrics['with_reply'] = sum(1 for r in reviews if r.has_reply)
+
+        start = time.perf_counter()
+        stats = await scraper.get_review_stats(business_id)
+        metrics['stats_s'] = time.perf_counter() - start
+        metrics['stats_total'] = stats.get('total', 0)
+
+        if post_review_id:
+            start = time.perf_counter()
+            result = await ReplyPoster(auth.context).post_reply(business_id, post_review_id, reply)
+            metrics['post_s'] = time.perf_counter() - start
+            metrics['post_ok'] = int(bool(result.get('success')))
+    finally:
+        await auth.close()
+    return metrics
+
+
+def _session_args(config: dict) -> dict:
+    return {
+        'business_id': config['business_id'],
+        'limit': config['limit'],
+        'post_review_id': config.get('post_review_id'),
+        'reply': config.get('reply'),
+    }
+
+
+def replay(config: dict, har_path: str, repeat: int) -> Dict[str, float]:
+    """HAR 로 repeat 번 재생해 시간은 최솟값, 개수는 마지막 값 반환"""
+    os.environ['HAR_REPLAY_PATH'] = har_path
+    os.environ.pop('HAR_RECORD_DIR', None)
+    runs = [asyncio.run(run_session(REPLAY_COOKIES, **_session_args(config))) for _ in range(repeat)]
+    best = dict(runs[-1])
+    for key in best:
+        if key.endswith('_s'):
+            best[key] = min(run[key] for run in runs)
+    return best
+
+
+def check(baseline: Dict[str, float], current: Dict[str, float], tolerance: float, slack_s: float) -> List[str]:
+    """
+    기준값과 비교해 회귀 목록 반환
+
+    - *_s (시간): 기준값 × (1 + tolerance) + slack_s 를 넘으면 회귀
+    - round_trips: 기준값보다 많으면 회귀
+    - reviews, with_reply, stats_total, post_ok: 기준값보다 적으면 회귀
+    """
+    failures = []
+    for key, base in baseline.items():
+        value = current.get(key)
+        if value is None:
+            failures.append(f"{key}: 측정값 없음")
+        elif key.endswith('_s'):
+            limit = base * (1 + tolerance) + slack_s
+            if value > limit:
+                failures.append(f"{key}: {value:.3f}s > 허용 {limit:.3f}s (기준 {base:.3f}s)")
+        elif key == 'round_trips':
+            if value > base:
+                failures.append(f"{key}: {value} > 기준 {base}")
+        elif value < base:
+            failures.append(f"{key}: {value} < 기준 {base}")
+    return failures
+
+
+def cmd_record(args) -> int:
+    cookies = args.cookies or os.getenv("NAVER_COOKIES")
+    if not cookies:
+        print("NAVER_COOKIES 환경변수 또는 --cookies 가 필요합니다.", file=sys.stderr)
+        return 2
+
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    record_dir = tempfile.mkdtemp(prefix="har-record-")
+    os.environ['HAR_RECORD_DIR'] = record_dir
+    os.environ.pop('HAR_REPLAY_PATH', None)
+
+    config = {
+        'base_url': os.getenv("SMARTPLACE_BASE_URL", "https://new.smartplace.naver.com"),
+        'business_id': args.business_id,
+        'limit': args.limit,
+        'post_review_id': args.post_review_id,
+        'reply': args.reply,
+        'recorded_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    live = asyncio.run(run_session(cookies, **_session_args(config)))
+
+    recorded = sorted(glob.glob(os.path.join(record_dir, '*.har')))
+    if not recorded:
+        print("HAR 파일이 만들어지지 않았습니다.", file=sys.stderr)
+        return 1
+    har_path = str(out.with_suffix('.har'))
+    shutil.move(recorded[-1], har_path)
+    shutil.rmtree(record_dir, ignore_errors=True)
+
+    # 기준값은 재생 결과로 (실제 네트워크 지연이 들어간 녹화 시간과는 비교할 수 없음)
+    baseline = replay(config, har_path, args.repeat)
+    with open(out.with_suffix('.json'), 'w', encoding='utf-8') as f:
+        json.dump({'config': config, 'live': live, 'baseline': baseline}, f, ensure_ascii=False, indent=2)
+    print(json.dumps({'har': har_path, 'live': live, 'baseline': baseline}, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_replay(args) -> int:
+    failed = False
+    for name in args.fixtures:
+        fixture = Path(name)
+        with open(fixture.with_suffix('.json'), encoding='utf-8') as f:
+            saved = json.load(f)
+        config = saved['config']
+        # 서비스가 녹화할 때와 같은 주소로 요청해야 HAR 에서 응답을 찾음
+        if os.environ.setdefault('SMARTPLACE_BASE_URL', config['base_url']) != config['base_url']:
+            print(f"{fixture}: 다른 주소로 녹화된 HAR 은 따로 실행하세요 ({config['base_url']})", file=sys.stderr)
+            return 2
+
+        current = replay(config, str(fixture.with_suffix('.har')), args.repeat)
+        if args.update_baseline:
+            saved['baseline'] = current
+            with open(fixture.with_suffix('.json'), 'w', encoding='utf-8') as f:
+                json.dump(saved, f, ensure_ascii=False, indent=2)
+            print(f"{fixture}: 기준값 갱신 {json.dumps(current, ensure_ascii=False)}")
+            continue
+
+        failures = check(saved['baseline'], current, args.tolerance, args.slack)
+        status = "FAIL" if failures else "ok"
+        print(f"{fixture}: {status} {json.dumps(current, ensure_ascii=False)}")
+        for failure in failures:
+            print(f"  - {failure}")
+        failed = failed or bool(failures)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HAR 녹화/재생 성능 회귀 테스트")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    record = sub.add_parser('record', help="실제 세션을 HAR 로 녹화하고 기준값 저장")
+    record.add_argument('--business-id', required=True, help="업체 ID")
+    record.add_argument('--out', required=True, help="저장 경로 (확장자 제외, .har/.json 생성)")
+    record.add_argument('--limit', type=int, default=50, help="수집할 최대 리뷰 수")
+    record.add_argument('--cookies', help="네이버 쿠키 (기본값: NAVER_COOKIES 환경변수)")
+    record.add_argument('--post-review-id', help="답글 등록까지 녹화할 리뷰 ID (실제로 등록됨)")
+    record.add_argument('--reply', default="소중한 리뷰 감사합니다!", help="녹화할 때 등록할 답글")
+    record.add_argument('--repeat', type=int, default=3, help="기준값을 만들 재생 횟수")
+
+    play = sub.add_parser('replay', help="HAR 를 재생해 기준값과 비교")
+    play.add_argument('fixtures', nargs='+', help="녹화 경로 (확장자 제외 또는 .har/.json)")
+    play.add_argument('--repeat', type=int, default=3, help="재생 횟수 (시간은 최솟값 사용)")
+    play.add_argument('--tolerance', type=float, default=0.3, help="허용하는 시간 증가 비율")
+    play.add_argument('--slack', type=float, default=0.05, help="허용하는 시간 증가 절댓값 (초)")
+    play.add_argument('--update-baseline', action='store_true', help="비교하지 않고 기준값 갱신")
+
+    args = parser.parse_args(argv)
+    # 선택자 학습/통계가 운영 DB 에 섞이지 않도록 임시 DB 사용
+    os.environ.setdefault('REVIEW_DB_PATH', os.path.join(tempfile.mkdtemp(prefix="har-db-"), "har.db"))
+    return cmd_record(args) if args.command == 'record' else cmd_replay(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
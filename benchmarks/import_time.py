@@ -0,0 +1,119 @@
+"""
+콜드 스타트(import 시간)와 Streamlit rerun 오버헤드 측정
+
+    python -m benchmarks.import_time            # 결과 출력
+    python -m benchmarks.import_time --check    # 예산 초과 또는 무거운 SDK 선로딩 시 실패
+
+- 콜드 스타트: 새 인터프리터에서 모듈을 import 하는 데 걸린 시간과 그때 함께 로드된 무거운 SDK
+- rerun: streamlit.testing 의 AppTest 로 app.py 를 실행했을 때 첫 실행/이후 rerun 시간
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 첫 사용 전까지 로드되면 안 되는 SDK
+HEAVY_MODULES = ['playwright', 'openai', 'google.genai', 'lxml', 'bs4']
+
+# 콜드 스타트 측정 대상과 예산 (초)
+IMPORT_TARGETS = {
+    'services': 0.5,
+    'services.runner': 0.5,
+    'database.db': 0.3,
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_import(module: str, repeat: int = 3) -> dict:
+    """새 인터프리터에서 module import 시간 측정 (중앙값)"""
+    samples, heavy = [], []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result['elapsed'])
+        heavy = result['heavy']
+    return {'median_s': round(statistics.median(samples), 4), 'heavy_loaded': heavy}
+
+
+def measure_reruns(reruns: int = 5) -> dict:
+    """AppTest 로 app.py 첫 실행과 이후 rerun 시간 측정"""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ.setdefault('REVIEW_DB_PATH', os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    app = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=60)
+
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+
+    samples: List[float] = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        samples.append(time.perf_counter() - start)
+
+    heavy = [m for m in HEAVY_MODULES if m in sys.modules]
+    return {
+        'first_run_s': round(first, 4),
+        'rerun_median_s': round(statistics.median(samples), 4),
+        'rerun_max_s': round(max(samples), 4),
+        'exceptions': [str(e.value) for e in app.exception],
+        'heavy_loaded': heavy,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="import/rerun 시간 측정")
+    parser.add_argument('--repeat', type=int, default=3, help="모듈당 콜드 스타트 반복 횟수")
+    parser.add_argument('--reruns', type=int, default=5, help="측정할 rerun 횟수")
+    parser.add_argument('--rerun-budget', type=float, default=0.5, help="rerun 중앙값 예산 (초)")
+    parser.add_argument('--skip-app', action='store_true', help="AppTest rerun 측정 생략")
+    parser.add_argument('--check', action='store_true', help="예산 초과 시 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    report: Dict[str, dict] = {'imports': {}}
+    failures = []
+
+    for module, budget in IMPORT_TARGETS.items():
+        result = measure_import(module, args.repeat)
+        report['imports'][module] = result
+        if result['median_s'] > budget:
+            failures.append(f"{module}: {result['median_s']}s > {budget}s")
+        if result['heavy_loaded']:
+            failures.append(f"{module}: 무거운 SDK 선로딩 {result['heavy_loaded']}")
+
+    if not args.skip_app:
+        rerun = measure_reruns(args.reruns)
+        report['app'] = rerun
+        if rerun['rerun_median_s'] > args.rerun_budget:
+            failures.append(f"app rerun: {rerun['rerun_median_s']}s > {args.rerun_budget}s")
+        if rerun['heavy_loaded']:
+            failures.append(f"app: 무거운 SDK 선로딩 {rerun['heavy_loaded']}")
+        if rerun['exceptions']:
+            failures.append(f"app: 예외 발생 {rerun['exceptions']}")
+
+    report['failures'] = failures
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if (args.check and failures) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
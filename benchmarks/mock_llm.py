@@ -0,0 +1,107 @@
+"""
+OpenAI 호환 모의 LLM 서버 (벤치마크용, 네트워크 불필요)
+
+- POST /v1/chat/completions  고정 형식의 답글을 지연 시간 후 반환
+  (프롬프트가 '답글 N개' 를 요청하면 번호를 붙인 N줄로 반환)
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+
+_REPLIES = [
+    "소중한 리뷰 감사합니다! 다음 방문 때도 만족하실 수 있도록 노력하겠습니다 😊",
+    "방문해주셔서 감사합니다. 말씀해주신 부분 꼭 개선하겠습니다.",
+    "맛있게 드셨다니 저희도 기쁩니다! 또 찾아주세요 🙏",
+]
+
+
+class MockLLMServer:
+    """백그라운드 스레드에서 실행되는 OpenAI 호환 모의 서버"""
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.05,
+        host: str = '127.0.0.1',
+        port: int = 0
+    ):
+        """
+        Args:
+            latency: 응답 기본 지연 시간 (초)
+            jitter: 지연 시간 편차 (초, 균등 분포)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.state = {'lock': threading.Lock(), 'requests': 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                with server.state['lock']:
+                    server.state['requests'] += 1
+
+                if not self.path.endswith('/chat/completions'):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+
+                time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+                prompt = ''.join(m.get('content') or '' for m in request.get('messages', []))
+                prompt_chars = len(prompt)
+                variants = re.search(r'답글 (\d+)개:', prompt)
+                if variants:
+                    reply = '\n'.join(f"{i + 1}. {random.choice(_REPLIES)}" for i in range(int(variants.group(1))))
+                else:
+                    reply = random.choice(_REPLIES)
+                body = json.dumps({
+                    'id': 'chatcmpl-mock',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'mock'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': reply},
+                        'finish_reason': 'stop'
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_chars,
+                        'completion_tokens': len(reply),
+                        'total_tokens': prompt_chars + len(reply)
+                    }
+                }, ensure_ascii=False).encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'MockLLMServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,256 @@
+"""
+로컬 모의 스마트플레이스 서버 (벤치마크용, 네트워크 불필요)
+
+- GET  /                                  업체 목록 페이지
+- GET  /biz/{id}                          업체 상세 (이름/카테고리)
+- GET  /biz/{id}/review, /review/visitor  리뷰 페이지 (첫 페이지는 서버 렌더링, 더보기는 XHR)
+- GET  /api/biz/{id}/reviews?page=N       리뷰 XHR API (JSON)
+- POST /api/biz/{id}/reviews/{rid}/reply  답글 등록 API
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import html
+import json
+import random
+import re
+import threading
+import time
+
+_SAMPLE_TEXTS = [
+    "음식이 정말 맛있었어요. 다음에 또 방문할게요!",
+    "직원분들이 친절하고 매장이 깨끗해서 좋았습니다.",
+    "양이 많고 가격도 착해요. 가족끼리 오기 좋아요.",
+    "웨이팅이 조금 길었지만 기다린 보람이 있었어요.",
+    "기대보다는 평범했어요. 간이 조금 셌습니다.",
+    "주차가 불편했어요. 음식은 괜찮았습니다.",
+]
+
+_REVIEW_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>리뷰 관리 - {name}</title></head>
+<body>
+<div class="review_summary"><span class="total_count">전체 리뷰 {total}</span></div>
+<ul class="review_list">{items}</ul>
+{more}
+<script>
+let nextPage = 2;
+const totalPages = {pages};
+function bindReply(li) {{
+    const btn = li.querySelector('button.reply-btn');
+    if (!btn) return;
+    btn.addEventListener('click', () => {{
+        const form = document.createElement('div');
+        form.className = 'reply-form';
+        form.innerHTML = '<textarea class="reply-input"></textarea><button type="submit" class="submit-btn">등록</button>';
+        li.appendChild(form);
+        form.querySelector('button').addEventListener('click', async () => {{
+            const content = form.querySelector('textarea').value;
+            await fetch('/api/biz/{bid}/reviews/' + li.dataset.reviewId + '/reply', {{
+                method: 'POST', headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{content: content}})
+            }});
+            form.remove();
+        }});
+    }});
+}}
+document.querySelectorAll('li.review_item').forEach(bindReply);
+const more = document.querySelector('button.more-btn');
+if (more) more.addEventListener('click', async () => {{
+    const res = await fetch('/api/biz/{bid}/reviews?page=' + nextPage);
+    const data = await res.json();
+    const list = document.querySelector('ul.review_list');
+    for (const r of data.reviews) {{
+        list.insertAdjacentHTML('beforeend', r.html);
+        bindReply(list.lastElementChild);
+    }}
+    nextPage += 1;
+    if (nextPage > totalPages) more.remove();
+}});
+</script>
+</body></html>"""
+
+
+class MockSmartplaceConfig:
+    def __init__(
+        self,
+        businesses: int = 3,
+        reviews_per_page: int = 20,
+        pages: int = 3,
+        latency: float = 0.0,
+        seed: int = 42
+    ):
+        """
+        Args:
+            businesses: 업체 수
+            reviews_per_page: 페이지당 리뷰 수
+            pages: 업체당 리뷰 페이지 수 (1페이지 + 더보기)
+            latency: 모든 응답에 더할 지연 시간 (초)
+            seed: 합성 데이터 난수 시드
+        """
+        self.businesses = businesses
+        self.reviews_per_page = reviews_per_page
+        self.pages = pages
+        self.latency = latency
+        self.seed = seed
+
+
+def _business_ids(config: MockSmartplaceConfig) -> list:
+    return [str(1000000 + i) for i in range(config.businesses)]
+
+
+def _review(config: MockSmartplaceConfig, business_id: str, index: int) -> dict:
+    rnd = random.Random(f"{config.seed}:{business_id}:{index}")
+    rating = rnd.choice([5, 5, 5, 4, 4, 3, 2, 1])
+    has_reply = rnd.random() < 0.4
+    return {
+        'id': f"{business_id}-{index}",
+        'author': f"방문자{rnd.randint(1, 9999)}",
+        'rating': rating,
+        'content': rnd.choice(_SAMPLE_TEXTS),
+        'date': f"2024.{rnd.randint(1, 12)}.{rnd.randint(1, 28)}",
+        'reply': "방문해주셔서 감사합니다! 또 뵙겠습니다." if has_reply else None,
+    }
+
+
+def _review_html(review: dict) -> str:
+    stars = ''.join(
+        f'<span class="star{" on" if i < review["rating"] else ""}"></span>' for i in range(5)
+    )
+    if review['reply']:
+        reply = (f'<div class="owner-reply"><p>{html.escape(review["reply"])}</p>'
+                 f'<time>2024.12.1</time></div>')
+    else:
+        reply = '<button class="reply-btn">답글 달기</button>'
+    return (
+        f'<li class="review_item" data-review-id="{review["id"]}">'
+        f'<strong class="author">{html.escape(review["author"])}</strong>'
+        f'<div class="rating">{stars}</div>'
+        f'<p class="content">{html.escape(review["content"])}</p>'
+        f'<time class="date">{review["date"]}</time>'
+        f'<span class="visit">1번째 방문</span>'
+        f'{reply}</li>'
+    )
+
+
+def _make_handler(config: MockSmartplaceConfig, state: dict):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body: str, content_type: str = 'text/html; charset=utf-8', status: int = 200):
+            data = body.encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _delay(self):
+            with state['lock']:
+                state['requests'] += 1
+            if config.latency:
+                time.sleep(config.latency)
+
+        def do_GET(self):
+            self._delay()
+            parsed = urlparse(self.path)
+            path = parsed.path.rstrip('/')
+
+            if path == '':
+                items = ''.join(
+                    f'<li class="business_item" data-id="{bid}"><a href="/biz/{bid}">'
+                    f'<strong class="name">모의업체 {bid}</strong>'
+                    f'<span class="category">음식점</span></a></li>'
+                    for bid in _business_ids(config)
+                )
+                self._send(f'<html><body><ul class="business_list">{items}</ul></body></html>')
+                return
+
+            match = re.fullmatch(r'/biz/(\d+)', path)
+            if match:
+                bid = match.group(1)
+                self._send(f'<html><head><title>모의업체 {bid} : 스마트플레이스</title>'
+                           f'<meta property="og:title" content="모의업체 {bid}"></head>'
+                           f'<body><script>var biz = {{"category": "음식점"}};</script></body></html>')
+                return
+
+            match = re.fullmatch(r'/biz/(\d+)/review(?:/visitor)?', path)
+            if match:
+                bid = match.group(1)
+                reviews = [_review(config, bid, i) for i in range(config.reviews_per_page)]
+                more = '<button class="more-btn">더보기</button>' if config.pages > 1 else ''
+                self._send(_REVIEW_PAGE.format(
+                    name=f"모의업체 {bid}",
+                    total=config.reviews_per_page * config.pages,
+                    items=''.join(_review_html(r) for r in reviews),
+                    more=more,
+                    pages=config.pages,
+                    bid=bid
+                ))
+                return
+
+            match = re.fullmatch(r'/api/biz/(\d+)/reviews', path)
+            if match:
+                bid = match.group(1)
+                page_no = int(parse_qs(parsed.query).get('page', ['1'])[0])
+                start = (page_no - 1) * config.reviews_per_page
+                reviews = []
+                if 1 <= page_no <= config.pages:
+                    reviews = [_review(config, bid, i)
+                               for i in range(start, start + config.reviews_per_page)]
+                for r in reviews:
+                    r['html'] = _review_html(r)
+                self._send(json.dumps({
+                    'page': page_no,
+                    'total': config.reviews_per_page * config.pages,
+                    'reviews': reviews
+                }, ensure_ascii=False), 'application/json')
+                return
+
+            self._send('not found', 'text/plain', 404)
+
+        def do_POST(self):
+            self._delay()
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            match = re.fullmatch(r'/api/biz/(\d+)/reviews/([\w-]+)/reply', urlparse(self.path).path)
+            if not match:
+                self._send('not found', 'text/plain', 404)
+                return
+            with state['lock']:
+                state['replies'].append({
+                    'business_id': match.group(1),
+                    'review_id': match.group(2),
+                    'body': body.decode(errors='replace')
+                })
+            self._send(json.dumps({'success': True}), 'application/json')
+
+    return Handler
+
+
+class MockSmartplaceServer:
+    """백그라운드 스레드에서 실행되는 모의 스마트플레이스 서버"""
+
+    def __init__(self, config: MockSmartplaceConfig = None, host: str = '127.0.0.1', port: int = 0):
+        self.config = config or MockSmartplaceConfig()
+        self.state = {'lock': threading.Lock(), 'requests': 0, 'replies': []}
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self.config, self.state))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def business_ids(self) -> list:
+        return _business_ids(self.config)
+
+    def start(self) -> 'MockSmartplaceServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,183 @@
+"""
+오프라인 종단간 벤치마크
+
+모의 스마트플레이스/LLM 서버를 띄운 뒤 NaverAuth, ReviewScraper, AIReplyGenerator,
+ReplyPoster 를 실제 코드 그대로 실행하고 단계별 처리량과 p50/p95 지연 시간을 출력합니다.
+
+    python -m benchmarks.run --businesses 5 --reviews-per-page 30 --latency 0.05
+
+Playwright Chromium 이 설치되어 있어야 하며 외부 네트워크는 사용하지 않습니다.
+"""
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.mock_llm import MockLLMServer
+from benchmarks.mock_smartplace import MockSmartplaceConfig, MockSmartplaceServer
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """nearest-rank 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Dict[str, List[float]], wall: Dict[str, float]) -> Dict[str, dict]:
+    """단계별 요약 {stage: {count, total, throughput, p50, p95}}"""
+    summary = {}
+    for stage, values in samples.items():
+        elapsed = wall.get(stage) or sum(values)
+        summary[stage] = {
+            'count': len(values),
+            'total_s': round(elapsed, 4),
+            'throughput_per_s': round(len(values) / elapsed, 3) if elapsed else 0.0,
+            'p50_ms': round(percentile(values, 50) * 1000, 1),
+            'p95_ms': round(percentile(values, 95) * 1000, 1),
+        }
+    return summary
+
+
+def print_table(summary: Dict[str, dict]):
+    print(f"{'stage':<16}{'count':>8}{'total(s)':>12}{'ops/s':>10}{'p50(ms)':>12}{'p95(ms)':>12}")
+    for stage, s in summary.items():
+        print(f"{stage:<16}{s['count']:>8}{s['total_s']:>12.3f}{s['throughput_per_s']:>10.2f}"
+              f"{s['p50_ms']:>12.1f}{s['p95_ms']:>12.1f}")
+
+
+async def _timed(samples: list, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+async def run_pipeline(args, smartplace: MockSmartplaceServer) -> Dict[str, dict]:
+    # 서비스는 환경변수를 읽은 뒤에 import 해야 모의 서버 주소를 사용합니다.
+    from database.db import init_db
+    from services.naver_auth import NaverAuth
+    from services.review_scraper import ReviewScraper
+    from services.ai_generator import AIReplyGenerator, AIProvider
+    from services.reply_poster import ReplyPoster
+
+    init_db()
+    samples = {stage: [] for stage in ('login', 'business_list', 'scrape', 'generate', 'post')}
+    wall = {}
+
+    auth = NaverAuth()
+    try:
+        await auth.init_browser()
+        start = time.perf_counter()
+        ok = await _timed(samples['login'], auth.login_with_cookies("NID_AUT=bench; NID_SES=bench"))
+        wall['login'] = time.perf_counter() - start
+        if not ok:
+            raise RuntimeError("모의 서버 로그인 실패")
+
+        start = time.perf_counter()
+        businesses = []
+        for _ in range(args.iterations):
+            businesses = await _timed(samples['business_list'], auth.discover_businesses())
+        wall['business_list'] = time.perf_counter() - start
+
+        scraper = ReviewScraper(auth.context)
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def scrape(business_id):
+            async with semaphore:
+                return await _timed(samples['scrape'], scraper.get_reviews(business_id, limit=args.limit))
+
+        start = time.perf_counter()
+        scraped = {}
+        for _ in range(args.iterations):
+            results = await asyncio.gather(*(scrape(b['id']) for b in businesses))
+            scraped = {b['id']: r for b, r in zip(businesses, results)}
+        wall['scrape'] = time.perf_counter() - start
+
+        pending = [(bid, r) for bid, reviews in scraped.items() for r in reviews if not r.has_reply]
+
+        generator = AIReplyGenerator(AIProvider.OPENAI, "sk-bench")
+        start = time.perf_counter()
+        replies = []
+        for bid, review in pending[:args.generate]:
+            t0 = time.perf_counter()
+            reply = await generator.agenerate_reply(
+                review_content=review.content,
+                store_name=f"모의업체 {bid}",
+                rating=review.rating
+            )
+            samples['generate'].append(time.perf_counter() - t0)
+            replies.append((bid, review, reply))
+        wall['generate'] = time.perf_counter() - start
+
+        poster = ReplyPoster(auth.context)
+        start = time.perf_counter()
+        for bid, review, reply in replies[:args.post]:
+            await _timed(samples['post'], poster.post_reply(bid, review.id, reply))
+        wall['post'] = time.perf_counter() - start
+    finally:
+        await auth.close()
+
+    summary = summarize({k: v for k, v in samples.items() if v}, wall)
+    summary['_meta'] = {
+        'businesses': len(businesses),
+        'reviews_scraped': sum(len(r) for r in scraped.values()),
+        'replies_posted': len(smartplace.state['replies']),
+        'smartplace_requests': smartplace.state['requests'],
+    }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 종단간 벤치마크")
+    parser.add_argument('--businesses', type=int, default=3, help="모의 업체 수")
+    parser.add_argument('--reviews-per-page', type=int, default=20, help="페이지당 리뷰 수")
+    parser.add_argument('--pages', type=int, default=3, help="업체당 리뷰 페이지 수")
+    parser.add_argument('--latency', type=float, default=0.0, help="스마트플레이스 응답 지연 (초)")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="LLM 응답 지연 (초)")
+    parser.add_argument('--iterations', type=int, default=3, help="목록/스크래핑 반복 횟수")
+    parser.add_argument('--concurrency', type=int, default=2, help="동시 스크래핑 수")
+    parser.add_argument('--limit', type=int, default=100, help="업체당 최대 리뷰 수")
+    parser.add_argument('--generate', type=int, default=10, help="생성할 답글 수")
+    parser.add_argument('--post', type=int, default=5, help="등록할 답글 수")
+    parser.add_argument('--json', action='store_true', help="JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    smartplace = MockSmartplaceServer(MockSmartplaceConfig(
+        businesses=args.businesses,
+        reviews_per_page=args.reviews_per_page,
+        pages=args.pages,
+        latency=args.latency
+    )).start()
+    llm = MockLLMServer(latency=args.llm_latency).start()
+
+    workdir = tempfile.mkdtemp(prefix="smartplace-bench-")
+    os.environ['SMARTPLACE_BASE_URL'] = smartplace.url
+    os.environ['OPENAI_BASE_URL'] = llm.url
+    os.environ['REVIEW_DB_PATH'] = os.path.join(workdir, "bench.db")
+
+    try:
+        summary = asyncio.run(run_pipeline(args, smartplace))
+    finally:
+        smartplace.stop()
+        llm.stop()
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        meta = summary.pop('_meta')
+        print_table(summary)
+        print(json.dumps(meta, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+여러 프로세스가 같은 업체를 동시에 sync_reviews 할 때 집계(review_stats)가 맞는지 확인
+
+앱, 감시자, 실행기, 워커 프로세스가 같은 업체를 동시에 동기화할 수 있으므로
+새 리뷰가 한 번만 세어지는지(집계 == reviews 테이블 재계산) 검사합니다.
+
+    python -m benchmarks.sync_concurrency            # 결과 출력
+    python -m benchmarks.sync_concurrency --check    # 집계가 어긋나면 실패
+"""
+from pathlib import Path
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+BUSINESS_ID = "sync-concurrency"
+
+
+def _make_reviews(count: int, replied_every: int = 3) -> list:
+    from services.review_scraper import Review
+
+    return [
+        Review(
+            id=f"r{i}", author=f"작성자{i}", rating=i % 5 + 1, content=f"리뷰 본문 {i}", date="2024.1.15.월",
+            visit_count="1번째 방문", photos=[], has_reply=i % replied_every == 0,
+            reply_content="감사합니다" if i % replied_every == 0 else None, reply_date=None
+        )
+        for i in range(count)
+    ]
+
+
+def _sync_worker(db_path: str, count: int, batch_size: int, barrier):
+    from database import db
+
+    db.DATABASE_PATH = Path(db_path)
+    reviews = _make_reviews(count)
+    barrier.wait()
+    for start in range(0, count, batch_size):
+        db.sync_reviews(BUSINESS_ID, reviews[start:start + batch_size])
+
+
+def run(processes: int = 6, count: int = 300, batch_size: int = 50) -> dict:
+    """
+    processes 개 프로세스가 같은 리뷰 count 개를 동시에 동기화한 뒤 집계와 실제 행을 비교
+
+    Returns:
+        dict: {'stats', 'actual', 'ok'}
+    """
+    from database import db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "reviews.db")
+        db.DATABASE_PATH = Path(db_path)
+        db.init_db()
+        # 이미 동기화한 적 있는 업체처럼 집계 행을 미리 만들어 둠 (첫 동기화는 집계 행 생성 때문에 우연히 직렬화됨)
+        db.refresh_review_stats(BUSINESS_ID)
+
+        ctx = multiprocessing.get_context("spawn")
+        barrier = ctx.Barrier(processes)
+        procs = [ctx.Process(target=_sync_worker, args=(db_path, count, batch_size, barrier))
+                 for _ in range(processes)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        failed = [proc.exitcode for proc in procs if proc.exitcode != 0]
+
+        stats = db.get_review_counts(BUSINESS_ID)
+        with db.get_db() as conn:
+            row = conn.execute('''
+                SELECT COUNT(*) AS total, COALESCE(SUM(NOT has_reply), 0) AS no_reply_count
+                FROM reviews WHERE business_id = ? AND deleted_at IS NULL
+            ''', (BUSINESS_ID,)).fetchone()
+        actual = {'total': row['total'], 'no_reply_count': row['no_reply_count']}
+
+    ok = not failed and actual['total'] == count and all(stats[key] == actual[key] for key in actual)
+    return {'processes': processes, 'reviews': count, 'worker_failures': failed,
+            'stats': stats, 'actual': actual, 'ok': ok}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="sync_reviews 동시 실행 집계 검사")
+    parser.add_argument('--processes', type=int, default=6)
+    parser.add_argument('--reviews', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--check', action='store_true', help="집계가 실제 행과 다르면 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    result = run(args.processes, args.reviews, args.batch_size)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 1 if args.check and not result['ok'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,11 @@
-from .db import init_db, get_db, save_setting, get_setting, save_reply_history, get_reply_history
+from .db import (init_db, get_db, save_setting, get_setting, save_reply_history, get_reply_history,
+                 get_reply_history_page, add_reply_template, get_reply_templates, update_reply_template,
+                 delete_reply_template,
+                 save_business_list, get_cached_business_list, get_business_cache_age,
+                 load_selector_stats, save_selector_stats, sync_reviews, get_stored_reviews,
+                 refresh_review_stats, get_review_counts,
+                 get_photo_hashes, save_photo, get_photo_cache_size, pop_lru_photos,
+                 save_reply_draft, get_reply_drafts, set_reply_draft_status, delete_reply_drafts,
+                 get_watch_state, save_watch_state, add_watch_event, get_watch_events, get_last_watch_event_id,
+                 enqueue_work, claim_work, finish_work, requeue_worker_tasks, get_work_results, count_work)
+from .export import EXPORT_TABLES, iter_chunks, export_csv, export_parquet, import_rows
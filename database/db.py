@@ -1,16 +1,25 @@
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
+import hashlib
+import json
 import os
+import time
 
-# 데이터베이스 경로
-DATABASE_PATH = Path(__file__).parent / "reviews.db"
+from utils.metrics import timed
+from utils.records import make_review_id, make_content_hash, make_reply_hash
+
+# 데이터베이스 경로 (REVIEW_DB_PATH 환경변수로 변경 가능)
+DATABASE_PATH = Path(os.getenv("REVIEW_DB_PATH", Path(__file__).parent / "reviews.db"))
 
 def init_db():
     """데이터베이스 초기화"""
     conn = sqlite3.connect(DATABASE_PATH)
     cursor = conn.cursor()
     
+    # 여러 워커 프로세스가 동시에 쓰므로 WAL 모드 사용 (읽기가 쓰기를 막지 않음)
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     # Users 테이블 (설정 저장용)
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS settings (
@@ -38,6 +47,14 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # 히스토리 페이지 조회용 (created_at, id) 키셋 인덱스 (필터별)
+    for name, columns in (
+        ('idx_reply_history_created', 'created_at, id'),
+        ('idx_reply_history_business', 'business_id, created_at, id'),
+        ('idx_reply_history_rating', 'review_rating, created_at, id'),
+        ('idx_reply_history_ai', 'ai_generated, created_at, id'),
+    ):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON reply_history ({columns})')
     
     # Reply Templates 테이블
     cursor.execute('''
@@ -51,19 +68,241 @@ def init_db():
         )
     ''')
     
+    # Business Cache 테이블 (계정별 업체 목록 캐시)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS business_cache (
+            account_key TEXT,
+            business_id TEXT,
+            name TEXT,
+            category TEXT,
+            position INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (account_key, business_id)
+        )
+    ''')
+    
+    # Selector Stats 테이블 (레이아웃별 선택자 성공 통계)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS selector_stats (
+            fingerprint TEXT,
+            field TEXT,
+            selector TEXT,
+            hits INTEGER DEFAULT 0,
+            misses INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (fingerprint, field, selector)
+        )
+    ''')
+    
+    # Reviews 테이블 (스크래핑한 리뷰 저장)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reviews (
+            business_id TEXT,
+            review_id TEXT,
+            author TEXT,
+            rating INTEGER,
+            content TEXT,
+            date TEXT,
+            visit_count TEXT,
+            photos TEXT,
+            has_reply BOOLEAN DEFAULT 0,
+            reply_content TEXT,
+            reply_date TEXT,
+            content_hash TEXT,
+            reply_hash TEXT,
+            deleted_at TIMESTAMP,
+            first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (business_id, review_id)
+        )
+    ''')
+    _ensure_columns(cursor, 'reviews', {
+        'content_hash': 'TEXT',
+        'reply_hash': 'TEXT',
+        'deleted_at': 'TIMESTAMP',
+    })
+    
+    # Review Stats 테이블 (업체별 리뷰 집계, sync_reviews 에서 증감)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS review_stats (
+            business_id TEXT PRIMARY KEY,
+            total INTEGER DEFAULT 0,
+            rating_sum INTEGER DEFAULT 0,
+            no_reply_count INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Photo Cache 테이블 (리뷰 사진 썸네일 디스크 캐시 색인)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS photo_files (
+            content_hash TEXT PRIMARY KEY,
+            size INTEGER,
+            last_access REAL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS photo_urls (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_photo_files_last_access ON photo_files (last_access)
+    ''')
+    
+    # Reply Drafts 테이블 (생성한 답글 초안, 일괄 생성 체크포인트 겸 세션/워커 공유)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS reply_drafts (
+            business_id TEXT,
+            review_id TEXT,
+            content TEXT,
+            provider TEXT,
+            params TEXT,
+            review_hash TEXT,
+            status TEXT DEFAULT 'draft',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (business_id, review_id)
+        )
+    ''')
+    
+    # Watch State 테이블 (새 리뷰 감시: 업체별 마지막 지문/확인 간격)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS watch_state (
+            business_id TEXT PRIMARY KEY,
+            fingerprint TEXT,
+            site_total INTEGER,
+            review_rate REAL DEFAULT 0,
+            interval_s REAL,
+            last_checked_at REAL,
+            last_changed_at REAL
+        )
+    ''')
+    
+    # Watch Events 테이블 (감시가 찾은 새 리뷰 알림, 모든 세션이 공유)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS watch_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            business_id TEXT,
+            new_count INTEGER,
+            review_ids TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_watch_events_business ON watch_events (business_id, id)
+    ''')
+    
+    # Work Queue 테이블 (워커 프로세스 작업 분배)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS work_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT,
+            kind TEXT,
+            account_key TEXT,
+            business_id TEXT,
+            shard INTEGER,
+            payload TEXT,
+            status TEXT DEFAULT 'pending',
+            worker TEXT,
+            attempts INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_work_queue_batch_status
+        ON work_queue (batch_id, status, shard, id)
+    ''')
+    
+    # Post Slots 테이블 (계정별 다음 등록 가능 시각, 여러 워커 프로세스가 같은 등록 간격을 공유)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS post_slots (
+            account_key TEXT PRIMARY KEY,
+            next_at REAL
+        )
+    ''')
+    
+    _migrate_review_identity(cursor)
+    
     conn.commit()
     conn.close()
 
+# 리뷰 ID/해시 계산 방식 버전 (settings 의 review_identity_version 과 다르면 init_db 에서 다시 계산)
+REVIEW_IDENTITY_VERSION = '2'
+
+def _legacy_review_id(business_id: str, author: str, date: str, content: str) -> str:
+    """버전 1 의 리뷰 ID (공백을 한 칸으로만 줄임) - 이전에 만든 ID 인지 알아보는 데만 사용"""
+    key = '\x1f'.join(' '.join((part or '').split()) for part in (business_id, author, date, content))
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+def _migrate_review_identity(cursor):
+    """
+    저장된 리뷰의 ID/해시를 공백 없는 정규화 텍스트 기준으로 다시 계산 (버전마다 한 번)
+    
+    이전에는 요소 경로와 HTML 경로가 공백을 다르게 읽어 같은 리뷰가 다른 ID/해시로 저장될 수 있었습니다.
+    작성자/날짜/본문으로 만든 ID(data-review-id 가 없던 리뷰)는 새 ID 로 바꾸고, 같은 새 ID 가 되는
+    중복 행은 가장 최근에 갱신된 것만 남긴 뒤 집계를 다시 계산합니다.
+    """
+    cursor.execute("SELECT value FROM settings WHERE key = 'review_identity_version'")
+    row = cursor.fetchone()
+    if row and row[0] == REVIEW_IDENTITY_VERSION:
+        return
+    
+    cursor.execute('''
+        SELECT business_id, review_id, author, rating, content, date, reply_content, content_hash
+        FROM reviews ORDER BY deleted_at IS NOT NULL, updated_at DESC
+    ''')
+    kept = set()
+    for business_id, review_id, author, rating, content, date, reply_content, old_hash in cursor.fetchall():
+        new_id = review_id
+        if review_id == _legacy_review_id(business_id, author, date, content):
+            new_id = make_review_id(author, date, content, business_id)
+        new_hash = make_content_hash(rating, content)
+        if (business_id, new_id) in kept:
+            # 같은 리뷰가 다른 ID 로 한 번 더 저장된 행
+            cursor.execute('DELETE FROM reviews WHERE business_id = ? AND review_id = ?', (business_id, review_id))
+            continue
+        kept.add((business_id, new_id))
+        cursor.execute('''
+            UPDATE reviews SET review_id = ?, content_hash = ?, reply_hash = ?
+            WHERE business_id = ? AND review_id = ?
+        ''', (new_id, new_hash, make_reply_hash(reply_content), business_id, review_id))
+        if new_id != review_id or new_hash != old_hash:
+            # 초안은 리뷰 내용 해시가 같을 때만 다시 쓰므로 함께 옮김
+            cursor.execute('''
+                UPDATE OR IGNORE reply_drafts SET review_id = ?, review_hash = ?
+                WHERE business_id = ? AND review_id = ? AND review_hash = ?
+            ''', (new_id, new_hash, business_id, review_id, old_hash))
+    
+    _rebuild_review_stats(cursor)
+    cursor.execute('''
+        INSERT INTO settings (key, value) VALUES ('review_identity_version', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (REVIEW_IDENTITY_VERSION,))
+
+def _ensure_columns(cursor, table: str, columns: dict):
+    """이전 버전에서 만든 테이블에 빠진 컬럼 추가"""
+    cursor.execute(f'PRAGMA table_info({table})')
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+
 @contextmanager
 def get_db():
     """데이터베이스 연결 컨텍스트 매니저"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
     finally:
         conn.close()
 
+@timed("db_write", table="settings")
 def save_setting(key: str, value: str):
     """설정 저장"""
     with get_db() as conn:
@@ -83,6 +322,7 @@ def get_setting(key: str, default: str = None) -> str:
         row = cursor.fetchone()
         return row['value'] if row else default
 
+@timed("db_write", table="reply_history")
 def save_reply_history(business_id: str, business_name: str, review_id: str, 
                        review_author: str, review_content: str, review_rating: int,
                        reply_content: str, ai_generated: bool = False):
@@ -99,12 +339,689 @@ def save_reply_history(business_id: str, business_name: str, review_id: str,
         conn.commit()
 
 def get_reply_history(limit: int = 50) -> list:
-    """답글 히스토리 조회"""
+    """답글 히스토리 조회 (최신순)"""
+    return get_reply_history_page(limit=limit)['items']
+
+def get_reply_history_page(limit: int = 50, cursor: tuple = None, business_id: str = None,
+                           rating: int = None, ai_generated: bool = None,
+                           since: str = None, until: str = None) -> dict:
+    """
+    답글 히스토리 페이지 조회 (최신순, (created_at, id) 키셋 페이지네이션)
+    
+    OFFSET 대신 이전 페이지의 마지막 행 다음부터 인덱스를 읽으므로 몇 번째 페이지든 비용이 같습니다.
+    
+    Args:
+        limit: 페이지 크기
+        cursor: 이전 페이지의 next_cursor (None 이면 첫 페이지)
+        business_id: 업체 필터
+        rating: 별점 필터
+        ai_generated: AI 생성 여부 필터
+        since / until: 기간 필터 ('YYYY-MM-DD', until 은 미포함)
+    
+    Returns:
+        dict: {'items': 행 목록, 'next_cursor': 다음 페이지 커서 (마지막 페이지면 None)}
+    """
+    conditions, params = [], []
+    if business_id:
+        conditions.append('business_id = ?')
+        params.append(business_id)
+    if rating is not None:
+        conditions.append('review_rating = ?')
+        params.append(rating)
+    if ai_generated is not None:
+        conditions.append('ai_generated = ?')
+        params.append(1 if ai_generated else 0)
+    if since:
+        conditions.append('created_at >= ?')
+        params.append(since)
+    if until:
+        conditions.append('created_at < ?')
+        params.append(until)
+    if cursor:
+        conditions.append('(created_at, id) < (?, ?)')
+        params.extend(cursor)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    with get_db() as conn:
+        rows = conn.execute(f'''
+            SELECT * FROM reply_history {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', (*params, limit + 1)).fetchall()
+    items = [dict(row) for row in rows[:limit]]
+    has_more = len(rows) > limit
+    return {
+        'items': items,
+        'next_cursor': (items[-1]['created_at'], items[-1]['id']) if has_more else None,
+    }
+
+@timed("db_write", table="reply_templates")
+def add_reply_template(name: str, content: str, tone: str = None, for_rating: int = None) -> int:
+    """
+    답글 템플릿 추가
+    
+    Args:
+        name: 템플릿 이름
+        content: 템플릿 내용 ({store_name}, {keyword}, [표현1|표현2] 등 사용 가능)
+        tone: 적용할 톤 (ReplyTone 값, None 이면 모든 톤)
+        for_rating: 적용할 별점 (None 이면 모든 별점)
+    
+    Returns:
+        int: 템플릿 ID
+    """
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT * FROM reply_history 
-            ORDER BY created_at DESC 
-            LIMIT ?
-        ''', (limit,))
+            INSERT INTO reply_templates (name, content, tone, for_rating)
+            VALUES (?, ?, ?, ?)
+        ''', (name, content, tone, for_rating))
+        conn.commit()
+        return cursor.lastrowid
+
+def get_reply_templates(tone: str = None, rating: int = None) -> list:
+    """
+    답글 템플릿 조회 (tone/rating 을 주면 해당 조건에 쓸 수 있는 템플릿만)
+    """
+    query = 'SELECT * FROM reply_templates WHERE 1 = 1'
+    params = []
+    if tone is not None:
+        query += ' AND (tone IS NULL OR tone = ?)'
+        params.append(tone)
+    if rating is not None:
+        query += ' AND (for_rating IS NULL OR for_rating = ?)'
+        params.append(rating)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query + ' ORDER BY id', params)
+        return [dict(row) for row in cursor.fetchall()]
+
+@timed("db_write", table="reply_templates")
+def update_reply_template(template_id: int, **fields) -> bool:
+    """답글 템플릿 수정 (name, content, tone, for_rating 중 전달한 항목만)"""
+    columns = {k: v for k, v in fields.items() if k in ('name', 'content', 'tone', 'for_rating')}
+    if not columns:
+        return False
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE reply_templates SET {', '.join(f'{k} = ?' for k in columns)} WHERE id = ?",
+            (*columns.values(), template_id)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+@timed("db_write", table="reply_templates")
+def delete_reply_template(template_id: int) -> bool:
+    """답글 템플릿 삭제"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM reply_templates WHERE id = ?', (template_id,))
+        conn.commit()
+        return cursor.rowcount > 0
+
+@timed("db_write", table="business_cache")
+def save_business_list(account_key: str, businesses: list):
+    """업체 목록 캐시 저장 (계정 단위로 통째로 교체)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM business_cache WHERE account_key = ?', (account_key,))
+        cursor.executemany('''
+            INSERT INTO business_cache (account_key, business_id, name, category, position)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(account_key, b['id'], b.get('name', ''), b.get('category', ''), i)
+              for i, b in enumerate(businesses)])
+        conn.commit()
+
+def get_cached_business_list(account_key: str) -> list:
+    """캐시된 업체 목록 조회"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT business_id, name, category FROM business_cache
+            WHERE account_key = ?
+            ORDER BY position
+        ''', (account_key,))
+        return [{'id': row['business_id'], 'name': row['name'], 'category': row['category']}
+                for row in cursor.fetchall()]
+
+def get_business_cache_age(account_key: str) -> float:
+    """업체 목록 캐시 경과 시간(초) 조회. 캐시가 없으면 None"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT strftime('%s', 'now') - strftime('%s', MIN(updated_at)) AS age
+            FROM business_cache WHERE account_key = ?
+        ''', (account_key,))
+        row = cursor.fetchone()
+        return float(row['age']) if row and row['age'] is not None else None
+
+def load_selector_stats() -> list:
+    """선택자 통계 전체 조회"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT fingerprint, field, selector, hits, misses FROM selector_stats')
         return [dict(row) for row in cursor.fetchall()]
+
+@timed("db_write", table="selector_stats")
+def save_selector_stats(rows: list):
+    """선택자 통계 저장 [(fingerprint, field, selector, hits, misses), ...]"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO selector_stats (fingerprint, field, selector, hits, misses, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(fingerprint, field, selector)
+            DO UPDATE SET hits=excluded.hits, misses=excluded.misses, updated_at=CURRENT_TIMESTAMP
+        ''', rows)
+        conn.commit()
+
+@timed("db_write", table="reviews")
+def sync_reviews(business_id: str, reviews: list, complete: bool = False) -> dict:
+    """
+    스크래핑한 리뷰를 저장된 리뷰와 비교해 바뀐 것만 저장
+    
+    Args:
+        business_id: 업체 ID
+        reviews: Review 목록
+        complete: 업체의 리뷰를 빠짐없이 가져온 경우 True (이때만 사라진 리뷰를 삭제로 표시)
+    
+    Returns:
+        dict: {'new', 'edited', 'reply_changed', 'deleted', 'unchanged'} 각각 리뷰 ID 목록
+    """
+    changes = {'new': [], 'edited': [], 'reply_changed': [], 'deleted': [], 'unchanged': []}
+    with get_db() as conn:
+        cursor = conn.cursor()
+        # 비교용 조회와 저장/집계 증감을 한 쓰기 잠금 안에서 (여러 프로세스가 같은 업체를 동시에 동기화해도
+        # 같은 새 리뷰를 두 번 세지 않도록)
+        cursor.execute('BEGIN IMMEDIATE')
+        _ensure_review_stats(cursor, business_id)
+        columns = 'review_id, content_hash, reply_hash, deleted_at, rating, has_reply'
+        if complete:
+            cursor.execute(f'SELECT {columns} FROM reviews WHERE business_id = ?', (business_id,))
+            stored = {row['review_id']: row for row in cursor.fetchall()}
+        else:
+            # 일부만 가져온 경우 (스트리밍 배치 등) 해당 리뷰만 조회해 저장된 리뷰 수와 관계없이 일정한 비용
+            stored = {}
+            ids = list(dict.fromkeys(r.id for r in reviews))
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT {columns} FROM reviews
+                    WHERE business_id = ? AND review_id IN ({', '.join('?' * len(chunk))})
+                ''', [business_id] + chunk)
+                stored.update({row['review_id']: row for row in cursor.fetchall()})
+        
+        # 집계 증감 (전체 재계산 없이 바뀐 리뷰만 반영)
+        delta = {'total': 0, 'rating_sum': 0, 'no_reply_count': 0}
+        rows = []
+        seen = set()
+        for r in reviews:
+            if r.id in seen:
+                continue
+            seen.add(r.id)
+            content_hash, reply_hash = r.content_hash, r.reply_hash
+            old = stored.get(r.id)
+            if old is None or old['deleted_at']:
+                changes['new'].append(r.id)
+                delta['total'] += 1
+                delta['rating_sum'] += r.rating
+                delta['no_reply_count'] += not r.has_reply
+            elif old['content_hash'] != content_hash:
+                changes['edited'].append(r.id)
+            elif old['reply_hash'] != reply_hash:
+                changes['reply_changed'].append(r.id)
+            else:
+                changes['unchanged'].append(r.id)
+                continue
+            if old is not None and not old['deleted_at']:
+                delta['rating_sum'] += r.rating - (old['rating'] or 0)
+                delta['no_reply_count'] += (not r.has_reply) - (not old['has_reply'])
+            rows.append((business_id, r.id, r.author, r.rating, r.content, r.date, r.visit_count,
+                         json.dumps(r.photos or [], ensure_ascii=False), r.has_reply, r.reply_content,
+                         r.reply_date, content_hash, reply_hash))
+        
+        cursor.executemany('''
+            INSERT INTO reviews
+            (business_id, review_id, author, rating, content, date, visit_count, photos,
+             has_reply, reply_content, reply_date, content_hash, reply_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(business_id, review_id) DO UPDATE SET
+                author=excluded.author, rating=excluded.rating, content=excluded.content,
+                date=excluded.date, visit_count=excluded.visit_count, photos=excluded.photos,
+                has_reply=excluded.has_reply, reply_content=excluded.reply_content,
+                reply_date=excluded.reply_date, content_hash=excluded.content_hash,
+                reply_hash=excluded.reply_hash, deleted_at=NULL, updated_at=CURRENT_TIMESTAMP
+        ''', rows)
+        
+        if complete:
+            changes['deleted'] = [
+                review_id for review_id, row in stored.items()
+                if review_id not in seen and not row['deleted_at']
+            ]
+            cursor.executemany('''
+                UPDATE reviews SET deleted_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
+                WHERE business_id = ? AND review_id = ?
+            ''', [(business_id, review_id) for review_id in changes['deleted']])
+            for review_id in changes['deleted']:
+                old = stored[review_id]
+                delta['total'] -= 1
+                delta['rating_sum'] -= old['rating'] or 0
+                delta['no_reply_count'] -= not old['has_reply']
+        
+        if any(delta.values()):
+            cursor.execute('''
+                UPDATE review_stats SET total = total + ?, rating_sum = rating_sum + ?,
+                    no_reply_count = no_reply_count + ?, updated_at = CURRENT_TIMESTAMP
+                WHERE business_id = ?
+            ''', (delta['total'], delta['rating_sum'], delta['no_reply_count'], business_id))
+        conn.commit()
+    return changes
+
+def _ensure_review_stats(cursor, business_id: str):
+    """집계 행이 없으면 (이전 버전 DB 등) 저장된 리뷰로 한 번 계산해서 생성"""
+    cursor.execute('SELECT 1 FROM review_stats WHERE business_id = ?', (business_id,))
+    if cursor.fetchone() is None:
+        _rebuild_review_stats(cursor, business_id)
+
+def _rebuild_review_stats(cursor, business_id: str = None):
+    """저장된 리뷰로 집계 다시 계산 (business_id 가 None 이면 전체 업체)"""
+    where = 'AND business_id = ?' if business_id else ''
+    params = (business_id,) if business_id else ()
+    cursor.execute(f'''
+        INSERT INTO review_stats (business_id, total, rating_sum, no_reply_count, updated_at)
+        SELECT business_id, COUNT(*), COALESCE(SUM(rating), 0), COALESCE(SUM(NOT has_reply), 0), CURRENT_TIMESTAMP
+        FROM reviews WHERE deleted_at IS NULL {where}
+        GROUP BY business_id
+        ON CONFLICT(business_id) DO UPDATE SET
+            total=excluded.total, rating_sum=excluded.rating_sum,
+            no_reply_count=excluded.no_reply_count, updated_at=CURRENT_TIMESTAMP
+    ''', params)
+    if business_id:
+        # 리뷰가 하나도 없는 업체도 0 으로 기록
+        cursor.execute('''
+            INSERT OR IGNORE INTO review_stats (business_id, total, rating_sum, no_reply_count)
+            VALUES (?, 0, 0, 0)
+        ''', (business_id,))
+    else:
+        cursor.execute('''
+            UPDATE review_stats SET total = 0, rating_sum = 0, no_reply_count = 0
+            WHERE business_id NOT IN (SELECT DISTINCT business_id FROM reviews WHERE deleted_at IS NULL)
+        ''')
+
+@timed("db_write", table="review_stats")
+def refresh_review_stats(business_id: str = None):
+    """리뷰를 sync_reviews 밖에서 바꾼 경우(가져오기 등) 집계 다시 계산"""
+    with get_db() as conn:
+        _rebuild_review_stats(conn.cursor(), business_id)
+        conn.commit()
+
+def get_review_counts(business_id: str) -> dict:
+    """
+    저장된 리뷰 집계 (행 하나만 읽음)
+    
+    Returns:
+        dict: {'total', 'average_rating', 'no_reply_count'}
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM review_stats WHERE business_id = ?', (business_id,))
+        row = cursor.fetchone()
+        if row is None:
+            _rebuild_review_stats(cursor, business_id)
+            conn.commit()
+            cursor.execute('SELECT * FROM review_stats WHERE business_id = ?', (business_id,))
+            row = cursor.fetchone()
+    total = row['total'] or 0
+    return {
+        'total': total,
+        'average_rating': round(row['rating_sum'] / total, 2) if total else 0.0,
+        'no_reply_count': row['no_reply_count'] or 0,
+    }
+
+def get_stored_reviews(business_id: str, include_deleted: bool = False) -> list:
+    """저장된 리뷰 조회"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT * FROM reviews WHERE business_id = ?
+            {'' if include_deleted else 'AND deleted_at IS NULL'}
+            ORDER BY first_seen_at DESC, review_id
+        ''', (business_id,))
+        rows = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['photos'] = json.loads(item['photos'] or '[]')
+            item['has_reply'] = bool(item['has_reply'])
+            rows.append(item)
+        return rows
+
+def get_photo_hashes(urls: list) -> dict:
+    """
+    캐시된 사진 URL 의 내용 해시 조회 (조회한 파일은 최근 사용으로 표시)
+    
+    Returns:
+        dict: {url: content_hash} (캐시에 없는 URL 은 빠짐)
+    """
+    if not urls:
+        return {}
+    found = {}
+    with get_db() as conn:
+        # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+        for start in range(0, len(urls), 500):
+            chunk = urls[start:start + 500]
+            rows = conn.execute(f'''
+                SELECT u.url, u.content_hash FROM photo_urls u
+                JOIN photo_files f ON f.content_hash = u.content_hash
+                WHERE u.url IN ({', '.join('?' * len(chunk))})
+            ''', chunk).fetchall()
+            found.update({row['url']: row['content_hash'] for row in rows})
+        if found:
+            conn.executemany(
+                'UPDATE photo_files SET last_access = ? WHERE content_hash = ?',
+                [(time.time(), h) for h in set(found.values())]
+            )
+            conn.commit()
+    return found
+
+@timed("db_write", table="photo_files")
+def save_photo(url: str, content_hash: str, size: int):
+    """사진 URL 과 캐시 파일(내용 해시) 연결 저장"""
+    with get_db() as conn:
+        conn.execute('''
+            INSERT INTO photo_files (content_hash, size, last_access) VALUES (?, ?, ?)
+            ON CONFLICT(content_hash) DO UPDATE SET size=excluded.size, last_access=excluded.last_access
+        ''', (content_hash, size, time.time()))
+        conn.execute('''
+            INSERT INTO photo_urls (url, content_hash) VALUES (?, ?)
+            ON CONFLICT(url) DO UPDATE SET content_hash=excluded.content_hash
+        ''', (url, content_hash))
+        conn.commit()
+
+def get_photo_cache_size() -> int:
+    """캐시된 사진 파일 전체 크기 (바이트)"""
+    with get_db() as conn:
+        return conn.execute('SELECT COALESCE(SUM(size), 0) FROM photo_files').fetchone()[0]
+
+@timed("db_write", table="photo_files")
+def pop_lru_photos(bytes_to_free: int) -> list:
+    """
+    가장 오래 사용하지 않은 사진부터 bytes_to_free 이상 색인에서 제거
+    
+    Returns:
+        list: 제거한 content_hash 목록 (호출한 쪽에서 파일 삭제)
+    """
+    removed, freed = [], 0
+    with get_db() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        for row in conn.execute('SELECT content_hash, size FROM photo_files ORDER BY last_access').fetchall():
+            if freed >= bytes_to_free:
+                break
+            removed.append(row['content_hash'])
+            freed += row['size'] or 0
+        conn.executemany('DELETE FROM photo_files WHERE content_hash = ?', [(h,) for h in removed])
+        conn.executemany('DELETE FROM photo_urls WHERE content_hash = ?', [(h,) for h in removed])
+        conn.commit()
+    return removed
+
+@timed("db_write", table="reply_drafts")
+def save_reply_draft(business_id: str, review_id: str, content: str, provider: str = None,
+                     params: dict = None, review_hash: str = None, status: str = 'draft'):
+    """
+    답글 초안 저장 (같은 리뷰의 초안은 덮어씀)
+    
+    Args:
+        provider: 만든 곳 ('openai', 'gemini', 'template', 'manual' 등)
+        params: 생성 옵션 (톤, 길이 등 - 같은 옵션으로 다시 생성할 때만 재사용)
+        review_hash: 생성할 때의 리뷰 내용 해시 (리뷰가 수정되면 재사용하지 않음)
+        status: 'draft' 또는 'posted'
+    """
+    with get_db() as conn:
+        conn.execute('''
+            INSERT INTO reply_drafts (business_id, review_id, content, provider, params, review_hash, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(business_id, review_id) DO UPDATE SET
+                content=excluded.content, provider=excluded.provider, params=excluded.params,
+                review_hash=excluded.review_hash, status=excluded.status, updated_at=CURRENT_TIMESTAMP
+        ''', (business_id, review_id, content, provider,
+              json.dumps(params or {}, ensure_ascii=False, sort_keys=True), review_hash, status))
+        conn.commit()
+
+def get_reply_drafts(business_id: str, review_ids: list = None, status: str = 'draft') -> dict:
+    """
+    답글 초안 조회
+    
+    Args:
+        review_ids: 이 리뷰들만 (None 이면 업체 전체)
+        status: 이 상태만 (None 이면 전체)
+    
+    Returns:
+        dict: {review_id: {'content', 'provider', 'params', 'review_hash', 'status', ...}}
+    """
+    conditions, params = ['business_id = ?'], [business_id]
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+    drafts = {}
+    with get_db() as conn:
+        chunks = [None] if review_ids is None else [
+            review_ids[start:start + 500] for start in range(0, len(review_ids), 500)
+        ]
+        for chunk in chunks:
+            where = list(conditions)
+            if chunk is not None:
+                where.append(f"review_id IN ({', '.join('?' * len(chunk))})")
+            rows = conn.execute(
+                f"SELECT * FROM reply_drafts WHERE {' AND '.join(where)}", params + (chunk or [])
+            ).fetchall()
+            for row in rows:
+                item = dict(row)
+                item['params'] = json.loads(item['params'] or '{}')
+                drafts[item['review_id']] = item
+    return drafts
+
+@timed("db_write", table="reply_drafts")
+def set_reply_draft_status(business_id: str, review_id: str, status: str, content: str = None):
+    """초안 상태 변경 (등록한 답글은 'posted', content 를 주면 실제 등록한 내용으로 교체)"""
+    with get_db() as conn:
+        conn.execute('''
+            UPDATE reply_drafts SET status = ?, content = COALESCE(?, content), updated_at = CURRENT_TIMESTAMP
+            WHERE business_id = ? AND review_id = ?
+        ''', (status, content, business_id, review_id))
+        conn.commit()
+
+@timed("db_write", table="reply_drafts")
+def delete_reply_drafts(business_id: str, review_ids: list):
+    """초안 삭제 (수정/삭제된 리뷰)"""
+    with get_db() as conn:
+        conn.executemany('DELETE FROM reply_drafts WHERE business_id = ? AND review_id = ?',
+                         [(business_id, review_id) for review_id in review_ids])
+        conn.commit()
+
+def get_watch_state(business_id: str) -> dict:
+    """업체 감시 상태 (없으면 빈 dict)"""
+    with get_db() as conn:
+        row = conn.execute('SELECT * FROM watch_state WHERE business_id = ?', (business_id,)).fetchone()
+        return dict(row) if row else {}
+
+@timed("db_write", table="watch_state")
+def save_watch_state(business_id: str, fingerprint: str, site_total: int, review_rate: float,
+                     interval_s: float, last_checked_at: float, last_changed_at: float = None):
+    """업체 감시 상태 저장"""
+    with get_db() as conn:
+        conn.execute('''
+            INSERT INTO watch_state
+            (business_id, fingerprint, site_total, review_rate, interval_s, last_checked_at, last_changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(business_id) DO UPDATE SET
+                fingerprint=excluded.fingerprint, site_total=excluded.site_total,
+                review_rate=excluded.review_rate, interval_s=excluded.interval_s,
+                last_checked_at=excluded.last_checked_at,
+                last_changed_at=COALESCE(excluded.last_changed_at, watch_state.last_changed_at)
+        ''', (business_id, fingerprint, site_total, review_rate, interval_s, last_checked_at, last_changed_at))
+        conn.commit()
+
+@timed("db_write", table="watch_events")
+def add_watch_event(business_id: str, review_ids: list) -> int:
+    """새 리뷰 알림 저장 (알림 ID 반환)"""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            INSERT INTO watch_events (business_id, new_count, review_ids) VALUES (?, ?, ?)
+        ''', (business_id, len(review_ids), json.dumps(review_ids, ensure_ascii=False)))
+        conn.commit()
+        return cursor.lastrowid
+
+def get_watch_events(business_ids: list = None, after_id: int = 0, limit: int = 50) -> list:
+    """
+    after_id 이후의 새 리뷰 알림 (오래된 순)
+    
+    Args:
+        business_ids: 이 업체들만 (None 이면 전체)
+        after_id: 이미 본 마지막 알림 ID
+    """
+    params = [after_id]
+    where = 'id > ?'
+    if business_ids is not None:
+        if not business_ids:
+            return []
+        where += f" AND business_id IN ({', '.join('?' * len(business_ids))})"
+        params.extend(business_ids)
+    with get_db() as conn:
+        rows = conn.execute(
+            f'SELECT * FROM watch_events WHERE {where} ORDER BY id LIMIT ?', params + [limit]
+        ).fetchall()
+    events = []
+    for row in rows:
+        item = dict(row)
+        item['review_ids'] = json.loads(item['review_ids'] or '[]')
+        events.append(item)
+    return events
+
+def get_last_watch_event_id() -> int:
+    """가장 최근 알림 ID (없으면 0)"""
+    with get_db() as conn:
+        return conn.execute('SELECT COALESCE(MAX(id), 0) FROM watch_events').fetchone()[0]
+
+@timed("db_write", table="work_queue")
+def enqueue_work(batch_id: str, tasks: list):
+    """
+    작업 등록
+    
+    Args:
+        batch_id: 배치 ID
+        tasks: [{'kind', 'account_key', 'business_id', 'shard', 'payload'}, ...]
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO work_queue (batch_id, kind, account_key, business_id, shard, payload)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(batch_id, t['kind'], t.get('account_key'), t.get('business_id'), t.get('shard', 0),
+               json.dumps(t.get('payload') or {}, ensure_ascii=False)) for t in tasks])
+        conn.commit()
+
+def claim_work(batch_id: str, worker: str, shard: int) -> dict:
+    """
+    대기 중인 작업 하나를 원자적으로 가져오기 (자기 샤드 우선, 없으면 다른 샤드 작업)
+    
+    Returns:
+        dict: 작업 정보 (없으면 None)
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            SELECT * FROM work_queue
+            WHERE batch_id = ? AND status = 'pending'
+            ORDER BY (shard = ?) DESC, id
+            LIMIT 1
+        ''', (batch_id, shard))
+        row = cursor.fetchone()
+        if not row:
+            conn.commit()
+            return None
+        cursor.execute('''
+            UPDATE work_queue
+            SET status = 'running', worker = ?, attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (worker, row['id']))
+        conn.commit()
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'] or '{}')
+        return task
+
+@timed("db_write", table="post_slots")
+def reserve_post_slot(account_key: str, interval: float) -> float:
+    """
+    계정의 다음 등록 시각을 원자적으로 예약 (여러 프로세스가 같은 계정으로 등록해도 간격 유지)
+    
+    Args:
+        account_key: 계정 키
+        interval: 등록 사이 최소 간격 (초)
+    
+    Returns:
+        float: 예약한 시각까지 기다려야 하는 시간 (초, 바로 등록 가능하면 0)
+    """
+    now = time.time()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        row = cursor.execute('SELECT next_at FROM post_slots WHERE account_key = ?', (account_key,)).fetchone()
+        slot = max(now, row['next_at']) if row else now
+        cursor.execute('''
+            INSERT INTO post_slots (account_key, next_at) VALUES (?, ?)
+            ON CONFLICT(account_key) DO UPDATE SET next_at = excluded.next_at
+        ''', (account_key, slot + interval))
+        conn.commit()
+    return slot - now
+
+@timed("db_write", table="work_queue")
+def finish_work(task_id: int, result: dict = None, error: str = None):
+    """작업 완료/실패 기록"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE work_queue
+            SET status = ?, result = ?, error = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', ('failed' if error else 'done',
+              json.dumps(result, ensure_ascii=False) if result is not None else None,
+              error, task_id))
+        conn.commit()
+
+def requeue_worker_tasks(batch_id: str, worker: str, max_attempts: int = 3) -> int:
+    """죽은 워커가 잡고 있던 작업을 다시 대기 상태로 (시도 횟수를 넘으면 실패 처리)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE work_queue
+            SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = CASE WHEN attempts >= ? THEN '워커 비정상 종료' ELSE error END,
+                worker = NULL, updated_at = CURRENT_TIMESTAMP
+            WHERE batch_id = ? AND worker = ? AND status = 'running'
+        ''', (max_attempts, max_attempts, batch_id, worker))
+        conn.commit()
+        return cursor.rowcount
+
+def get_work_results(batch_id: str) -> list:
+    """배치 작업 결과 조회"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM work_queue WHERE batch_id = ? ORDER BY id', (batch_id,))
+        rows = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['payload'] = json.loads(item['payload'] or '{}')
+            item['result'] = json.loads(item['result']) if item['result'] else None
+            rows.append(item)
+        return rows
+
+def count_work(batch_id: str) -> dict:
+    """배치 상태별 작업 수 {'pending': n, 'running': n, 'done': n, 'failed': n}"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT status, COUNT(*) AS n FROM work_queue WHERE batch_id = ? GROUP BY status
+        ''', (batch_id,))
+        counts = {'pending': 0, 'running': 0, 'done': 0, 'failed': 0}
+        counts.update({row['status']: row['n'] for row in cursor.fetchall()})
+        return counts
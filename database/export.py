@@ -0,0 +1,274 @@
+"""
+답글 히스토리/리뷰 내보내기와 가져오기
+
+- 내보내기: 커서에서 chunk_size 행씩 읽어 바로 파일에 쓰므로 행 수와 관계없이 메모리 사용량이 일정합니다.
+- 가져오기: 파일을 chunk_size 행씩 읽어 하나의 트랜잭션 안에서 executemany 로 저장합니다.
+- Parquet 은 pyarrow 가 설치되어 있을 때만 지원합니다.
+"""
+from typing import IO, Iterator, List, Optional, Tuple, Union
+import csv
+import io
+import sqlite3
+
+from utils.metrics import span
+from .db import get_db, refresh_review_stats
+
+# 내보내기/가져오기를 허용하는 테이블 (정렬 기준, 날짜 필터 컬럼, 가져올 때 충돌 처리)
+EXPORT_TABLES = {
+    'reply_history': {
+        'order_by': 'created_at, id',
+        'date_column': 'created_at',
+        # 같은 파일을 다시 가져와도 id 가 같으면 건너뜀
+        'on_conflict': 'INSERT OR IGNORE',
+    },
+    'reviews': {
+        'order_by': 'business_id, first_seen_at, review_id',
+        'date_column': 'first_seen_at',
+        # 같은 리뷰는 파일 내용으로 덮어씀
+        'on_conflict': 'INSERT OR REPLACE',
+    },
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+PathOrFile = Union[str, IO]
+
+
+def _check_table(table: str) -> dict:
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"내보낼 수 없는 테이블입니다: {table} (가능: {', '.join(EXPORT_TABLES)})")
+    return EXPORT_TABLES[table]
+
+
+def table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    """테이블 컬럼 이름 목록 (마이그레이션으로 추가된 컬럼 포함)"""
+    _check_table(table)
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def iter_chunks(
+    table: str,
+    business_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Tuple[List[str], List[tuple]]]:
+    """
+    테이블 행을 chunk_size 개씩 읽기
+
+    Args:
+        table: 'reply_history' 또는 'reviews'
+        business_id: 특정 업체만 (None 이면 전체)
+        since / until: 기간 필터 ('YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM:SS', until 은 미포함)
+
+    Yields:
+        (컬럼 이름 목록, 행 튜플 목록)
+    """
+    options = _check_table(table)
+    conditions, params = [], []
+    if business_id:
+        conditions.append('business_id = ?')
+        params.append(business_id)
+    if since:
+        conditions.append(f"{options['date_column']} >= ?")
+        params.append(since)
+    if until:
+        conditions.append(f"{options['date_column']} < ?")
+        params.append(until)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    with get_db() as conn:
+        # dict 변환 없이 튜플 그대로 사용
+        conn.row_factory = None
+        columns = table_columns(conn, table)
+        cursor = conn.execute(
+            f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {options['order_by']}", params
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield columns, rows
+
+
+def _open(dest: PathOrFile, mode: str, **kwargs):
+    """경로면 파일을 열고, 파일 객체면 그대로 사용 (닫을 필요 여부와 함께 반환)"""
+    if isinstance(dest, str):
+        return open(dest, mode, **kwargs), True
+    return dest, False
+
+
+def export_csv(table: str, dest: PathOrFile, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters) -> int:
+    """
+    CSV 로 내보내기 (엑셀에서 한글이 깨지지 않도록 UTF-8 BOM 포함)
+
+    Args:
+        table: 'reply_history' 또는 'reviews'
+        dest: 파일 경로 또는 바이너리 파일 객체
+        **filters: business_id, since, until (iter_chunks 참고)
+
+    Returns:
+        int: 내보낸 행 수
+    """
+    count = 0
+    fh, should_close = _open(dest, 'wb')
+    text = io.TextIOWrapper(fh, encoding='utf-8-sig', newline='')
+    try:
+        with span("db_export", table=table, format="csv") as s:
+            writer = csv.writer(text)
+            header_written = False
+            for columns, rows in iter_chunks(table, chunk_size=chunk_size, **filters):
+                if not header_written:
+                    writer.writerow(columns)
+                    header_written = True
+                writer.writerows(rows)
+                count += len(rows)
+            if not header_written:
+                with get_db() as conn:
+                    writer.writerow(table_columns(conn, table))
+            s.set(rows=count)
+        text.flush()
+    finally:
+        # 호출한 쪽 파일 객체는 닫지 않음
+        text.detach()
+        if should_close:
+            fh.close()
+    return count
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet 내보내기/가져오기에는 pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+    return pyarrow
+
+
+def export_parquet(table: str, dest: PathOrFile, chunk_size: int = DEFAULT_CHUNK_SIZE, **filters) -> int:
+    """
+    Parquet 으로 내보내기 (chunk 하나가 row group 하나)
+
+    Args:
+        table: 'reply_history' 또는 'reviews'
+        dest: 파일 경로 또는 바이너리 파일 객체
+        **filters: business_id, since, until (iter_chunks 참고)
+
+    Returns:
+        int: 내보낸 행 수
+
+    Raises:
+        ImportError: pyarrow 가 설치되지 않음
+    """
+    pa = _require_pyarrow()
+    count = 0
+    writer = None
+    schema = None
+    with span("db_export", table=table, format="parquet") as s:
+        try:
+            for columns, rows in iter_chunks(table, chunk_size=chunk_size, **filters):
+                data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+                if writer is None:
+                    # SQLite 는 컬럼 타입이 느슨하므로 모든 컬럼을 문자열로 저장 (가져올 때 SQLite 가 변환)
+                    schema = pa.schema([(name, pa.string()) for name in columns])
+                    writer = pa.parquet.ParquetWriter(dest, schema)
+                batch = {
+                    name: [None if v is None else str(v) for v in values]
+                    for name, values in data.items()
+                }
+                writer.write_table(pa.table(batch, schema=schema))
+                count += len(rows)
+            if writer is None:
+                with get_db() as conn:
+                    schema = pa.schema([(name, pa.string()) for name in table_columns(conn, table)])
+                pa.parquet.write_table(schema.empty_table(), dest)
+        finally:
+            if writer is not None:
+                writer.close()
+        s.set(rows=count)
+    return count
+
+
+def _iter_csv_rows(src: PathOrFile, chunk_size: int) -> Iterator[Tuple[List[str], List[list]]]:
+    fh, should_close = _open(src, 'rb')
+    text = io.TextIOWrapper(fh, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        columns = next(reader, None)
+        if not columns:
+            return
+        chunk = []
+        for row in reader:
+            # 빈 칸은 NULL 로
+            chunk.append([value if value != '' else None for value in row])
+            if len(chunk) >= chunk_size:
+                yield columns, chunk
+                chunk = []
+        if chunk:
+            yield columns, chunk
+    finally:
+        text.detach()
+        if should_close:
+            fh.close()
+
+
+def _iter_parquet_rows(src: PathOrFile, chunk_size: int) -> Iterator[Tuple[List[str], List[list]]]:
+    pa = _require_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(src)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        columns = batch.schema.names
+        values = [batch.column(i).to_pylist() for i in range(len(columns))]
+        yield columns, [list(row) for row in zip(*values)]
+
+
+def import_rows(table: str, src: PathOrFile, fmt: str = 'csv', chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    CSV/Parquet 파일을 테이블로 가져오기 (전체가 하나의 트랜잭션, 실패하면 아무것도 저장하지 않음)
+
+    테이블에 없는 컬럼은 무시합니다. reply_history 는 같은 id 가 있으면 건너뛰고,
+    reviews 는 같은 (business_id, review_id) 를 파일 내용으로 덮어씁니다.
+
+    Args:
+        table: 'reply_history' 또는 'reviews'
+        src: 파일 경로 또는 바이너리 파일 객체
+        fmt: 'csv' 또는 'parquet'
+
+    Returns:
+        int: 실제로 추가/변경된 행 수 (이미 있어 건너뛴 행은 세지 않음)
+    """
+    options = _check_table(table)
+    if fmt == 'csv':
+        chunks = _iter_csv_rows(src, chunk_size)
+    elif fmt == 'parquet':
+        chunks = _iter_parquet_rows(src, chunk_size)
+    else:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+    count = 0
+    with span("db_import", table=table, format=fmt) as s, get_db() as conn:
+        changes_before = conn.total_changes
+        known = set(table_columns(conn, table))
+        sql = None
+        indices = None
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for columns, rows in chunks:
+                if sql is None:
+                    indices = [i for i, name in enumerate(columns) if name in known]
+                    if not indices:
+                        raise ValueError(f"{table} 테이블과 맞는 컬럼이 없습니다.")
+                    names = [columns[i] for i in indices]
+                    sql = (f"{options['on_conflict']} INTO {table} ({', '.join(names)}) "
+                           f"VALUES ({', '.join('?' * len(names))})")
+                conn.executemany(sql, ([row[i] if i < len(row) else None for i in indices] for row in rows))
+                count += len(rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        saved = conn.total_changes - changes_before
+        s.set(rows=count, saved=saved)
+    if table == 'reviews':
+        # 업체별 리뷰 집계는 sync_reviews 에서만 증감하므로 가져온 뒤 다시 계산
+        refresh_review_stats()
+    return saved
@@ -1,4 +1,31 @@
-from .naver_auth import NaverAuth
-from .review_scraper import ReviewScraper, Review
-from .ai_generator import AIReplyGenerator, AIProvider, ReplyTone, get_tone_from_string
-from .reply_poster import ReplyPoster
+import importlib
+
+# 무거운 SDK(playwright, openai 등)를 끌어오지 않도록 실제로 사용할 때 모듈을 import 합니다.
+_LAZY_ATTRS = {
+    'NaverAuth': '.naver_auth',
+    'ReviewScraper': '.review_scraper',
+    'Review': '.review_scraper',
+    'AIReplyGenerator': '.ai_generator',
+    'AIProvider': '.ai_generator',
+    'ReplyTone': '.ai_generator',
+    'get_tone_from_string': '.ai_generator',
+    'ReplyGenerationError': '.llm_dispatcher',
+    'ReplyPoster': '.reply_poster',
+    'BrowserManager': '.browser_manager',
+    'WorkerPool': '.worker_pool',
+    'PhotoService': '.photo_service',
+    'PriorityScheduler': '.scheduler',
+    'ReviewWatcher': '.watcher',
+    'BrowserSupervisor': '.supervisor',
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -1,6 +1,28 @@
-import openai
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Coroutine, Dict, List, Optional, Tuple
 from enum import Enum
+import asyncio
+import logging
+import re
+import threading
+import weakref
+
+from utils.metrics import span, inc
+from utils.records import get_field
+from .tokens import count_tokens, truncate_to_tokens, completion_budget
+from .llm_dispatcher import (LLMDispatcher, ReplyGenerationError, ProviderNotConfiguredError,
+                             ProviderUnavailableError, ReplyTimeoutError, AllProvidersFailedError)
+
+logger = logging.getLogger(__name__)
+
+# 한 번의 호출로 만들 최대 답글 변형 수 (많으면 응답이 길어져 잘리거나 품질이 떨어짐)
+MAX_VARIANTS_PER_CALL = 8
+
+_NUMBERED_LINE = re.compile(r'^\s*(\d+)\s*[.)]\s*(.+?)\s*$')
+
+# 입력 토큰 상한 (넘는 리뷰/요청사항은 가운데를 생략)
+MAX_REVIEW_TOKENS = 400
+MAX_INSTRUCTION_TOKENS = 100
 
 class AIProvider(Enum):
     OPENAI = "openai"
@@ -12,26 +34,196 @@ class ReplyTone(Enum):
     CASUAL = "casual"               # 친근하고 캐주얼한
     APOLOGETIC = "apologetic"       # 정중하고 사과하는
 
+TONE_DESCRIPTIONS = {
+    ReplyTone.FRIENDLY: "친절하고 따뜻하며 감사함을 표현하는",
+    ReplyTone.PROFESSIONAL: "전문적이고 격식있으며 신뢰감을 주는",
+    ReplyTone.CASUAL: "친근하고 캐주얼하며 편안한",
+    ReplyTone.APOLOGETIC: "진심으로 사과하고 개선을 약속하는"
+}
+
+# 모든 호출에서 글자 하나까지 같은 고정 프롬프트 (제공자 프롬프트 캐시 적중용)
+# 가게 이름, 별점, 리뷰 등 호출마다 달라지는 내용은 넣지 마세요.
+SYSTEM_PROMPT = """당신은 자영업자의 리뷰 답글 작성을 도와주는 어시스턴트입니다.
+가게 사장님 입장에서 고객 리뷰에 자연스럽고 진정성 있는 한국어 답글을 작성해주세요.
+
+## 공통 작성 규칙
+- 지정된 글자 수 이내로 작성해주세요
+- 자연스럽고 진정성 있게 작성해주세요
+- 기계적이거나 복붙한 느낌이 들지 않게 해주세요
+- 한국어로 작성해주세요
+- 답글 본문만 작성하고 따옴표, 제목, 설명은 붙이지 마세요
+- 리뷰에 없는 사실(메뉴, 이벤트, 할인 등)을 지어내지 마세요
+
+## 톤
+지정된 톤에 맞춰 작성해주세요.
+- 친절하고 따뜻하며 감사함을 표현하는: 감사 인사를 중심으로 따뜻하게
+- 전문적이고 격식있으며 신뢰감을 주는: 존댓말과 격식을 갖추고 차분하게
+- 친근하고 캐주얼하며 편안한: 단골에게 말하듯 가볍고 편하게
+- 진심으로 사과하고 개선을 약속하는: 변명 없이 사과하고 구체적인 개선을 약속
+
+## 별점 지침
+### 1~2점
+- 불편을 드린 점에 대해 진심으로 사과해주세요
+- 구체적인 개선 의지를 보여주세요
+- 재방문 시 더 나은 서비스를 약속해주세요
+### 3점
+- 방문에 감사드리며 아쉬운 점에 대해 개선하겠다고 말씀해주세요
+- 다음 방문 시 더 만족하실 수 있도록 노력하겠다고 해주세요
+### 4~5점
+- 좋은 평가에 진심으로 감사드린다고 해주세요
+- 리뷰 내용 중 구체적인 부분을 언급해주세요
+- 재방문을 부탁드린다고 해주세요
+
+## 예시
+리뷰 (별점 5점, 친절): "파스타가 정말 맛있었어요! 분위기도 좋고 또 올게요"
+답글: 파스타를 맛있게 드셨다니 정말 기쁩니다! 분위기까지 좋게 봐주셔서 감사해요. 다음 방문 때도 맛있는 한 끼 준비해두겠습니다 😊
+
+리뷰 (별점 3점, 전문적): "맛은 괜찮은데 대기가 너무 길었어요"
+답글: 방문해주셔서 감사합니다. 오래 기다리시게 해드려 죄송합니다. 대기 시간을 줄일 수 있도록 운영 방식을 개선하겠습니다. 다음에는 더 편하게 이용하실 수 있도록 노력하겠습니다.
+
+리뷰 (별점 1점, 사과): "직원이 불친절하고 음식도 식어서 나왔어요"
+답글: 불편을 드려 진심으로 죄송합니다. 말씀해주신 응대와 음식 온도 문제는 직원들과 함께 바로 점검하겠습니다. 다시 찾아주신다면 꼭 달라진 모습 보여드리겠습니다."""
+SYSTEM_PROMPT_TOKENS = count_tokens(SYSTEM_PROMPT)
+
+@dataclass
+class RoutingRules:
+    """템플릿으로 답할 리뷰를 고르는 기준 (나머지는 LLM)"""
+    enabled: bool = True
+    min_rating: int = 4              # 이 별점 이상만 템플릿 사용
+    max_review_length: int = 40      # 이보다 긴 리뷰는 LLM 사용
+    # 불만/질문이 섞인 리뷰는 짧고 별점이 높아도 LLM 사용
+    blocked_words: Tuple[str, ...] = ('?', '별로', '아쉽', '아쉬', '실망', '불친절', '늦', '비싸', '최악',
+                                      '다시는', '환불', '불편', '그냥', '글쎄', '하지만', '는데')
+
+    def use_template(self, review_content: str, rating: int) -> bool:
+        content = (review_content or '').strip()
+        return (
+            self.enabled
+            and rating >= self.min_rating
+            and len(content) <= self.max_review_length
+            and not any(word in content for word in self.blocked_words)
+        )
+
 class AIReplyGenerator:
-    def __init__(self, provider: AIProvider, api_key: str):
+    def __init__(
+        self,
+        provider: AIProvider,
+        api_key: str,
+        routing: Optional[RoutingRules] = None,
+        fallback_keys: Optional[Dict[AIProvider, str]] = None,
+        hedge: bool = True
+    ):
         """
         Args:
             provider: AI 서비스 제공자 (openai/gemini)
             api_key: API 키
+            routing: 템플릿/LLM 분기 기준 (None 이면 템플릿을 쓰지 않음)
+            fallback_keys: 장애 시 전환할 다른 제공자의 API 키 {AIProvider: 키}
+            hedge: 응답이 늦으면 예비 요청을 함께 보낼지 여부
         """
         self.provider = provider
         self.api_key = api_key
-        self.gemini_model = None
+        self.api_keys = {provider: api_key}
+        self.api_keys.update({p: key for p, key in (fallback_keys or {}).items() if key and p != provider})
+        self.routing = routing
+        self.hedge = hedge
+        # 비동기 SDK 클라이언트는 만든 이벤트 루프에 묶이므로 루프마다 따로 둠
+        self._openai_clients = weakref.WeakKeyDictionary()
+        self._gemini_clients = weakref.WeakKeyDictionary()
+        self._dispatcher = None
+        self._template_engine = None
+        self.route_counts = {'template': 0, 'llm': 0}
+        # SDK는 무거우므로 실제로 호출할 때 처음 import 합니다.
+    
+    @property
+    def template_engine(self):
+        """템플릿 엔진 (첫 사용 시 생성)"""
+        if self._template_engine is None:
+            from .template_engine import TemplateEngine
+            self._template_engine = TemplateEngine()
+        return self._template_engine
+    
+    def template_hit_rate(self) -> float:
+        """템플릿으로 답한 비율 (0~1)"""
+        total = sum(self.route_counts.values())
+        return self.route_counts['template'] / total if total else 0.0
+    
+    def _template_reply(
+        self,
+        review_content: str,
+        store_name: str,
+        rating: int,
+        tone: ReplyTone,
+        custom_instruction: Optional[str],
+        include_emoji: bool,
+        max_length: int
+    ) -> Optional[str]:
+        """라우팅 기준에 맞으면 템플릿 답글 반환 (아니면 None)"""
+        if custom_instruction or not (self.routing and self.routing.use_template(review_content, rating)):
+            return None
+        with span("template_reply") as s:
+            reply = self.template_engine.render(
+                review_content=review_content,
+                store_name=store_name,
+                rating=rating,
+                tone=tone.value,
+                include_emoji=include_emoji,
+                max_length=max_length
+            )
+            s.set(hit=reply is not None)
+        return reply
+    
+    def _count_route(self, route: str, n: int = 1):
+        self.route_counts[route] += n
+        inc("reply_route", n, route=route)
+    
+    @property
+    def dispatcher(self) -> LLMDispatcher:
+        """제공자 호출 디스패처 (선택한 제공자 우선, 키가 있는 다른 제공자로 장애 전환)"""
+        if self._dispatcher is None:
+            backends = {
+                AIProvider.OPENAI.value: self._generate_openai,
+                AIProvider.GEMINI.value: self._generate_gemini,
+            }
+            order = [self.provider] + [p for p in self.api_keys if p != self.provider]
+            self._dispatcher = LLMDispatcher(
+                {p.value: backends[p.value] for p in order},
+                order=[p.value for p in order],
+                hedge=self.hedge
+            )
+        return self._dispatcher
+    
+    def _get_openai_client(self):
+        """현재 이벤트 루프용 AsyncOpenAI 클라이언트 (루프마다 한 번 생성 후 재사용)"""
+        loop = asyncio.get_running_loop()
+        client = self._openai_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            # 재시도는 디스패처가 다른 제공자로 하므로 SDK 자체 재시도는 한 번만
+            client = AsyncOpenAI(api_key=self.api_keys[AIProvider.OPENAI], timeout=30.0, max_retries=1)
+            self._openai_clients[loop] = client
+        return client
+    
+    def _get_gemini_client(self):
+        """
+        현재 이벤트 루프용 Gemini 클라이언트 (루프마다 한 번 생성 후 재사용)
         
-        if provider == AIProvider.OPENAI:
-            openai.api_key = api_key
-        elif provider == AIProvider.GEMINI:
+        키는 전역 설정(genai.configure)이 아니라 클라이언트마다 지정하므로
+        같은 루프를 쓰는 다른 생성기(다른 세션의 키)와 섞이지 않습니다.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._gemini_clients.get(loop)
+        if client is None:
             try:
-                import google.generativeai as genai
-                genai.configure(api_key=api_key)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
+                from google import genai
             except ImportError:
-                print("google-generativeai 패키지가 설치되지 않았습니다.")
+                raise ProviderNotConfiguredError("google-genai 패키지가 설치되지 않았습니다.", provider="gemini")
+            client = genai.Client(
+                api_key=self.api_keys[AIProvider.GEMINI],
+                http_options={'timeout': 30_000}
+            )
+            self._gemini_clients[loop] = client
+        return client
     
     def generate_reply(
         self,
@@ -44,8 +236,46 @@ class AIReplyGenerator:
         max_length: int = 150
     ) -> str:
         """
-        리뷰에 대한 AI 답글 생성
+        리뷰에 대한 AI 답글 생성 (agenerate_reply 의 동기 버전)
+        
+        Raises:
+            ReplyGenerationError: 답글을 만들지 못함 (제공자 장애, 시간 초과 등)
+        """
+        return _run_sync(self.agenerate_reply(
+            review_content=review_content,
+            store_name=store_name,
+            rating=rating,
+            tone=tone,
+            custom_instruction=custom_instruction,
+            include_emoji=include_emoji,
+            max_length=max_length
+        ))
+    
+    async def agenerate_reply(
+        self,
+        review_content: str,
+        store_name: str,
+        rating: int,
+        tone: ReplyTone = ReplyTone.FRIENDLY,
+        custom_instruction: Optional[str] = None,
+        include_emoji: bool = True,
+        max_length: int = 150
+    ) -> str:
+        """
+        리뷰에 대한 AI 답글 생성 (라우팅 기준에 맞는 간단한 리뷰는 템플릿으로 답함)
+        
+        스크래핑/등록과 같은 이벤트 루프에서 실행할 수 있습니다.
+        
+        Raises:
+            ReplyGenerationError: 답글을 만들지 못함 (제공자 장애, 시간 초과 등)
         """
+        reply = self._template_reply(review_content, store_name, rating, tone,
+                                     custom_instruction, include_emoji, max_length)
+        if reply:
+            self._count_route('template')
+            return reply
+        self._count_route('llm')
+        
         prompt = self._build_prompt(
             review_content=review_content,
             store_name=store_name,
@@ -56,10 +286,7 @@ class AIReplyGenerator:
             max_length=max_length
         )
         
-        if self.provider == AIProvider.OPENAI:
-            return self._generate_openai(prompt)
-        else:
-            return self._generate_gemini(prompt)
+        return await self.dispatcher.call(prompt, completion_budget(max_length))
     
     def _build_prompt(
         self,
@@ -69,116 +296,315 @@ class AIReplyGenerator:
         tone: ReplyTone,
         custom_instruction: Optional[str],
         include_emoji: bool,
-        max_length: int
+        max_length: int,
+        variants: int = 1
     ) -> str:
-        """프롬프트 생성"""
-        
-        tone_descriptions = {
-            ReplyTone.FRIENDLY: "친절하고 따뜻하며 감사함을 표현하는",
-            ReplyTone.PROFESSIONAL: "전문적이고 격식있으며 신뢰감을 주는",
-            ReplyTone.CASUAL: "친근하고 캐주얼하며 편안한",
-            ReplyTone.APOLOGETIC: "진심으로 사과하고 개선을 약속하는"
-        }
+        """
+        호출마다 달라지는 사용자 프롬프트 생성 (고정 규칙은 SYSTEM_PROMPT)
         
-        # 별점에 따른 추가 지시
+        variants > 1 이면 비슷한 리뷰들에 쓸 답글을 번호 목록으로 여러 개 요청합니다.
+        """
         if rating <= 2:
-            rating_instruction = """
-- 불편을 드린 점에 대해 진심으로 사과해주세요
-- 구체적인 개선 의지를 보여주세요
-- 재방문 시 더 나은 서비스를 약속해주세요"""
+            rating_band = "1~2점"
         elif rating == 3:
-            rating_instruction = """
-- 방문에 감사드리며 아쉬운 점에 대해 개선하겠다고 말씀해주세요
-- 다음 방문 시 더 만족하실 수 있도록 노력하겠다고 해주세요"""
+            rating_band = "3점"
         else:
-            rating_instruction = """
-- 좋은 평가에 진심으로 감사드린다고 해주세요
-- 리뷰 내용 중 구체적인 부분을 언급해주세요
-- 재방문을 부탁드린다고 해주세요"""
+            rating_band = "4~5점"
         
-        emoji_instruction = "- 이모지를 1~2개 자연스럽게 사용해주세요" if include_emoji else "- 이모지는 사용하지 마세요"
+        emoji_instruction = "1~2개 자연스럽게 사용" if include_emoji else "사용하지 않음"
         
-        custom = f"\n추가 요청사항: {custom_instruction}" if custom_instruction else ""
+        review_content = truncate_to_tokens(review_content or "", MAX_REVIEW_TOKENS)
+        custom = ""
+        if custom_instruction:
+            custom = f"\n- 추가 요청사항: {truncate_to_tokens(custom_instruction, MAX_INSTRUCTION_TOKENS)}"
         
-        prompt = f"""당신은 '{store_name}'의 사장님입니다.
-고객이 남긴 리뷰에 {tone_descriptions[tone]} 톤으로 답글을 작성해주세요.
+        if variants > 1:
+            answer = f"""## 요청
+- 위 리뷰와 비슷한 리뷰 {variants}개에 각각 달 답글을 {variants}개 작성해주세요
+- 답글마다 표현과 문장 구성을 다르게 해주세요
+- 각 답글은 '1. ', '2. ' 처럼 번호로 시작하는 한 줄로 작성해주세요
 
-## 작성 규칙
-- {max_length}자 이내로 작성해주세요
-- 자연스럽고 진정성 있게 작성해주세요
-- 기계적이거나 복붙한 느낌이 들지 않게 해주세요
-- 한국어로 작성해주세요
-{rating_instruction}
-{emoji_instruction}
-{custom}
+## 사장님 답글 {variants}개:"""
+        else:
+            answer = "## 사장님 답글:"
+        
+        prompt = f"""## 이번 답글
+- 가게: {store_name}
+- 톤: {TONE_DESCRIPTIONS[tone]}
+- 별점 지침: {rating_band}
+- 길이: {max_length}자 이내
+- 이모지: {emoji_instruction}{custom}
 
 ## 고객 리뷰 (별점: {'⭐' * rating})
 "{review_content}"
 
-## 사장님 답글:"""
+{answer}"""
 
         return prompt
     
-    def _generate_openai(self, prompt: str) -> str:
-        """OpenAI GPT로 답글 생성"""
+    async def _generate_openai(self, prompt: str, max_tokens: int = 300) -> str:
+        """OpenAI GPT로 답글 생성 (고정 시스템 프롬프트 + 가변 사용자 프롬프트)"""
+        if not self.api_keys.get(AIProvider.OPENAI):
+            raise ProviderNotConfiguredError("OpenAI API 키가 없습니다.", provider="openai")
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=self.api_key)
+            client = self._get_openai_client()
             
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 자영업자의 리뷰 답글 작성을 도와주는 어시스턴트입니다. 자연스럽고 진정성 있는 한국어 답글을 작성해주세요."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=300,
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
+            with span("llm_call", provider="openai") as s:
+                s.set(prompt_tokens_est=SYSTEM_PROMPT_TOKENS + count_tokens(prompt), max_tokens=max_tokens)
+                response = await client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.7
+                )
+                if response.usage:
+                    s.set(prompt_tokens=response.usage.prompt_tokens,
+                          completion_tokens=response.usage.completion_tokens)
+                    inc("llm_tokens", response.usage.prompt_tokens, provider="openai", kind="prompt")
+                    inc("llm_tokens", response.usage.completion_tokens, provider="openai", kind="completion")
+                    # 프롬프트 캐시에서 재사용된 토큰 (지원하는 모델/SDK 에서만 제공)
+                    details = getattr(response.usage, 'prompt_tokens_details', None)
+                    cached = getattr(details, 'cached_tokens', None) or 0
+                    if cached:
+                        s.set(cached_tokens=cached)
+                        inc("llm_tokens", cached, provider="openai", kind="cached")
+            return (response.choices[0].message.content or "").strip()
         except Exception as e:
-            return f"답글 생성 오류: {str(e)}"
+            logger.error(f"답글 생성 오류 (openai): {e}")
+            raise ReplyGenerationError(f"OpenAI 답글 생성 실패: {e}", provider="openai") from e
     
-    def _generate_gemini(self, prompt: str) -> str:
-        """Google Gemini로 답글 생성"""
+    async def _generate_gemini(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Google Gemini로 답글 생성 (고정 프롬프트를 앞에 두어 접두어가 항상 같도록)"""
+        if not self.api_keys.get(AIProvider.GEMINI):
+            raise ProviderNotConfiguredError("Gemini API 키가 없습니다.", provider="gemini")
+        client = self._get_gemini_client()
         try:
-            if not self.gemini_model:
-                return "Gemini 모델이 초기화되지 않았습니다."
-            
-            response = self.gemini_model.generate_content(prompt)
-            return response.text.strip()
+            full_prompt = f"{SYSTEM_PROMPT}\n\n{prompt}"
+            with span("llm_call", provider="gemini") as s:
+                s.set(prompt_tokens_est=SYSTEM_PROMPT_TOKENS + count_tokens(prompt), max_tokens=max_tokens)
+                response = await client.aio.models.generate_content(
+                    model='gemini-pro',
+                    contents=full_prompt,
+                    config={'max_output_tokens': max_tokens} if max_tokens else None
+                )
+                usage = getattr(response, 'usage_metadata', None)
+                if usage:
+                    s.set(prompt_tokens=usage.prompt_token_count,
+                          completion_tokens=usage.candidates_token_count)
+                    inc("llm_tokens", usage.prompt_token_count, provider="gemini", kind="prompt")
+                    inc("llm_tokens", usage.candidates_token_count, provider="gemini", kind="completion")
+            return (response.text or "").strip()
         except Exception as e:
-            return f"답글 생성 오류: {str(e)}"
+            logger.error(f"답글 생성 오류 (gemini): {e}")
+            raise ReplyGenerationError(f"Gemini 답글 생성 실패: {e}", provider="gemini") from e
+    
+    def generate_variants(self, review_content: str, store_name: str, rating: int, count: int, **kwargs) -> List[str]:
+        """비슷한 리뷰 여러 개에 쓸 서로 다른 답글 생성 (agenerate_variants 의 동기 버전)"""
+        return _run_sync(self.agenerate_variants(review_content, store_name, rating, count, **kwargs))
+    
+    async def agenerate_variants(
+        self,
+        review_content: str,
+        store_name: str,
+        rating: int,
+        count: int,
+        tone: ReplyTone = ReplyTone.FRIENDLY,
+        custom_instruction: Optional[str] = None,
+        include_emoji: bool = True,
+        max_length: int = 150
+    ) -> List[str]:
+        """
+        비슷한 리뷰 여러 개에 쓸 서로 다른 답글을 한 번의 호출로 생성
+        
+        Returns:
+            list: 답글 목록 (응답을 해석하지 못하면 count 보다 적을 수 있음)
+        """
+        count = min(count, MAX_VARIANTS_PER_CALL)
+        prompt = self._build_prompt(
+            review_content=review_content,
+            store_name=store_name,
+            rating=rating,
+            tone=tone,
+            custom_instruction=custom_instruction,
+            include_emoji=include_emoji,
+            max_length=max_length,
+            variants=count
+        )
+        try:
+            text = await self.dispatcher.call(prompt, completion_budget(max_length, count))
+        except ReplyGenerationError as e:
+            logger.warning(f"변형 답글 생성 실패, 하나씩 생성합니다: {e}")
+            return []
+        
+        replies = []
+        for line in text.splitlines():
+            match = _NUMBERED_LINE.match(line)
+            if match:
+                replies.append(match.group(2).strip('"\''))
+        return replies[:count]
     
     def generate_bulk_replies(
         self,
         reviews: list,
         store_name: str,
         tone: ReplyTone = ReplyTone.FRIENDLY,
+        cluster: bool = True,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        **kwargs
+    ) -> list:
+        """여러 리뷰에 대한 답글 일괄 생성 (agenerate_many 의 동기 버전)"""
+        return _run_sync(self.agenerate_many(reviews, store_name, tone, cluster=cluster,
+                                             on_progress=on_progress, **kwargs))
+    
+    async def agenerate_many(
+        self,
+        reviews: list,
+        store_name: str,
+        tone: ReplyTone = ReplyTone.FRIENDLY,
+        cluster: bool = True,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        concurrency: int = 4,
+        on_reply: Optional[Callable[[int, str, str], None]] = None,
         **kwargs
     ) -> list:
         """
         여러 리뷰에 대한 답글 일괄 생성
+        
+        라우팅 기준에 맞는 리뷰는 템플릿으로 먼저 답하고, 나머지 중 비슷한 짧은 리뷰는
+        묶어서 한 번의 호출로 서로 다른 답글을 받아 나눠 씁니다. LLM 호출은 최대
+        concurrency 개까지 동시에 진행합니다.
+        
+        Args:
+            reviews: Review 객체 또는 {'id', 'content', 'rating'} dict 목록
+            cluster: 비슷한 리뷰 묶음 처리 여부
+            on_progress: 진행 상황 콜백 (완료 수, 전체 수) - 이벤트 루프 스레드에서 호출됨
+            concurrency: 동시에 진행할 최대 LLM 호출 수
+            on_reply: 답글 하나가 나올 때마다 호출 (리뷰 순번, 답글, 'template'/'llm') - 체크포인트 저장용
+        
+        Returns:
+            list: [{'review_id', 'reply', 'error'}, ...] (reviews 와 같은 순서, 실패하면 reply 는 None)
         """
-        results = []
-        for review in reviews:
-            reply = self.generate_reply(
-                review_content=review.get('content', ''),
+        from .review_clustering import cluster_reviews
+        
+        replies = [None] * len(reviews)
+        errors = [None] * len(reviews)
+        done = 0
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        def finish(i: int, reply: str, route: str):
+            replies[i] = reply
+            if on_reply:
+                on_reply(i, reply, route)
+        
+        def advance(n: int):
+            nonlocal done
+            done += n
+            if on_progress:
+                on_progress(done, len(reviews))
+        
+        # 템플릿으로 답할 수 있는 리뷰 먼저 처리
+        llm_indices = []
+        for i, review in enumerate(reviews):
+            reply = self._template_reply(
+                review_content=get_field(review, 'content', ''),
                 store_name=store_name,
-                rating=review.get('rating', 5),
+                rating=get_field(review, 'rating', 5),
                 tone=tone,
-                **kwargs
+                custom_instruction=kwargs.get('custom_instruction'),
+                include_emoji=kwargs.get('include_emoji', True),
+                max_length=kwargs.get('max_length', 150)
             )
-            results.append({
-                'review_id': review.get('id'),
-                'reply': reply
-            })
-        return results
+            if reply:
+                finish(i, reply, 'template')
+                self._count_route('template')
+                done += 1
+            else:
+                llm_indices.append(i)
+        if done and on_progress:
+            on_progress(done, len(reviews))
+        
+        if cluster:
+            llm_reviews = [reviews[i] for i in llm_indices]
+            groups = [[llm_indices[j] for j in group] for group in cluster_reviews(llm_reviews)]
+        else:
+            groups = [[i] for i in llm_indices]
+        
+        async def generate_one(i: int):
+            async with semaphore:
+                try:
+                    reply = await self.agenerate_reply(
+                        review_content=get_field(reviews[i], 'content', ''),
+                        store_name=store_name,
+                        rating=get_field(reviews[i], 'rating', 5),
+                        tone=tone,
+                        **kwargs
+                    )
+                    finish(i, reply, 'llm')
+                except ReplyGenerationError as e:
+                    errors[i] = str(e)
+            advance(1)
+        
+        async def generate_group(group: List[int]):
+            remaining = list(group)
+            # 묶음은 가장 긴 리뷰를 대표로 변형 답글을 받음
+            while len(remaining) > 1:
+                chunk = remaining[:MAX_VARIANTS_PER_CALL]
+                representative = max(chunk, key=lambda i: len(get_field(reviews[i], 'content', '') or ''))
+                async with semaphore:
+                    variants = await self.agenerate_variants(
+                        review_content=get_field(reviews[representative], 'content', ''),
+                        store_name=store_name,
+                        rating=get_field(reviews[representative], 'rating', 5),
+                        count=len(chunk),
+                        tone=tone,
+                        **kwargs
+                    )
+                if not variants:
+                    break
+                for i, reply in zip(chunk, variants):
+                    finish(i, reply, 'llm')
+                    remaining.remove(i)
+                self._count_route('llm', len(variants))
+                inc("llm_calls_saved", len(variants) - 1)
+                advance(len(variants))
+            
+            # 단독 리뷰, 또는 변형 답글이 모자란 리뷰는 하나씩 생성
+            await asyncio.gather(*(generate_one(i) for i in remaining))
+        
+        await asyncio.gather(*(generate_group(group) for group in groups))
+        
+        return [
+            {'review_id': get_field(review, 'id'), 'reply': reply, 'error': error}
+            for review, reply, error in zip(reviews, replies, errors)
+        ]
+
+
+_sync_loop = None
+_sync_loop_lock = threading.Lock()
+
+
+def _run_sync(coro: Coroutine):
+    """
+    동기 API용: 전용 백그라운드 이벤트 루프에서 코루틴을 실행하고 결과를 기다림
+    
+    호출하는 스레드에 이미 이벤트 루프가 돌고 있어도 쓸 수 있도록 asyncio.run 대신
+    프로세스에 하나뿐인 루프 스레드를 씁니다 (SDK 클라이언트 연결도 재사용됨).
+    """
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="llm-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _sync_loop).result()
 
 
 def get_tone_from_string(tone_str: str) -> ReplyTone:
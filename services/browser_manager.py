@@ -0,0 +1,385 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+from utils.metrics import inc, span
+from .har import har_context_options, prepare_context, close_context
+
+logger = logging.getLogger(__name__)
+
+# Chromium 실행 옵션 (컨테이너/서버 환경용)
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-accelerated-2d-canvas',
+    '--no-first-run',
+    '--no-zygote',
+    '--disable-gpu'
+]
+
+# 계정별 컨텍스트 기본 옵션
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+class BrowserCapacityError(RuntimeError):
+    """더 이상 계정 컨텍스트를 만들 수 없을 때 (모두 사용 중이고 한도 도달)"""
+
+
+class BrowserCrashedError(RuntimeError):
+    """브라우저/컨텍스트/페이지가 죽어서 작업을 끝내지 못했을 때 (세션을 다시 열면 재시도 가능)"""
+
+
+# 브라우저나 컨텍스트가 죽었을 때 Playwright 오류 메시지에 들어 있는 문구
+_CRASH_MARKERS = (
+    'target closed',
+    'has been closed',
+    'browser has disconnected',
+    'connection closed',
+    'target crashed',
+    'page crashed',
+)
+
+
+def is_browser_crash(error: BaseException) -> bool:
+    """오류가 브라우저/컨텍스트/페이지가 죽어서 생긴 것인지 (일반 시간 초과나 선택자 오류는 아님)"""
+    if isinstance(error, BrowserCrashedError) or type(error).__name__ == 'TargetClosedError':
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _CRASH_MARKERS)
+
+
+async def close_page(page):
+    """페이지 닫기 (브라우저가 이미 죽어 닫을 수 없으면 기록만 함)"""
+    if page is None:
+        return
+    try:
+        await page.close()
+    except Exception as e:
+        if not is_browser_crash(e):
+            raise
+        logger.debug(f"이미 닫힌 페이지: {e}")
+
+
+@dataclass
+class _AccountContext:
+    # 브라우저가 다시 떴으면 None (참조 카운트는 유지하고 다음 acquire 에서 새로 만듦)
+    context: object
+    refcount: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def process_tree_rss_mb(root_pid: int = None) -> Optional[float]:
+    """
+    현재 프로세스의 모든 하위 프로세스(Playwright 드라이버, Chromium) RSS 합계 (MB)
+
+    /proc 를 읽으므로 Linux 에서만 동작하며, 그 외 환경에서는 None 을 반환합니다.
+    """
+    root_pid = root_pid or os.getpid()
+    try:
+        parents = {}
+        rss_pages = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+                with open(f'/proc/{entry}/statm') as f:
+                    rss_pages[int(entry)] = int(f.read().split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            # comm 에 공백/괄호가 있을 수 있으므로 마지막 ')' 이후를 파싱
+            fields = stat[stat.rfind(')') + 2:].split()
+            parents[int(entry)] = int(fields[1])
+    except OSError:
+        return None
+
+    children: Dict[int, List[int]] = {}
+    for pid, ppid in parents.items():
+        children.setdefault(ppid, []).append(pid)
+
+    total_pages = 0
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        total_pages += rss_pages.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class BrowserManager:
+    """
+    Chromium 프로세스 하나를 여러 계정이 공유하도록 관리
+
+    - 계정마다 격리된 BrowserContext 를 만들고 참조 카운트로 수명을 관리합니다.
+    - 참조가 0인 컨텍스트는 idle_timeout 이 지나면 닫습니다.
+    - 컨텍스트 수(max_contexts)나 브라우저 메모리(memory_limit_mb)가 한도를 넘으면
+      가장 오래 쓰지 않은 유휴 컨텍스트부터 닫습니다.
+    - 계정마다 브라우저 감시자(BrowserSupervisor)를 하나만 두어 같은 계정의 세션/감시자가 함께 씁니다.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = 20,
+        idle_timeout: float = 15 * 60,
+        memory_limit_mb: Optional[float] = None,
+        eviction_interval: float = 60.0,
+        headless: bool = True
+    ):
+        """
+        Args:
+            max_contexts: 동시에 유지할 최대 계정 컨텍스트 수
+            idle_timeout: 유휴 컨텍스트를 닫기까지의 시간 (초)
+            memory_limit_mb: 브라우저 프로세스 RSS 상한 (MB, None 이면 제한 없음)
+            eviction_interval: 유휴 컨텍스트 정리 주기 (초)
+            headless: 헤드리스 모드 여부
+        """
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.eviction_interval = eviction_interval
+        self.headless = headless
+
+        self.playwright = None
+        self.browser = None
+        self._contexts: Dict[str, _AccountContext] = {}
+        self._supervisors = {}
+        self._lock_obj = None
+        self._eviction_task = None
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        # 관리자 객체는 이벤트 루프 밖(Streamlit 스크립트 스레드)에서 만들어질 수 있으므로 처음 쓸 때 생성
+        if self._lock_obj is None:
+            self._lock_obj = asyncio.Lock()
+        return self._lock_obj
+
+    async def start(self):
+        """브라우저 실행 (이미 실행 중이면 무시)"""
+        async with self._lock:
+            if not (self.browser and self.browser.is_connected()):
+                from playwright.async_api import async_playwright
+                with span("browser_launch"):
+                    if not self.playwright:
+                        self.playwright = await async_playwright().start()
+                    self.browser = await self.playwright.chromium.launch(
+                        headless=self.headless,
+                        args=BROWSER_ARGS
+                    )
+                self.browser.on("disconnected", self._on_disconnected)
+                # 브라우저가 새로 떴으면 이전 컨텍스트는 모두 무효 (빌려 간 세션이 있으므로 참조 카운트는 유지)
+                for entry in self._contexts.values():
+                    entry.context = None
+
+        if self._eviction_task is None or self._eviction_task.done():
+            self._eviction_task = asyncio.ensure_future(self._eviction_loop())
+
+    def _on_disconnected(self, browser):
+        inc("browser_disconnects")
+        if browser is self.browser:
+            logger.error("공유 브라우저 연결이 끊겼습니다. 다음 acquire 에서 다시 띄웁니다.")
+
+    async def acquire(self, account_key: str, cookies: list = None, **context_options):
+        """
+        계정 컨텍스트 가져오기 (없으면 생성) - 참조 카운트 +1
+
+        Args:
+            account_key: 계정 식별자
+            cookies: 컨텍스트에 설정할 쿠키
+            context_options: new_context 옵션 (기본값: CONTEXT_OPTIONS)
+
+        Returns:
+            BrowserContext
+        """
+        await self.start()
+        async with self._lock:
+            entry = self._contexts.get(account_key)
+            if entry is None:
+                await self._make_room()
+                entry = _AccountContext(context=await self._new_context(account_key, **context_options))
+                self._contexts[account_key] = entry
+            elif entry.context is None:
+                entry.context = await self._new_context(account_key, **context_options)
+            if cookies:
+                # 같은 계정이 새 세션 쿠키로 다시 로그인할 수 있으므로 매번 갱신
+                await entry.context.add_cookies(cookies)
+            entry.refcount += 1
+            entry.last_used = time.monotonic()
+            return entry.context
+
+    async def _new_context(self, account_key: str, **context_options):
+        """계정 컨텍스트 생성 (lock 보유 상태에서 호출)"""
+        options = {**CONTEXT_OPTIONS, **har_context_options(account_key), **context_options}
+        with span("context_create"):
+            context = await self.browser.new_context(**options)
+            await prepare_context(context, options)
+        inc("browser_contexts_created")
+        return context
+
+    async def replace_context(self, account_key: str, storage_state: dict):
+        """
+        죽은 계정 컨텍스트를 세션 상태로 다시 만듦 (참조 카운트 유지)
+
+        빌려 간 세션과 감시자는 context(account_key) 로 새 컨텍스트를 바로 보게 됩니다.
+
+        Args:
+            account_key: 계정 식별자
+            storage_state: 쿠키 + localStorage (NaverAuth.session_state)
+
+        Returns:
+            BrowserContext: 새 컨텍스트
+        """
+        await self.start()
+        async with self._lock:
+            entry = self._contexts.get(account_key)
+            if entry is None:
+                await self._make_room()
+                entry = _AccountContext(context=None)
+                self._contexts[account_key] = entry
+            elif entry.context is not None:
+                try:
+                    await close_context(entry.context)
+                except Exception as e:
+                    logger.warning(f"컨텍스트 종료 오류 ({account_key}): {e}")
+                entry.context = None
+                inc("browser_contexts_closed")
+            entry.context = await self._new_context(account_key, storage_state=storage_state)
+            entry.last_used = time.monotonic()
+            return entry.context
+
+    def context(self, account_key: str):
+        """계정의 현재 컨텍스트 (없거나 브라우저가 다시 떠서 무효면 None)"""
+        entry = self._contexts.get(account_key)
+        return entry.context if entry else None
+
+    def supervisor(self, auth, **options):
+        """
+        계정의 공유 브라우저 감시자 (없으면 생성)
+
+        같은 계정을 쓰는 세션마다 감시자를 따로 두면 같은 장애를 각자 복구하며 서로의 컨텍스트를
+        닫으므로, 복구 세대와 복구 횟수 제한을 계정 단위로 공유합니다. options 는 처음 만들 때만 적용됩니다.
+
+        Args:
+            auth: 로그인한 NaverAuth (기존 감시자의 세션이 로그아웃했으면 이 세션으로 바꿈)
+            options: BrowserSupervisor 옵션
+
+        Returns:
+            BrowserSupervisor
+        """
+        from .supervisor import BrowserSupervisor
+
+        supervisor = self._supervisors.get(auth.account_key)
+        if supervisor is None:
+            supervisor = BrowserSupervisor(auth, **options)
+            self._supervisors[auth.account_key] = supervisor
+        elif not supervisor.auth.is_logged_in:
+            supervisor.auth = auth
+        return supervisor
+
+    async def release(self, account_key: str):
+        """계정 컨텍스트 반환 - 참조 카운트 -1 (닫지는 않음, 유휴 정리 대상이 됨)"""
+        async with self._lock:
+            entry = self._contexts.get(account_key)
+            if entry:
+                entry.refcount = max(0, entry.refcount - 1)
+                entry.last_used = time.monotonic()
+
+    async def close_context(self, account_key: str):
+        """계정 컨텍스트 즉시 닫기 (참조 여부와 관계없이)"""
+        async with self._lock:
+            await self._close_entry(account_key)
+
+    async def _close_entry(self, account_key: str):
+        entry = self._contexts.pop(account_key, None)
+        if entry and entry.context is not None:
+            try:
+                await close_context(entry.context)
+            except Exception as e:
+                logger.warning(f"컨텍스트 종료 오류 ({account_key}): {e}")
+            inc("browser_contexts_closed")
+
+    def _idle_keys(self) -> List[str]:
+        """참조가 없는 컨텍스트 (오래 쓰지 않은 순)"""
+        idle = [(e.last_used, key) for key, e in self._contexts.items() if e.refcount == 0]
+        return [key for _, key in sorted(idle)]
+
+    async def _make_room(self):
+        """새 컨텍스트를 위한 자리 확보 (lock 보유 상태에서 호출)"""
+        idle = self._idle_keys()
+        while len(self._contexts) >= self.max_contexts and idle:
+            await self._close_entry(idle.pop(0))
+        if len(self._contexts) >= self.max_contexts:
+            raise BrowserCapacityError(
+                f"사용 중인 계정 컨텍스트가 한도({self.max_contexts})에 도달했습니다."
+            )
+        await self._enforce_memory_limit()
+
+    async def _enforce_memory_limit(self):
+        """메모리 상한 초과 시 유휴 컨텍스트부터 정리 (lock 보유 상태에서 호출)"""
+        if not self.memory_limit_mb:
+            return
+        idle = self._idle_keys()
+        usage = process_tree_rss_mb()
+        while usage is not None and usage > self.memory_limit_mb and idle:
+            await self._close_entry(idle.pop(0))
+            inc("browser_memory_evictions")
+            usage = process_tree_rss_mb()
+        if usage is not None and usage > self.memory_limit_mb:
+            logger.warning(f"브라우저 메모리 {usage:.0f}MB 가 상한 {self.memory_limit_mb:.0f}MB 를 넘었습니다.")
+
+    async def evict_idle(self):
+        """유휴 시간이 지난 컨텍스트 닫기 + 메모리 상한 확인"""
+        async with self._lock:
+            now = time.monotonic()
+            for key in self._idle_keys():
+                if now - self._contexts[key].last_used > self.idle_timeout:
+                    await self._close_entry(key)
+            await self._enforce_memory_limit()
+
+    async def _eviction_loop(self):
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"유휴 컨텍스트 정리 오류: {e}")
+
+    def stats(self) -> dict:
+        """현재 상태 (진단 화면용)"""
+        now = time.monotonic()
+        return {
+            'browser_connected': bool(self.browser and self.browser.is_connected()),
+            'contexts': len(self._contexts),
+            'active': sum(1 for e in self._contexts.values() if e.refcount > 0),
+            'idle': [{'account': key, 'idle_s': round(now - self._contexts[key].last_used)}
+                     for key in self._idle_keys()],
+            'memory_mb': process_tree_rss_mb(),
+        }
+
+    async def close(self):
+        """모든 컨텍스트와 브라우저 종료"""
+        if self._eviction_task:
+            self._eviction_task.cancel()
+            self._eviction_task = None
+        for supervisor in self._supervisors.values():
+            supervisor.stop()
+        self._supervisors.clear()
+        async with self._lock:
+            for key in list(self._contexts):
+                await self._close_entry(key)
+            try:
+                if self.browser:
+                    await self.browser.close()
+                if self.playwright:
+                    await self.playwright.stop()
+            except Exception as e:
+                logger.warning(f"브라우저 종료 오류: {e}")
+            self.browser = None
+            self.playwright = None
@@ -0,0 +1,12 @@
+from urllib.parse import urlparse
+import os
+
+# 스마트플레이스 주소 (벤치마크/테스트에서는 로컬 모의 서버 주소로 바꿔서 사용)
+SMARTPLACE_URL = os.getenv("SMARTPLACE_BASE_URL", "https://new.smartplace.naver.com").rstrip('/')
+
+# 로그인 쿠키 도메인 (기본값: 네이버 전체, 모의 서버를 쓰면 해당 호스트)
+_host = urlparse(SMARTPLACE_URL).hostname or ''
+COOKIE_DOMAIN = os.getenv(
+    "NAVER_COOKIE_DOMAIN",
+    '.naver.com' if _host.endswith('naver.com') else _host
+)
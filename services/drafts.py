@@ -0,0 +1,113 @@
+"""
+답글 초안 저장소 (일괄 생성 체크포인트)
+
+- 일괄 생성에서 답글이 하나 나올 때마다 reply_drafts 테이블에 바로 저장합니다.
+- 다시 실행하면 같은 리뷰(내용이 바뀌지 않음)와 같은 생성 옵션의 초안은 그대로 쓰고 나머지만 생성하므로,
+  중간에 끊긴 작업을 이어 할 때 LLM 을 다시 호출하지 않습니다.
+- 초안은 DB 에 있으므로 다른 브라우저 세션과 워커 프로세스도 같은 초안을 봅니다.
+"""
+from typing import Callable, Dict, Optional
+
+from database.db import save_reply_draft, get_reply_drafts
+from utils.metrics import inc
+from utils.records import get_field
+from .ai_generator import AIReplyGenerator, ReplyTone
+from .review_scraper import make_content_hash
+
+
+def draft_params(tone: ReplyTone = ReplyTone.FRIENDLY, **kwargs) -> dict:
+    """초안 재사용 여부를 가르는 생성 옵션"""
+    return {
+        'tone': getattr(tone, 'value', tone),
+        'include_emoji': kwargs.get('include_emoji', True),
+        'max_length': kwargs.get('max_length', 150),
+        'custom_instruction': kwargs.get('custom_instruction') or '',
+    }
+
+
+def review_hash(review) -> str:
+    """Review 객체 또는 dict 의 내용 해시"""
+    return getattr(review, 'content_hash', None) or make_content_hash(
+        get_field(review, 'rating', 5), get_field(review, 'content', '')
+    )
+
+
+def reusable_drafts(business_id: str, reviews: list, params: Optional[dict] = None) -> Dict[str, str]:
+    """
+    그대로 쓸 수 있는 초안 {review_id: 답글}
+
+    Args:
+        params: 생성 옵션 (None 이면 옵션과 관계없이 리뷰 내용만 같으면 사용)
+    """
+    ids = [get_field(review, 'id') for review in reviews]
+    stored = get_reply_drafts(business_id, ids)
+    drafts = {}
+    for review in reviews:
+        draft = stored.get(get_field(review, 'id'))
+        if not draft or draft['review_hash'] != review_hash(review):
+            continue
+        if params is not None and draft['params'] != params:
+            continue
+        drafts[draft['review_id']] = draft['content']
+    return drafts
+
+
+async def agenerate_with_drafts(
+    generator: AIReplyGenerator,
+    business_id: str,
+    reviews: list,
+    store_name: str,
+    tone: ReplyTone = ReplyTone.FRIENDLY,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    **kwargs
+) -> list:
+    """
+    저장된 초안을 이어 쓰는 일괄 생성 (새로 만든 답글은 나오는 즉시 초안으로 저장)
+
+    Args:
+        generator: 답글 생성기
+        business_id: 업체 ID
+        reviews: Review 객체 또는 {'id', 'content', 'rating'} dict 목록
+        on_progress: 진행 상황 콜백 (완료 수, 전체 수) - 이어 쓴 초안도 완료로 셈
+        **kwargs: agenerate_many 옵션 (include_emoji, max_length, cluster, concurrency ...)
+
+    Returns:
+        list: [{'review_id', 'reply', 'error', 'resumed'}, ...] (reviews 와 같은 순서)
+    """
+    params = draft_params(tone, **kwargs)
+    drafts = reusable_drafts(business_id, reviews, params)
+    remaining = [review for review in reviews if get_field(review, 'id') not in drafts]
+    resumed = len(reviews) - len(remaining)
+    inc("reply_drafts_resumed", resumed)
+    if on_progress and resumed:
+        on_progress(resumed, len(reviews))
+
+    def save(i: int, reply: str, route: str):
+        review = remaining[i]
+        save_reply_draft(
+            business_id, get_field(review, 'id'), reply,
+            provider='template' if route == 'template' else generator.provider.value,
+            params=params,
+            review_hash=review_hash(review)
+        )
+
+    generated = {}
+    if remaining:
+        results = await generator.agenerate_many(
+            remaining,
+            store_name=store_name,
+            tone=tone,
+            on_progress=(lambda done, total: on_progress(resumed + done, len(reviews))) if on_progress else None,
+            on_reply=save,
+            **kwargs
+        )
+        generated = {result['review_id']: result for result in results}
+
+    output = []
+    for review in reviews:
+        review_id = get_field(review, 'id')
+        if review_id in drafts:
+            output.append({'review_id': review_id, 'reply': drafts[review_id], 'error': None, 'resumed': True})
+        else:
+            output.append({**generated[review_id], 'resumed': False})
+    return output
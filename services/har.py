@@ -0,0 +1,102 @@
+"""
+브라우저 세션 HAR 녹화/재생
+
+- HAR_RECORD_DIR: 지정하면 새로 만드는 컨텍스트마다 이 폴더에 HAR 파일을 녹화합니다.
+  컨텍스트를 닫을 때 쿠키/인증 헤더를 지워서 저장합니다.
+- HAR_REPLAY_PATH: 지정하면 새로 만드는 컨텍스트의 모든 요청을 HAR 파일의 응답으로 돌려줍니다.
+  HAR 에 없는 요청은 실패시키므로 재생 중에는 외부 네트워크에 접근하지 않습니다.
+
+환경변수는 컨텍스트를 만들 때마다 읽으므로 실행 중에 바꿔도 됩니다.
+"""
+from pathlib import Path
+from typing import Dict, Optional
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# HAR 에서 지울 헤더 (소문자)
+SENSITIVE_HEADERS = {'cookie', 'set-cookie', 'authorization', 'proxy-authorization'}
+
+# 컨텍스트 → 녹화 중인 HAR 경로 (닫을 때 정리)
+_recordings: Dict[int, str] = {}
+_counter = 0
+
+
+def _safe_label(label: str) -> str:
+    return re.sub(r'[^0-9A-Za-z_-]+', '_', label or 'session')[:40]
+
+
+def har_context_options(label: str = 'session') -> dict:
+    """
+    new_context 에 추가할 녹화 옵션 (녹화 중이 아니면 빈 dict)
+
+    Args:
+        label: 파일 이름에 넣을 구분자 (계정 키 등)
+    """
+    global _counter
+    record_dir = os.getenv("HAR_RECORD_DIR")
+    if not record_dir or os.getenv("HAR_REPLAY_PATH"):
+        return {}
+    Path(record_dir).mkdir(parents=True, exist_ok=True)
+    _counter += 1
+    path = Path(record_dir) / f"{_safe_label(label)}-{time.strftime('%Y%m%d-%H%M%S')}-{_counter}.har"
+    # 응답 본문을 HAR 안에 넣어야 파일 하나로 재생할 수 있음
+    return {'record_har_path': str(path), 'record_har_content': 'embed'}
+
+
+async def prepare_context(context, options: Optional[dict] = None):
+    """
+    새로 만든 컨텍스트에 녹화/재생 설정 적용
+
+    Args:
+        context: BrowserContext
+        options: new_context 에 넘긴 옵션 (record_har_path 가 있으면 닫을 때 정리하도록 기록)
+    """
+    record_path = (options or {}).get('record_har_path')
+    if record_path:
+        _recordings[id(context)] = record_path
+        logger.info(f"HAR 녹화 중: {record_path}")
+
+    replay_path = os.getenv("HAR_REPLAY_PATH")
+    if replay_path:
+        await context.route_from_har(replay_path, not_found='abort')
+
+
+async def close_context(context):
+    """컨텍스트 닫기 (녹화 중이었으면 HAR 저장 후 민감 정보 제거)"""
+    record_path = _recordings.pop(id(context), None)
+    await context.close()
+    if record_path and os.path.exists(record_path):
+        removed = scrub_har(record_path)
+        logger.info(f"HAR 저장: {record_path} (쿠키/인증 정보 {removed}개 제거)")
+
+
+def scrub_har(path: str) -> int:
+    """
+    HAR 파일에서 쿠키와 인증 헤더 제거 (파일을 덮어씀)
+
+    Returns:
+        int: 제거한 항목 수
+    """
+    with open(path, encoding='utf-8') as f:
+        har = json.load(f)
+
+    removed = 0
+    for entry in har.get('log', {}).get('entries', []):
+        for part in (entry.get('request', {}), entry.get('response', {})):
+            headers = part.get('headers', [])
+            kept = [h for h in headers if h.get('name', '').lower() not in SENSITIVE_HEADERS]
+            removed += len(headers) - len(kept)
+            part['headers'] = kept
+            removed += len(part.get('cookies', []))
+            part['cookies'] = []
+
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(har, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return removed
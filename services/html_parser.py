@@ -0,0 +1,159 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+import asyncio
+import os
+
+from lxml import etree, html as lxml_html
+
+from .review_scraper import Review, make_review_id
+
+# 이 크기(바이트) 이상의 HTML은 프로세스 풀에서 파싱 (작은 HTML은 스레드에서 처리)
+PROCESS_POOL_THRESHOLD = 256 * 1024
+
+
+def _has_class(name: str) -> str:
+    """CSS [class*="name"] 에 해당하는 XPath 조건"""
+    return f'contains(@class, "{name}")'
+
+
+# CSS 선택자와 같은 의미의 XPath (모듈 로드 시 한 번만 컴파일)
+# 합집합은 문서 순서로 반환되므로 [1]은 BeautifulSoup select_one 과 같은 요소를 가리킵니다.
+_XP_CONTAINERS = etree.XPath(
+    f'//li[{_has_class("review")}] | //*[{_has_class("review-item")}] | //article'
+)
+_XP_AUTHOR = etree.XPath(
+    f'(.//*[{_has_class("name")}] | .//*[{_has_class("author")}] | .//strong)[1]'
+)
+_XP_STARS = etree.XPath(
+    f'.//*[{_has_class("star")} and {_has_class("on")}] | .//*[{_has_class("fill")}]'
+)
+_XP_CONTENT = etree.XPath(
+    f'(.//*[{_has_class("content")}] | .//*[{_has_class("txt")}] | .//p)[1]'
+)
+_XP_DATE = etree.XPath(f'(.//time | .//*[{_has_class("date")}])[1]')
+_XP_PHOTOS = etree.XPath(
+    './/img[contains(@src, "review") or contains(@src, "photo")]/@src'
+)
+_XP_REPLY = etree.XPath(
+    f'(.//*[{_has_class("reply")}] | .//*[{_has_class("answer")}])[1]'
+)
+_XP_REPLY_DATE = etree.XPath(f'(.//time | .//*[{_has_class("date")}])[1]')
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _text(elements: list) -> Optional[str]:
+    """첫 요소의 텍스트 (BeautifulSoup get_text(strip=True) 와 동일하게 조각별 strip 후 연결)"""
+    if not elements:
+        return None
+    return ''.join(t.strip() for t in elements[0].itertext())
+
+
+def _parse_container(container, business_id: str = '') -> Optional[Review]:
+    """
+    리뷰 요소 하나 파싱 (본문이 없으면 None)
+
+    ID/해시에 들어가는 필드(작성자/날짜/본문/별점/답글)는 학습 순서와 관계없는 고정 XPath 로만 고릅니다.
+    """
+    author = _text(_XP_AUTHOR(container)) or "익명"
+
+    rating = 5
+    stars = _XP_STARS(container)
+    if stars:
+        rating = min(len(stars), 5)
+
+    content = _text(_XP_CONTENT(container)) or ""
+    date = _text(_XP_DATE(container)) or ""
+    if not content:
+        return None
+
+    reply_elems = _XP_REPLY(container)
+    reply_content = _text(reply_elems)
+    reply_date = _text(_XP_REPLY_DATE(reply_elems[0])) if reply_elems else None
+
+    review_id = (
+        container.get('data-review-id')
+        or container.get('data-id')
+        or make_review_id(author[:20], date, content[:500], business_id)
+    )
+    return Review(
+        id=review_id,
+        author=author[:20],
+        rating=rating,
+        content=content[:500],
+        date=date,
+        visit_count="",
+        photos=list(dict.fromkeys(str(src) for src in _XP_PHOTOS(container))),
+        has_reply=reply_content is not None,
+        reply_content=reply_content,
+        reply_date=reply_date
+    )
+
+
+def parse_reviews_html(html: str, limit: int, business_id: str = '') -> List[Review]:
+    """
+    HTML에서 리뷰 파싱 (lxml + 미리 컴파일된 XPath)
+
+    data-review-id 가 없는 리뷰는 작성자/날짜/내용으로 만든 안정적인 ID를 사용합니다.
+    """
+    if not html or not html.strip():
+        return []
+
+    try:
+        root = lxml_html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return []
+
+    reviews = []
+    for container in _XP_CONTAINERS(root)[:limit]:
+        try:
+            review = _parse_container(container, business_id)
+        except Exception:
+            continue
+        if review:
+            reviews.append(review)
+
+    return reviews
+
+
+def parse_review_html(html: str, business_id: str = '') -> Optional[Review]:
+    """
+    리뷰 요소 하나의 outerHTML 파싱 (요소 경로도 HTML 경로와 같은 규칙으로 ID/해시를 만들도록)
+
+    Returns:
+        Review: 본문이 없거나 파싱할 수 없으면 None
+    """
+    if not html or not html.strip():
+        return None
+    try:
+        container = lxml_html.fragment_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+    return _parse_container(container, business_id)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+    return _process_pool
+
+
+async def parse_reviews_html_async(html: str, limit: int, business_id: str = '') -> List[Review]:
+    """
+    이벤트 루프를 막지 않고 HTML 리뷰 파싱
+
+    큰 스냅샷은 프로세스 풀, 작은 스냅샷은 기본 스레드 풀에서 파싱합니다.
+    """
+    global _process_pool
+    loop = asyncio.get_running_loop()
+
+    if len(html) >= PROCESS_POOL_THRESHOLD:
+        try:
+            return await loop.run_in_executor(_get_process_pool(), parse_reviews_html, html, limit, business_id)
+        except BrokenProcessPool:
+            # 워커 프로세스가 죽었으면 풀을 버리고 스레드에서 처리
+            _process_pool = None
+
+    return await loop.run_in_executor(None, parse_reviews_html, html, limit, business_id)
@@ -0,0 +1,284 @@
+"""
+여러 LLM 제공자에 요청을 나눠 보내는 디스패처
+
+- 제공자별 서킷 브레이커: 연속 실패하면 일정 시간 호출하지 않고 바로 다음 제공자로 넘어갑니다.
+- 장애 전환(failover): 호출이 실패하면 다음 제공자로 다시 요청합니다.
+- 헤지 요청(hedging): 응답이 그 제공자의 p95 지연 시간을 넘기면 예비 요청을 함께 보내고
+  먼저 도착한 정상 응답을 사용합니다.
+"""
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+from utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyGenerationError(RuntimeError):
+    """답글 생성 실패 (오류 내용을 답글 텍스트로 돌려주지 않고 예외로 알림)"""
+
+    def __init__(self, message: str, provider: Optional[str] = None):
+        super().__init__(message)
+        self.provider = provider
+
+
+class ProviderNotConfiguredError(ReplyGenerationError):
+    """제공자 SDK 가 없거나 API 키가 없음"""
+
+
+class ProviderUnavailableError(ReplyGenerationError):
+    """모든 제공자의 서킷 브레이커가 열려 있음"""
+
+
+class ReplyTimeoutError(ReplyGenerationError):
+    """제한 시간 안에 어떤 제공자도 응답하지 않음"""
+
+
+class AllProvidersFailedError(ReplyGenerationError):
+    """시도한 모든 제공자가 실패함"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        detail = ', '.join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"모든 AI 제공자 호출 실패 ({detail})")
+        self.errors = errors
+
+
+class CircuitBreaker:
+    """연속 실패 횟수 기반 서킷 브레이커 (closed → open → half_open → closed)"""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: 이 횟수만큼 연속 실패하면 open
+            reset_timeout: open 후 시험 호출을 허용하기까지의 시간 (초)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """호출 가능 여부 (half_open 에서는 시험 호출 하나만 허용)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self):
+        """결과 없이 끝난(취소된) 시험 호출 자리 반납"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> bool:
+        """실패 기록 (이번 실패로 open 되었으면 True)"""
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                opened = self.opened_at is None or self.state == 'half_open'
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class LatencyTracker:
+    """최근 성공 호출 지연 시간으로 p95 계산"""
+
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        """p95 지연 시간 (표본이 부족하면 None)"""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class LLMDispatcher:
+    """
+    제공자 호출 코루틴들을 서킷 브레이커/장애 전환/헤지 요청으로 감싸는 디스패처
+
+    예:
+        dispatcher = LLMDispatcher({'openai': call_openai, 'gemini': call_gemini}, order=['openai', 'gemini'])
+        text = await dispatcher.call(prompt, max_tokens=240)
+    """
+
+    def __init__(
+        self,
+        backends: Dict[str, Callable[[str, int], Awaitable[str]]],
+        order: List[str],
+        hedge: bool = True,
+        hedge_delay: float = 8.0,
+        min_hedge_delay: float = 1.0,
+        timeout: float = 60.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
+    ):
+        """
+        Args:
+            backends: {제공자 이름: async (prompt, max_tokens) -> 답글 텍스트} (실패 시 예외)
+            order: 우선순위 순서의 제공자 이름 목록
+            hedge: 헤지 요청 사용 여부
+            hedge_delay: 지연 시간 표본이 부족할 때 예비 요청을 보내기까지의 시간 (초)
+            min_hedge_delay: p95 가 아주 짧아도 이 시간 전에는 예비 요청을 보내지 않음 (초)
+            timeout: 전체 제한 시간 (초)
+            failure_threshold: 서킷 브레이커가 열리는 연속 실패 횟수
+            reset_timeout: 서킷 브레이커가 시험 호출을 허용하기까지의 시간 (초)
+        """
+        self.backends = backends
+        self.order = [name for name in order if name in backends]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_timeout) for name in self.order}
+        self.latency = {name: LatencyTracker() for name in self.order}
+
+    def _hedge_after(self, name: str) -> float:
+        p95 = self.latency[name].p95()
+        return max(self.min_hedge_delay, p95) if p95 is not None else self.hedge_delay
+
+    async def _run(self, name: str, prompt: str, max_tokens: int) -> str:
+        """제공자 호출 + 브레이커/지연 시간 기록 (취소된 호출은 실패로 세지 않음)"""
+        started = time.perf_counter()
+        try:
+            text = await self.backends[name](prompt, max_tokens)
+            if not text or not text.strip():
+                raise ReplyGenerationError("빈 답글이 반환되었습니다.", provider=name)
+        except Exception:
+            if self.breakers[name].record_failure():
+                logger.warning(f"{name} 서킷 브레이커 열림")
+                inc("llm_breaker_open", provider=name)
+            raise
+        except asyncio.CancelledError:
+            # 헤지 경쟁에서 진 호출: half_open 시험 호출이었다면 자리만 돌려줌
+            self.breakers[name].release_trial()
+            raise
+        self.breakers[name].record_success()
+        self.latency[name].observe(time.perf_counter() - started)
+        return text
+
+    async def call(self, prompt: str, max_tokens: int) -> str:
+        """
+        첫 번째 정상 응답 반환 (나머지 진행 중인 호출은 취소)
+
+        Raises:
+            ProviderUnavailableError: 호출 가능한 제공자가 없음
+            AllProvidersFailedError: 시도한 제공자가 모두 실패
+            ReplyTimeoutError: 제한 시간 초과
+        """
+        # 브레이커 확인은 실제로 호출할 때 (half_open 시험 호출을 쓰지 않는 제공자가 잡고 있지 않도록)
+        candidates = [name for name in self.order if self.breakers[name].state != 'open']
+        if not candidates:
+            inc("llm_dispatch", result="unavailable")
+            raise ProviderUnavailableError("모든 AI 제공자가 일시적으로 차단되었습니다. 잠시 후 다시 시도해주세요.")
+        # 제공자가 하나뿐이면 같은 제공자로 헤지
+        queue = candidates + ([candidates[0]] if self.hedge and len(candidates) == 1 else [])
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        pending = {}
+        errors: Dict[str, Exception] = {}
+        next_hedge = None
+
+        def launch_next(reason: str = None) -> bool:
+            nonlocal next_hedge
+            while queue:
+                name = queue.pop(0)
+                if name in errors or not self.breakers[name].allow():
+                    continue
+                pending[asyncio.ensure_future(self._run(name, prompt, max_tokens))] = name
+                next_hedge = loop.time() + self._hedge_after(name)
+                if reason:
+                    # 첫 호출 이후의 추가 호출 (예비 요청 + 장애 전환)
+                    inc("llm_retries", provider=name, reason=reason)
+                    inc(reason, provider=name)
+                return True
+            return False
+
+        if not launch_next():
+            inc("llm_dispatch", result="unavailable")
+            raise ProviderUnavailableError("모든 AI 제공자가 일시적으로 차단되었습니다. 잠시 후 다시 시도해주세요.")
+
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                wait_until = min(deadline, next_hedge) if (self.hedge and queue) else deadline
+                done, _ = await asyncio.wait(list(pending), timeout=max(0.0, wait_until - now),
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # 응답이 p95 를 넘겼으면 예비 요청
+                    if self.hedge and queue and loop.time() >= next_hedge:
+                        launch_next("llm_hedged")
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        text = task.result()
+                    except Exception as e:
+                        errors[name] = e
+                        inc("llm_attempt_failures", provider=name, error=type(e).__name__)
+                        logger.warning(f"{name} 답글 생성 실패: {e}")
+                        continue
+                    inc("llm_dispatch", result="ok" if not errors else "recovered")
+                    return text
+
+                # 진행 중인 요청이 없으면 다음 제공자로 바로 전환
+                if not pending:
+                    launch_next("llm_failover")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        inc("llm_dispatch", result="timeout" if pending else "failed")
+        if pending:
+            raise ReplyTimeoutError(f"{self.timeout:g}초 안에 답글을 받지 못했습니다.")
+        if len(errors) == 1:
+            error = next(iter(errors.values()))
+            if isinstance(error, ReplyGenerationError):
+                raise error
+        raise AllProvidersFailedError(errors)
+
+    def stats(self) -> dict:
+        """제공자별 상태 (진단 화면용)"""
+        return {
+            name: {
+                'breaker': self.breakers[name].state,
+                'failures': self.breakers[name].failures,
+                'p95_s': round(self.latency[name].p95(), 3) if self.latency[name].p95() is not None else None,
+            }
+            for name in self.order
+        }
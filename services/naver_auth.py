@@ -1,36 +1,105 @@
 import asyncio
-from playwright.async_api import async_playwright
 from typing import Optional, List, Dict
+import hashlib
 import json
+import logging
 import re
 
+from database.db import save_business_list, get_cached_business_list, get_business_cache_age
+from utils.metrics import inc, span, timed
+from .browser_manager import (BrowserManager, BrowserCrashedError, BROWSER_ARGS, CONTEXT_OPTIONS,
+                              is_browser_crash, close_page)
+from .config import SMARTPLACE_URL, COOKIE_DOMAIN
+from .har import har_context_options, prepare_context, close_context
+
+logger = logging.getLogger(__name__)
+
+# 업체 목록 캐시 유효 시간 (초)
+BUSINESS_CACHE_TTL = 6 * 60 * 60
+
+# 업체 목록 페이지의 다음 페이지 / 더보기 버튼
+_NEXT_PAGE_SELECTOR = (
+    '[class*="pagination"] [class*="next"]:not([disabled]):not([aria-disabled="true"]), '
+    'button[class*="more"]:not([disabled])'
+)
+
+# 목록 페이지에서 업체 ID/이름/카테고리를 한 번에 수집하는 스크립트
+_COLLECT_BUSINESSES_JS = """
+() => {
+    const out = [];
+    const seen = new Set();
+    document.querySelectorAll('a[href*="/biz/"], [data-id]').forEach(el => {
+        let id = el.getAttribute('data-id');
+        if (!id) {
+            const m = (el.getAttribute('href') || '').match(/\\/biz\\/(\\d+)/);
+            if (m) id = m[1];
+        }
+        if (!id || !/^\\d+$/.test(id) || seen.has(id)) return;
+        seen.add(id);
+        const item = el.closest('li, [class*="item"]') || el;
+        const nameEl = item.querySelector('[class*="name"], [class*="title"], h3, h4, strong');
+        const catEl = item.querySelector('[class*="category"], [class*="type"]');
+        out.push({
+            id: id,
+            name: nameEl ? nameEl.innerText.trim() : '',
+            category: catEl ? catEl.innerText.trim() : ''
+        });
+    });
+    return out;
+}
+"""
+
 class NaverAuth:
-    def __init__(self):
+    def __init__(self, manager: Optional[BrowserManager] = None):
+        """
+        Args:
+            manager: 공유 브라우저 관리자 (지정하면 브라우저를 직접 띄우지 않고
+                     공유 Chromium 위의 계정 전용 컨텍스트를 사용)
+        """
+        self.manager = manager
         self.cookies = None
         self.is_logged_in = False
         self.browser = None
-        self.context = None
+        self._context = None
         self.playwright = None
+        self.account_key = None
+        # 마지막으로 확인한 세션 상태 (쿠키 + localStorage) - 브라우저가 죽었을 때 복구용, 메모리에만 보관
+        self.session_state = None
+        self._refresh_task = None
+        
+    @property
+    def context(self):
+        """
+        계정 브라우저 컨텍스트
         
+        공유 브라우저를 쓰면 관리자의 현재 계정 컨텍스트를 돌려주므로, 같은 계정의 다른 세션이
+        복구해 새로 만든 컨텍스트도 바로 씁니다.
+        """
+        if self.manager and self._context is not None and self.account_key:
+            return self.manager.context(self.account_key) or self._context
+        return self._context
+    
+    @context.setter
+    def context(self, context):
+        self._context = context
+    
     async def init_browser(self):
         """브라우저 초기화"""
         try:
+            if self.manager:
+                await self.manager.start()
+                self.browser = self.manager.browser
+                return True
+            
+            from playwright.async_api import async_playwright
             self.playwright = await async_playwright().start()
             self.browser = await self.playwright.chromium.launch(
                 headless=True,
-                args=[
-                    '--no-sandbox',
-                    '--disable-setuid-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-accelerated-2d-canvas',
-                    '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu'
-                ]
+                args=BROWSER_ARGS
             )
             return True
         except Exception as e:
-            print(f"브라우저 초기화 실패: {e}")
+            logger.error(f"브라우저 초기화 실패: {e}")
             return False
         
     async def login_with_cookies(self, cookie_string: str) -> bool:
@@ -41,8 +110,11 @@ class NaverAuth:
             cookie_string: 네이버 쿠키 문자열 (NID_AUT, NID_SES 등)
             
         Returns:
-            bool: 로그인 성공 여부
+            bool: 로그인 성공 여부 (실패하면 이번에 만든/빌린 컨텍스트는 반환)
         """
+        page = None
+        fresh_context = False
+        logged_in = False
         try:
             if not self.browser:
                 await self.init_browser()
@@ -51,21 +123,31 @@ class NaverAuth:
             cookies = self._parse_cookies(cookie_string)
             
             if not cookies:
-                print("쿠키 파싱 실패")
+                logger.error("쿠키 파싱 실패")
                 return False
             
-            # 브라우저 컨텍스트 생성
-            self.context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            # 쿠키 설정
-            await self.context.add_cookies(cookies)
+            if self.manager:
+                # 공유 브라우저의 계정 전용 컨텍스트 (쿠키 설정 포함)
+                if self.context and self.account_key:
+                    await self.manager.release(self.account_key)
+                    self.context = None
+                self.account_key = self._make_account_key(cookies)
+                self.context = await self.manager.acquire(self.account_key, cookies)
+                fresh_context = True
+            else:
+                # 브라우저 컨텍스트 생성
+                options = {**CONTEXT_OPTIONS, **har_context_options()}
+                self.context = await self.browser.new_context(**options)
+                fresh_context = True
+                await prepare_context(self.context, options)
+                
+                # 쿠키 설정
+                await self.context.add_cookies(cookies)
             
             # 로그인 검증
             page = await self.context.new_page()
-            await page.goto("https://new.smartplace.naver.com/", wait_until="networkidle", timeout=30000)
+            with span("navigation", target="login_check"):
+                await page.goto(f"{SMARTPLACE_URL}/", wait_until="networkidle", timeout=30000)
             
             # 페이지 내용 확인
             content = await page.content()
@@ -80,20 +162,90 @@ class NaverAuth:
             # 3. URL이 로그인 페이지로 리다이렉트되지 않았는지 확인
             current_url = page.url
             
-            await page.close()
-            
             if 'nidlogin' in current_url or 'login' in current_url.lower():
-                print("로그인 페이지로 리다이렉트됨 - 쿠키 무효")
+                logger.warning("로그인 페이지로 리다이렉트됨 - 쿠키 무효")
                 return False
             
             self.is_logged_in = True
             self.cookies = cookies
-            print("로그인 성공!")
+            self.account_key = self._make_account_key(cookies)
+            await self.save_session_state()
+            logged_in = True
+            logger.info("로그인 성공!")
             return True
                 
         except Exception as e:
-            print(f"로그인 실패: {e}")
+            logger.error(f"로그인 실패: {e}")
             return False
+        finally:
+            try:
+                await close_page(page)
+            except Exception as e:
+                logger.warning(f"로그인 확인 페이지 종료 오류: {e}")
+            if fresh_context and not logged_in:
+                await self._discard_context()
+    
+    async def _discard_context(self):
+        """
+        로그인 확인에 실패한 컨텍스트 정리
+        
+        공유 브라우저는 참조를 반환해야 유휴 정리/자리 확보 대상이 되므로, 잘못된 쿠키로 다시 시도할 때마다
+        컨텍스트가 쌓이지 않도록 실패 경로에서 항상 호출합니다.
+        """
+        context = self._context
+        self.context = None
+        self.is_logged_in = False
+        if context is None:
+            return
+        try:
+            if self.manager:
+                if self.account_key:
+                    await self.manager.release(self.account_key)
+            else:
+                await close_context(context)
+        except Exception as e:
+            if not is_browser_crash(e):
+                logger.warning(f"로그인 실패 컨텍스트 정리 오류: {e}")
+    
+    async def save_session_state(self):
+        """현재 컨텍스트의 세션 상태(쿠키 + localStorage) 저장 (갱신된 세션 쿠키를 복구에 쓰기 위함)"""
+        if self.context:
+            self.session_state = await self.context.storage_state()
+    
+    async def restore_session(self) -> bool:
+        """
+        브라우저나 컨텍스트가 죽었을 때 마지막 세션 상태로 컨텍스트를 다시 만듦
+        
+        공유 브라우저를 쓰면 이 계정의 컨텍스트만 새로 만들고(브라우저가 끊겼으면 다시 띄움),
+        직접 띄운 브라우저는 전부 닫고 다시 띄웁니다. 로그인 페이지 확인은 하지 않습니다.
+        
+        Returns:
+            bool: 복구 성공 여부
+        """
+        state = self.session_state or ({'cookies': self.cookies} if self.cookies else None)
+        if not state:
+            logger.error("복구할 세션 상태가 없습니다. 다시 로그인해주세요.")
+            return False
+        
+        try:
+            if self.manager:
+                # 참조 카운트는 그대로 두고 컨텍스트만 교체 (같은 계정을 빌린 세션/감시자도 새 컨텍스트를 씀)
+                self.context = await self.manager.replace_context(self.account_key, state)
+                self.browser = self.manager.browser
+            else:
+                await self.close()
+                if not await self.init_browser():
+                    return False
+                options = {**CONTEXT_OPTIONS, **har_context_options(), 'storage_state': state}
+                self.context = await self.browser.new_context(**options)
+                fresh_context = True
+                await prepare_context(self.context, options)
+        except Exception as e:
+            logger.error(f"세션 복구 실패: {e}", exc_info=True)
+            return False
+        
+        self.is_logged_in = True
+        return True
     
     def _parse_cookies(self, cookie_string: str) -> list:
         """쿠키 문자열을 Playwright 쿠키 형식으로 변환"""
@@ -116,103 +268,205 @@ class NaverAuth:
                     cookies.append({
                         'name': name,
                         'value': value,
-                        'domain': '.naver.com',
+                        'domain': COOKIE_DOMAIN,
                         'path': '/'
                     })
         
         return cookies
     
-    async def get_business_list(self) -> List[Dict]:
+    def _make_account_key(self, cookies: list) -> str:
+        """캐시 키로 쓸 계정 식별자 (쿠키 원문은 저장하지 않음)"""
+        values = {c['name']: c['value'] for c in cookies}
+        source = values.get('NID_AUT') or ';'.join(f"{c['name']}={c['value']}" for c in cookies)
+        return hashlib.sha256(source.encode()).hexdigest()[:16]
+    
+    async def get_business_list(self, use_cache: bool = True, cache_ttl: int = BUSINESS_CACHE_TTL) -> List[Dict]:
         """
         등록된 업체 목록 가져오기
         
+        캐시가 있으면 즉시 반환하고, TTL이 지났으면 백그라운드에서 갱신합니다.
+        
+        Args:
+            use_cache: DB 캐시 사용 여부 (False면 항상 새로 조회)
+            cache_ttl: 캐시 유효 시간 (초)
+            
         Returns:
             list: 업체 정보 리스트 [{id, name, category}, ...]
         """
         if not self.is_logged_in or not self.context:
             return []
         
-        businesses = []
+        if use_cache and self.account_key:
+            cached = get_cached_business_list(self.account_key)
+            if cached:
+                age = get_business_cache_age(self.account_key)
+                if age is None or age > cache_ttl:
+                    self.refresh_business_list_in_background()
+                return cached
+        
+        return await self._refresh_business_cache()
+    
+    def refresh_business_list_in_background(self):
+        """업체 목록 백그라운드 갱신 시작 (이미 진행 중이면 무시)"""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.ensure_future(self._refresh_business_cache())
+    
+    def pop_refreshed_business_list(self) -> Optional[List[Dict]]:
+        """
+        백그라운드 갱신이 끝났으면 새 업체 목록 반환
+        
+        Returns:
+            list: 갱신된 업체 목록 (진행 중이거나 갱신 결과가 없으면 None)
+        """
+        task = self._refresh_task
+        if not task or not task.done():
+            return None
+        self._refresh_task = None
+        if task.cancelled() or task.exception():
+            return None
+        return task.result() or None
+    
+    async def _refresh_business_cache(self) -> List[Dict]:
+        """업체 목록을 새로 조회하여 캐시에 저장"""
+        businesses = await self.discover_businesses()
+        if businesses and self.account_key:
+            save_business_list(self.account_key, businesses)
+        return businesses
+    
+    @timed("discover_businesses")
+    async def discover_businesses(self, max_pages: int = 50, concurrency: int = 8) -> List[Dict]:
+        """
+        계정에 등록된 모든 업체 조회 (페이지네이션 포함)
+        
+        목록 페이지에서는 업체 ID만 확실히 수집하고, 이름/카테고리가 빠진 업체는
+        상세 페이지를 동시에 요청하여 채웁니다.
+        
+        Args:
+            max_pages: 최대 목록 페이지 수
+            concurrency: 상세 정보 동시 요청 수
+            
+        Returns:
+            list: 업체 정보 리스트 [{id, name, category}, ...]
+        """
+        businesses = {}
         page = None
         
         try:
             page = await self.context.new_page()
-            await page.goto("https://new.smartplace.naver.com/", wait_until="networkidle", timeout=30000)
-            
-            # 잠시 대기
-            await page.wait_for_timeout(2000)
-            
-            # 업체 목록 찾기 (여러 선택자 시도)
-            selectors = [
-                '[class*="business"] [class*="item"]',
-                '[class*="store"] [class*="item"]',
-                '[class*="place"] [class*="item"]',
-                'li[class*="item"]',
-                '[data-id]'
-            ]
+            with span("navigation", target="business_list"):
+                await page.goto(f"{SMARTPLACE_URL}/", wait_until="networkidle", timeout=30000)
             
-            for selector in selectors:
-                elements = await page.query_selector_all(selector)
-                if elements:
-                    for elem in elements:
-                        try:
-                            # ID 추출
-                            bid = await elem.get_attribute("data-id")
-                            if not bid:
-                                href = await elem.get_attribute("href")
-                                if href:
-                                    match = re.search(r'/biz/(\d+)', href)
-                                    if match:
-                                        bid = match.group(1)
-                            
-                            # 이름 추출
-                            name_elem = await elem.query_selector('[class*="name"], [class*="title"], h3, h4, strong')
-                            name = await name_elem.inner_text() if name_elem else "업체"
-                            
-                            # 카테고리 추출
-                            cat_elem = await elem.query_selector('[class*="category"], [class*="type"], span')
-                            category = await cat_elem.inner_text() if cat_elem else ""
-                            
-                            if bid:
-                                businesses.append({
-                                    'id': bid,
-                                    'name': name.strip(),
-                                    'category': category.strip()
-                                })
-                        except:
-                            continue
+            for _ in range(max_pages):
+                # 한 번의 evaluate로 현재 페이지의 업체 정보 수집
+                found = await page.evaluate(_COLLECT_BUSINESSES_JS)
+                new_count = 0
+                for item in found:
+                    if item['id'] not in businesses:
+                        businesses[item['id']] = item
+                        new_count += 1
+                
+                # 정규식 보조 수집 (링크가 스크립트 안에만 있는 경우)
+                if not businesses:
+                    content = await page.content()
+                    for bid in dict.fromkeys(re.findall(r'/biz/(\d+)', content)):
+                        businesses[bid] = {'id': bid, 'name': '', 'category': ''}
+                
+                # 다음 페이지 / 더보기
+                next_btn = await page.query_selector(_NEXT_PAGE_SELECTOR)
+                if not next_btn or (businesses and new_count == 0):
                     break
-            
-            # 업체를 찾지 못한 경우, URL에서 직접 추출 시도
-            if not businesses:
-                # 현재 페이지에서 업체 ID 찾기
-                content = await page.content()
-                matches = re.findall(r'/biz/(\d+)', content)
-                if matches:
-                    unique_ids = list(set(matches))[:5]  # 최대 5개
-                    for bid in unique_ids:
-                        businesses.append({
-                            'id': bid,
-                            'name': f'업체 {bid}',
-                            'category': ''
-                        })
+                await next_btn.click()
+                await page.wait_for_load_state("networkidle", timeout=15000)
             
         except Exception as e:
-            print(f"업체 목록 조회 오류: {e}")
+            if is_browser_crash(e):
+                raise BrowserCrashedError(f"업체 목록 조회 중 브라우저 오류: {e}") from e
+            logger.error(f"업체 목록 조회 오류: {e}")
         finally:
-            if page:
-                await page.close()
+            await close_page(page)
         
-        return businesses
+        result = list(businesses.values())
+        missing = [b for b in result if not b['name'] or not b['category']]
+        if missing:
+            semaphore = asyncio.Semaphore(concurrency)
+            await asyncio.gather(*(self._fill_business_detail(b, semaphore) for b in missing))
+        
+        for b in result:
+            if not b['name']:
+                b['name'] = f"업체 {b['id']}"
+        return result
     
-    async def close(self):
-        """브라우저 종료"""
-        try:
-            if self.context:
-                await self.context.close()
-            if self.browser:
-                await self.browser.close()
-            if self.playwright:
-                await self.playwright.stop()
-        except:
-            pass
+    async def _fill_business_detail(self, business: Dict, semaphore: asyncio.Semaphore):
+        """업체 상세 페이지에서 이름/카테고리 채우기 (렌더링 없이 HTTP 요청만 사용)"""
+        async with semaphore:
+            try:
+                with span("http_request", target="business_detail"):
+                    response = await self.context.request.get(
+                        f"{SMARTPLACE_URL}/biz/{business['id']}", timeout=15000
+                    )
+                if not response.ok:
+                    return
+                html = await response.text()
+            except Exception as e:
+                if is_browser_crash(e):
+                    raise BrowserCrashedError(f"업체 상세 조회 중 브라우저 오류: {e}") from e
+                logger.error(f"업체 상세 조회 오류 ({business['id']}): {e}")
+                return
+        
+        if not business['name']:
+            match = (re.search(r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"', html)
+                     or re.search(r'<title>([^<]+)</title>', html))
+            if match:
+                name = match.group(1).split(':')[0].strip()
+                if name and '스마트플레이스' not in name:
+                    business['name'] = name
+        
+        if not business['category']:
+            match = re.search(r'"category(?:Name)?"\s*:\s*"([^"]+)"', html)
+            if match:
+                business['category'] = match.group(1).strip()
+    
+    async def close(self) -> bool:
+        """
+        브라우저 종료 (공유 브라우저를 쓰는 경우 계정 컨텍스트만 반환)
+        
+        컨텍스트/브라우저/Playwright 를 하나씩 닫으므로 앞 단계가 실패해도 뒤 단계(프로세스 종료)는 실행됩니다.
+        실패한 단계는 오류 로그와 browser_close_errors 메트릭으로 남깁니다.
+        
+        Returns:
+            bool: 모든 단계를 오류 없이 닫았는지
+        """
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        
+        if self.manager:
+            steps = [("컨텍스트 반환", lambda: self.manager.release(self.account_key))] \
+                if self.context and self.account_key else []
+        else:
+            steps = [
+                ("컨텍스트", lambda: close_context(self.context)) if self.context else None,
+                ("브라우저", lambda: self.browser.close()) if self.browser else None,
+                ("Playwright", lambda: self.playwright.stop()) if self.playwright else None,
+            ]
+        
+        ok = True
+        for step in filter(None, steps):
+            label, close = step
+            try:
+                await close()
+            except Exception as e:
+                if is_browser_crash(e):
+                    # 이미 죽은 브라우저/컨텍스트 - 정리할 것이 없음
+                    logger.warning(f"{label} 종료: 이미 닫혀 있음 ({e})")
+                    continue
+                ok = False
+                inc("browser_close_errors", step=label)
+                logger.error(f"{label} 종료 오류: {e}", exc_info=True)
+        
+        self.context = None
+        self.is_logged_in = False
+        if not self.manager:
+            self.browser = None
+            self.playwright = None
+        return ok
@@ -0,0 +1,200 @@
+"""
+리뷰 사진 썸네일 서비스
+
+- 로그인한 브라우저 컨텍스트(context.request)로 사진을 받으므로 쿠키가 필요한 사진도 가져옵니다.
+- 동시에 받는 사진 수를 제한하고, 너무 큰 사진은 건너뜁니다.
+- 썸네일은 스레드 풀에서 만듭니다 (Pillow 는 디코딩/리사이즈 중 GIL 을 놓음).
+- 썸네일은 원본 내용 해시로 디스크에 저장하므로 같은 사진은 URL 이 달라도 한 번만 저장됩니다.
+- 캐시 전체 크기가 상한을 넘으면 가장 오래 보지 않은 사진부터 지웁니다.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import weakref
+
+from database.db import DATABASE_PATH, get_photo_hashes, save_photo, get_photo_cache_size, pop_lru_photos
+from utils.metrics import inc, span
+
+logger = logging.getLogger(__name__)
+
+# 캐시 위치 (PHOTO_CACHE_DIR 환경변수로 변경 가능)
+DEFAULT_CACHE_DIR = Path(os.getenv("PHOTO_CACHE_DIR", Path(DATABASE_PATH).parent / "photo_cache"))
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+def make_thumbnail(data: bytes, size: tuple = THUMBNAIL_SIZE, quality: int = 80) -> bytes:
+    """
+    이미지 바이트로 JPEG 썸네일 생성 (Pillow 가 없으면 원본 그대로)
+
+    Raises:
+        ValueError: 이미지로 읽을 수 없음
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # 큰 JPEG 는 디코딩 단계에서 미리 줄여 메모리/시간 절약
+            image.draft('RGB', size)
+            image = image.convert('RGB')
+            image.thumbnail(size)
+            out = io.BytesIO()
+            image.save(out, format='JPEG', quality=quality, optimize=True)
+            return out.getvalue()
+    except Exception as e:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {e}") from e
+
+
+class PhotoService:
+    """리뷰 사진을 받아 썸네일로 캐시하고 파일 경로로 돌려주는 서비스"""
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_cache_mb: float = 200,
+        concurrency: int = 6,
+        max_photo_mb: float = 10,
+        timeout: float = 15.0,
+        thumbnail_size: tuple = THUMBNAIL_SIZE,
+        workers: int = None
+    ):
+        """
+        Args:
+            cache_dir: 썸네일 저장 폴더
+            max_cache_mb: 캐시 크기 상한 (MB, 넘으면 오래 보지 않은 사진부터 삭제)
+            concurrency: 동시에 받는 최대 사진 수
+            max_photo_mb: 이보다 큰 원본 사진은 받지 않음 (MB)
+            timeout: 사진 하나를 받는 제한 시간 (초)
+            thumbnail_size: 썸네일 최대 가로/세로 (픽셀)
+            workers: 썸네일 생성 스레드 수 (기본값: CPU 수, 최대 4)
+        """
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_cache_bytes = int(max_cache_mb * 1024 * 1024)
+        self.concurrency = concurrency
+        self.max_photo_bytes = int(max_photo_mb * 1024 * 1024)
+        self.timeout = timeout
+        self.thumbnail_size = thumbnail_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or min(4, os.cpu_count() or 1), thread_name_prefix="thumbnail"
+        )
+        # 이벤트 루프마다 따로 (세마포어/Future 는 만든 루프에 묶임)
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _path(self, content_hash: str) -> Path:
+        # 한 폴더에 파일이 너무 많아지지 않도록 해시 앞 2글자로 나눔
+        return self.cache_dir / content_hash[:2] / f"{content_hash}.jpg"
+
+    def cached_paths(self, urls: List[str]) -> Dict[str, str]:
+        """이미 캐시된 사진의 썸네일 경로 {url: 경로} (네트워크 접근 없음)"""
+        paths = {}
+        for url, content_hash in get_photo_hashes(list(dict.fromkeys(urls))).items():
+            path = self._path(content_hash)
+            if path.exists():
+                paths[url] = str(path)
+        return paths
+
+    async def get_thumbnails(self, context, urls: List[str]) -> List[Optional[str]]:
+        """
+        사진 URL 목록의 썸네일 파일 경로 (캐시에 없으면 받아서 만듦)
+
+        Args:
+            context: 로그인한 Playwright BrowserContext
+            urls: 사진 URL 목록
+
+        Returns:
+            list: urls 와 같은 순서의 파일 경로 (받지 못한 사진은 None)
+        """
+        if not urls:
+            return []
+        cached = self.cached_paths(urls)
+        inc("photo_cache", len(cached), result="hit")
+
+        missing = [url for url in dict.fromkeys(urls) if url not in cached]
+        if missing:
+            inc("photo_cache", len(missing), result="miss")
+            fetched = await asyncio.gather(*(self._fetch_once(context, url) for url in missing))
+            cached.update({url: path for url, path in zip(missing, fetched) if path})
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.evict)
+        return [cached.get(url) for url in urls]
+
+    async def _fetch_once(self, context, url: str) -> Optional[str]:
+        """같은 사진을 여러 곳에서 동시에 요청해도 한 번만 받음"""
+        task = self._inflight.get(url)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._fetch(context, url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return self._semaphores[loop]
+
+    async def _fetch(self, context, url: str) -> Optional[str]:
+        try:
+            async with self._semaphore():
+                with span("photo_fetch") as s:
+                    response = await context.request.get(url, timeout=self.timeout * 1000)
+                    if not response.ok:
+                        logger.warning(f"사진 다운로드 실패 ({response.status}): {url}")
+                        return None
+                    length = response.headers.get('content-length')
+                    if length and length.isdigit() and int(length) > self.max_photo_bytes:
+                        logger.warning(f"사진이 너무 커서 건너뜀 ({int(length) // 1024}KB): {url}")
+                        inc("photo_skipped", reason="too_large")
+                        return None
+                    data = await response.body()
+                    s.set(bytes=len(data))
+            if len(data) > self.max_photo_bytes:
+                inc("photo_skipped", reason="too_large")
+                return None
+            inc("photo_bytes", len(data))
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._store, url, data)
+        except Exception as e:
+            logger.warning(f"사진 처리 오류: {url} ({e})")
+            return None
+
+    def _store(self, url: str, data: bytes) -> str:
+        """원본 내용 해시로 썸네일 저장 (같은 내용이면 파일을 다시 만들지 않음)"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._path(content_hash)
+        if not path.exists():
+            with span("photo_thumbnail"):
+                thumbnail = make_thumbnail(data, self.thumbnail_size)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(thumbnail)
+            os.replace(tmp, path)
+        save_photo(url, content_hash, path.stat().st_size)
+        return str(path)
+
+    def evict(self) -> int:
+        """
+        캐시 크기가 상한을 넘으면 오래 보지 않은 사진부터 삭제 (상한의 90% 까지)
+
+        Returns:
+            int: 삭제한 파일 수
+        """
+        excess = get_photo_cache_size() - self.max_cache_bytes
+        if excess <= 0:
+            return 0
+        removed = pop_lru_photos(excess + self.max_cache_bytes // 10)
+        for content_hash in removed:
+            try:
+                self._path(content_hash).unlink()
+            except FileNotFoundError:
+                pass
+        inc("photo_evicted", len(removed))
+        return len(removed)
@@ -1,6 +1,14 @@
 import asyncio
+import logging
 from typing import Optional
 
+from utils.metrics import span, timed
+from .browser_manager import BrowserCrashedError, is_browser_crash, close_page
+from .config import SMARTPLACE_URL
+from .selector_registry import get_selector_registry, layout_fingerprint
+
+logger = logging.getLogger(__name__)
+
 class ReplyPoster:
     def __init__(self, context):
         """
@@ -8,7 +16,9 @@ class ReplyPoster:
             context: Playwright 브라우저 컨텍스트 (로그인된 상태)
         """
         self.context = context
+        self.selectors = get_selector_registry()
     
+    @timed("post_reply")
     async def post_reply(
         self,
         business_id: str,
@@ -25,50 +35,40 @@ class ReplyPoster:
             
         Returns:
             dict: {'success': bool, 'message': str}
+        
+        Raises:
+            BrowserCrashedError: 등록 버튼을 누르기 전에 브라우저/컨텍스트가 죽음 (다시 시도해도 중복 등록 없음)
         """
         page = None
+        submitted = False
         
         try:
             page = await self.context.new_page()
             
             # 리뷰 페이지로 이동
-            url = f"https://new.smartplace.naver.com/biz/{business_id}/review/visitor"
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            await page.wait_for_timeout(2000)
+            url = f"{SMARTPLACE_URL}/biz/{business_id}/review/visitor"
+            with span("navigation", target="reply_page"):
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+                await page.wait_for_timeout(2000)
             
             # 해당 리뷰 찾기
             review_elem = await page.query_selector(f'[data-review-id="{review_id}"], [data-id="{review_id}"]')
             
+            fingerprint = await layout_fingerprint(page)
+            
             if not review_elem:
                 # 리뷰 ID로 찾지 못하면 전체 리뷰 목록에서 찾기
-                review_elems = await page.query_selector_all('li[class*="review"], [class*="review-item"]')
+                review_elems = await self.selectors.query_all(page, 'review_item', fingerprint)
                 if review_elems:
                     review_elem = review_elems[0]  # 첫 번째 리뷰 선택
             
             if not review_elem:
                 return {'success': False, 'message': '리뷰를 찾을 수 없습니다. 페이지를 새로고침 해주세요.'}
             
-            # 답글 달기 버튼 찾기
-            reply_btn_selectors = [
-                'button[class*="reply"]',
-                'a[class*="reply"]',
-                '[class*="답글"]',
-                'button:has-text("답글")',
-                '[class*="write"]'
-            ]
-            
-            reply_btn = None
-            for selector in reply_btn_selectors:
-                reply_btn = await review_elem.query_selector(selector)
-                if reply_btn:
-                    break
-            
+            # 답글 달기 버튼 찾기 (리뷰 안 -> 페이지 전체)
+            reply_btn = await self.selectors.query(review_elem, 'reply_button', fingerprint)
             if not reply_btn:
-                # 페이지 전체에서 찾기
-                for selector in reply_btn_selectors:
-                    reply_btn = await page.query_selector(selector)
-                    if reply_btn:
-                        break
+                reply_btn = await self.selectors.query(page, 'reply_button_page', fingerprint)
             
             if not reply_btn:
                 return {'success': False, 'message': '답글 버튼을 찾을 수 없습니다. 이미 답글이 달려있을 수 있습니다.'}
@@ -78,19 +78,7 @@ class ReplyPoster:
             await page.wait_for_timeout(1000)
             
             # 답글 입력창 찾기
-            textarea_selectors = [
-                'textarea[class*="reply"]',
-                'textarea[class*="input"]',
-                '[class*="reply"] textarea',
-                'textarea',
-                '[contenteditable="true"]'
-            ]
-            
-            textarea = None
-            for selector in textarea_selectors:
-                textarea = await page.query_selector(selector)
-                if textarea:
-                    break
+            textarea = await self.selectors.query(page, 'reply_textarea', fingerprint)
             
             if not textarea:
                 return {'success': False, 'message': '답글 입력창을 찾을 수 없습니다.'}
@@ -100,33 +88,27 @@ class ReplyPoster:
             await page.wait_for_timeout(500)
             
             # 등록 버튼 찾기 및 클릭
-            submit_selectors = [
-                'button[type="submit"]',
-                'button[class*="submit"]',
-                'button[class*="register"]',
-                'button:has-text("등록")',
-                'button:has-text("완료")',
-                '[class*="submit"]'
-            ]
-            
-            submit_btn = None
-            for selector in submit_selectors:
-                submit_btn = await page.query_selector(selector)
-                if submit_btn:
-                    break
+            submit_btn = await self.selectors.query(page, 'reply_submit', fingerprint)
             
             if submit_btn:
-                await submit_btn.click()
-                await page.wait_for_timeout(2000)
+                with span("submit_reply"):
+                    submitted = True
+                    await submit_btn.click()
+                    await page.wait_for_timeout(2000)
                 return {'success': True, 'message': '답글이 등록되었습니다! 🎉'}
             else:
                 return {'success': False, 'message': '등록 버튼을 찾을 수 없습니다. 수동으로 등록해주세요.'}
                 
         except Exception as e:
+            if is_browser_crash(e) and not submitted:
+                raise BrowserCrashedError(f"답글 등록 중 브라우저 오류 ({business_id}/{review_id}): {e}") from e
+            logger.error(f"답글 등록 오류 ({business_id}/{review_id}): {e}")
+            if submitted:
+                return {'success': False, 'message': f'등록 버튼을 누른 뒤 오류가 발생했습니다. 등록 여부를 확인해주세요: {e}'}
             return {'success': False, 'message': f'오류 발생: {str(e)}'}
         finally:
-            if page:
-                await page.close()
+            await close_page(page)
+            self.selectors.save()
     
     async def post_bulk_replies(
         self,
@@ -0,0 +1,155 @@
+"""
+짧고 비슷한 리뷰("맛있어요", "친절해요 또 올게요" 등)를 묶는 근사 중복 인덱스
+
+- 글자 n-gram MinHash 시그니처를 만들고, 밴드별로 나눈 LSH 버킷으로 후보 쌍만 비교합니다.
+- 같은 별점끼리만 묶이도록 버킷 키에 별점을 포함합니다.
+- 외부 패키지 없이 동작하며, 리뷰 수에 거의 선형으로 처리됩니다.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import random
+import re
+import zlib
+
+from utils.records import get_field
+
+# Mersenne 소수 (해시 순열 계산용)
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 공백, 문장부호, 'ㅎㅎ'/'ㅋㅋ' 같은 자모만 있는 글자
+_STRIP_PATTERN = re.compile(r'[\s\W_ㄱ-ㅣ]+', re.UNICODE)
+
+
+def shingles(text: str, n: int = 3) -> set:
+    """공백/문장부호/자모를 뺀 글자 n-gram 집합 (n 보다 짧으면 문장 전체)"""
+    normalized = _STRIP_PATTERN.sub('', (text or '').lower())
+    if len(normalized) <= n:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+
+
+class MinHasher:
+    """고정된 시드의 해시 순열로 MinHash 시그니처 생성"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: set) -> Tuple[int, ...]:
+        if not features:
+            return tuple([_MAX_HASH] * self.num_perm)
+        hashes = [zlib.crc32(f.encode()) for f in features]
+        return tuple(
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        )
+
+
+def estimate_similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """두 시그니처의 자카드 유사도 추정치"""
+    if not sig_a:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """
+    리뷰 근사 중복 인덱스
+
+    예:
+        index = NearDuplicateIndex()
+        for i, review in enumerate(reviews):
+            index.add(i, review.content, review.rating)
+        groups = index.clusters()   # [[0, 3, 7], [1], ...]
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, ngram: int = 3):
+        """
+        Args:
+            threshold: 같은 묶음으로 볼 최소 유사도 (0~1)
+            num_perm: MinHash 순열 수
+            bands: LSH 밴드 수 (num_perm 의 약수, 많을수록 후보를 넓게 찾음)
+            ngram: 글자 n-gram 크기
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다.")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.hasher = MinHasher(num_perm)
+        self._signatures: Dict[object, Tuple[int, ...]] = {}
+        self._buckets: Dict[tuple, List[object]] = {}
+        self._parent: Dict[object, object] = {}
+        # 정규화 후 완전히 같은 리뷰는 시그니처 계산/버킷 비교 없이 바로 묶음
+        self._exact: Dict[tuple, object] = {}
+
+    def _find(self, key):
+        root = key
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[key] != root:
+            self._parent[key], key = root, self._parent[key]
+        return root
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self._parent[root_b] = root_a
+
+    def add(self, key, text: str, rating: Optional[int] = None):
+        """리뷰 추가 (같은 버킷의 기존 리뷰 중 유사도가 threshold 이상이면 같은 묶음)"""
+        features = shingles(text, self.ngram)
+        self._parent[key] = key
+        exact_key = (rating, frozenset(features))
+        if features and exact_key in self._exact:
+            original = self._exact[exact_key]
+            self._signatures[key] = self._signatures[original]
+            self._union(original, key)
+            return
+
+        signature = self.hasher.signature(features)
+        self._signatures[key] = signature
+        if not features:
+            return
+        self._exact[exact_key] = key
+
+        for band in range(self.bands):
+            bucket_key = (rating, band, signature[band * self.rows:(band + 1) * self.rows])
+            bucket = self._buckets.setdefault(bucket_key, [])
+            for other in bucket:
+                if self._find(other) != self._find(key) and \
+                        estimate_similarity(signature, self._signatures[other]) >= self.threshold:
+                    self._union(other, key)
+            bucket.append(key)
+
+    def clusters(self) -> List[list]:
+        """묶음 목록 (추가한 순서 유지)"""
+        groups: Dict[object, list] = {}
+        for key in self._signatures:
+            groups.setdefault(self._find(key), []).append(key)
+        return list(groups.values())
+
+
+def cluster_reviews(reviews: list, threshold: float = 0.6, max_length: int = 80) -> List[List[int]]:
+    """
+    비슷한 리뷰끼리 인덱스 묶음으로 나누기
+
+    Args:
+        reviews: Review 객체 또는 {'content', 'rating'} dict 목록
+        threshold: 같은 묶음으로 볼 최소 유사도
+        max_length: 이보다 긴 리뷰는 구체적인 답글이 필요하므로 묶지 않음
+
+    Returns:
+        list: [[리뷰 인덱스, ...], ...] (모든 리뷰가 정확히 한 묶음에 속함)
+    """
+    index = NearDuplicateIndex(threshold=threshold)
+    singles = []
+    for i, review in enumerate(reviews):
+        content = get_field(review, 'content', '') or ''
+        if len(content) > max_length:
+            singles.append([i])
+            continue
+        index.add(i, content, get_field(review, 'rating', 5))
+    return sorted(index.clusters() + singles, key=lambda group: group[0])
@@ -1,8 +1,51 @@
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import asyncio
+import hashlib
+import json
+import logging
 import re
 
+from database.db import get_review_counts, sync_reviews, save_setting, get_setting
+from utils.metrics import inc, span, timed
+# ID/해시 함수는 DB 이전 작업에서도 쓰므로 utils.records 에 두고 여기서 다시 내보냄
+from utils.records import make_review_id, make_content_hash, make_reply_hash
+from .browser_manager import BrowserCrashedError, process_tree_rss_mb, is_browser_crash, close_page
+from .config import SMARTPLACE_URL
+from .selector_registry import get_selector_registry, layout_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 더보기 버튼
+_MORE_BUTTON = 'button[class*="more"], a[class*="more"], [class*="더보기"]'
+
+# 스트리밍 수집에서 리뷰 항목으로 보는 요소 (html_parser 의 _XP_CONTAINERS 와 같은 조건)
+_ITEM_SELECTOR = 'li[class*="review"], [class*="review-item"], article'
+
+# 아직 처리하지 않은 리뷰 요소의 HTML 을 꺼내고 DOM 에서 떼어 냄 (prune=false 면 처리 표시만)
+_HARVEST_JS = '''([selector, prune, collect]) => {
+    const items = Array.from(document.querySelectorAll(selector))
+        .filter(el => !el.dataset.rsDone && !(el.parentElement && el.parentElement.closest(selector)));
+    const html = collect ? items.map(el => el.outerHTML) : [];
+    for (const el of items) {
+        if (prune) el.remove(); else el.dataset.rsDone = '1';
+    }
+    const heap = performance.memory ? performance.memory.usedJSHeapSize : null;
+    return {html, count: items.length, heap};
+}'''
+
+# 처리하지 않은 리뷰 요소가 새로 생겼는지
+_HAS_NEW_ITEMS_JS = '''(selector) => Array.from(document.querySelectorAll(selector)).some(el => !el.dataset.rsDone)'''
+
+
+class MemoryLimitError(RuntimeError):
+    """페이지를 새로 열어도 브라우저 메모리가 상한 아래로 내려가지 않을 때"""
+
+
+class LoadMoreTimeoutError(RuntimeError):
+    """더보기 버튼이 남아 있는데 시간 안에 새 리뷰가 나오지 않을 때 (끝까지 읽은 것과 구분)"""
+
 @dataclass
 class Review:
     id: str
@@ -15,6 +58,16 @@ class Review:
     has_reply: bool
     reply_content: Optional[str]
     reply_date: Optional[str]
+    
+    @property
+    def content_hash(self) -> str:
+        """리뷰 본문/별점 해시 (수정 감지용)"""
+        return make_content_hash(self.rating, self.content)
+    
+    @property
+    def reply_hash(self) -> Optional[str]:
+        """사장님 답글 해시 (답글 등록/수정/삭제 감지용)"""
+        return make_reply_hash(self.reply_content)
 
 class ReviewScraper:
     def __init__(self, context):
@@ -23,7 +76,17 @@ class ReviewScraper:
             context: Playwright 브라우저 컨텍스트 (로그인된 상태)
         """
         self.context = context
+        self.selectors = get_selector_registry()
+        # get_reviews 방문 중에 읽은 업체별 사이트 통계 {business_id: {'total', 'average_rating'}}
+        self.page_stats: Dict[str, dict] = {}
+        # get_reviews 가 업체 리뷰를 빠짐없이 읽었는지 {business_id: bool}
+        # (더보기 버튼이 없어질 때까지 펼쳤고, 잘리거나 파싱에 실패한 리뷰가 없고, 사이트 합계와 개수가 같음)
+        self.list_complete: Dict[str, bool] = {}
+        # stream_reviews 진행 위치 {'review_id', 'clicks'} 와 끝까지 읽었는지 여부
+        self.stream_cursor: Dict = {'review_id': None, 'clicks': 0}
+        self.stream_exhausted = False
         
+    @timed("scrape")
     async def get_reviews(
         self, 
         business_id: str, 
@@ -36,262 +99,452 @@ class ReviewScraper:
         """
         page = None
         reviews = []
+        self.list_complete[business_id] = False
         
         try:
             page = await self.context.new_page()
+            # 더보기 XHR 응답에 들어 있는 합계를 통계로 쓰기 위해 기록
+            api_responses = []
+            page.on("response", lambda r: api_responses.append(r) if _is_review_api(r) else None)
             
             # 리뷰 페이지 URL
-            url = f"https://new.smartplace.naver.com/biz/{business_id}/review/visitor"
+            url = f"{SMARTPLACE_URL}/biz/{business_id}/review/visitor"
             
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            await page.wait_for_timeout(2000)
+            with span("navigation", target="review_list"):
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+                await page.wait_for_timeout(2000)
             
             # 더보기 버튼 클릭 (최대 3번)
-            for _ in range(3):
-                try:
-                    more_btn = await page.query_selector('button[class*="more"], a[class*="more"], [class*="더보기"]')
-                    if more_btn:
-                        await more_btn.click()
-                        await page.wait_for_timeout(1000)
-                    else:
+            reached_end = False
+            with span("load_more"):
+                for _ in range(3):
+                    try:
+                        more_btn = await page.query_selector(_MORE_BUTTON)
+                        if more_btn:
+                            await more_btn.click()
+                            await page.wait_for_timeout(1000)
+                        else:
+                            reached_end = True
+                            break
+                    except Exception:
                         break
-                except:
-                    break
             
-            # 리뷰 요소 찾기
-            review_selectors = [
-                'li[class*="review"]',
-                '[class*="review-item"]',
-                '[class*="ReviewItem"]',
-                'article[class*="review"]',
-                '[data-review-id]'
-            ]
+            # 같은 방문에서 통계 수집 (get_review_stats 가 다시 접속하지 않도록)
+            self.page_stats[business_id] = await self._read_page_stats(page, api_responses)
             
-            review_elements = []
-            for selector in review_selectors:
-                review_elements = await page.query_selector_all(selector)
-                if review_elements:
-                    break
+            # 리뷰 요소 찾기 (학습된 선택자 우선)
+            fingerprint = await layout_fingerprint(page)
+            review_elements = await self.selectors.query_all(page, 'review_item', fingerprint)
             
             # 리뷰가 없으면 다른 방법 시도
             if not review_elements:
                 # 전체 HTML에서 파싱
                 content = await page.content()
-                reviews = self._parse_reviews_from_html(content, limit)
+                from .html_parser import parse_reviews_html_async
+                with span("parse", mode="html") as s:
+                    reviews = await parse_reviews_html_async(content, limit, business_id)
+                    s.set(html_bytes=len(content), reviews=len(reviews))
+                truncated = len(reviews) >= limit
+                failed = 0
             else:
                 # 요소에서 파싱
-                for elem in review_elements[:limit]:
-                    try:
-                        review = await self._parse_review_element(elem)
-                        if review:
-                            # 필터 적용
-                            if filter_type == "no_reply" and review.has_reply:
+                truncated = len(review_elements) > limit
+                failed = 0
+                with span("parse", mode="element") as s:
+                    for elem in review_elements[:limit]:
+                        try:
+                            review = await self._parse_review_element(elem, fingerprint, business_id)
+                            if not review:
+                                # 본문이 없는 요소 (HTML 경로와 같이 리뷰로 보지 않음)
                                 continue
-                            if filter_type == "has_reply" and not review.has_reply:
-                                continue
-                            reviews.append(review)
-                    except Exception as e:
-                        print(f"리뷰 파싱 오류: {e}")
-                        continue
+                            else:
+                                # 필터 적용
+                                if filter_type == "no_reply" and review.has_reply:
+                                    continue
+                                if filter_type == "has_reply" and not review.has_reply:
+                                    continue
+                                reviews.append(review)
+                        except Exception as e:
+                            if is_browser_crash(e):
+                                raise
+                            logger.error(f"리뷰 파싱 오류: {e}")
+                            failed += 1
+                            continue
+                    s.set(elements=len(review_elements[:limit]), reviews=len(reviews))
+            
+            # 짧은 목록을 끝까지 읽은 것으로 착각하면 저장된 리뷰가 삭제로 표시되므로 확실할 때만 완전한 목록으로 봄
+            total = self.page_stats[business_id].get('total')
+            self.list_complete[business_id] = (
+                reached_end and filter_type == "all" and not truncated and not failed
+                and (total is None or total == len(reviews))
+            )
             
         except Exception as e:
-            print(f"리뷰 조회 오류: {e}")
+            if is_browser_crash(e):
+                raise BrowserCrashedError(f"리뷰 조회 중 브라우저 오류 ({business_id}): {e}") from e
+            logger.error(f"리뷰 조회 오류: {e}")
         finally:
-            if page:
-                await page.close()
+            await close_page(page)
+            self.selectors.save()
         
         return reviews
     
-    async def _parse_review_element(self, elem) -> Optional[Review]:
-        """리뷰 요소에서 데이터 추출"""
+    @timed("probe")
+    async def probe(self, business_id: str, top: int = 10) -> Optional[dict]:
+        """
+        새 리뷰 확인용 가벼운 조회 (첫 페이지만 읽음, 더보기/이미지/폰트/미디어 요청 없음)
+        
+        Args:
+            business_id: 업체 ID
+            top: 지문에 넣을 최신 리뷰 수
+        
+        Returns:
+            dict: {'total', 'reviews', 'fingerprint'} (조회 실패 시 None)
+        
+        Raises:
+            BrowserCrashedError: 브라우저/컨텍스트가 죽음
+        """
+        page = None
         try:
-            # ID
-            review_id = await elem.get_attribute("data-review-id")
-            if not review_id:
-                review_id = await elem.get_attribute("data-id")
-            if not review_id:
-                # 임의 ID 생성
-                import hashlib
-                content = await elem.inner_text()
-                review_id = hashlib.md5(content.encode()).hexdigest()[:12]
-            
-            # 작성자
-            author = "익명"
-            for sel in ['.author', '.nickname', '[class*="user"]', '[class*="name"]', 'strong']:
-                author_elem = await elem.query_selector(sel)
-                if author_elem:
-                    author = await author_elem.inner_text()
-                    break
-            
-            # 별점
-            rating = 5
-            for sel in ['.rating', '[class*="star"]', '[class*="score"]']:
-                rating_elem = await elem.query_selector(sel)
-                if rating_elem:
-                    rating_text = await rating_elem.inner_text()
-                    nums = re.findall(r'\d+', rating_text)
-                    if nums:
-                        rating = min(int(nums[0]), 5)
-                    break
-            
-            # 별 이미지 개수로 별점 추출
-            if rating == 5:
-                stars = await elem.query_selector_all('[class*="star"][class*="on"], [class*="fill"]')
-                if stars:
-                    rating = min(len(stars), 5)
-            
-            # 내용
-            content = ""
-            for sel in ['.content', '.review-text', '[class*="txt"]', '[class*="content"]', 'p']:
-                content_elem = await elem.query_selector(sel)
-                if content_elem:
-                    content = await content_elem.inner_text()
-                    if len(content) > 10:
-                        break
-            
-            # 날짜
-            date = ""
-            for sel in ['.date', 'time', '[class*="date"]', '[class*="time"]']:
-                date_elem = await elem.query_selector(sel)
-                if date_elem:
-                    date = await date_elem.inner_text()
-                    break
-            
-            # 방문 횟수
-            visit_count = ""
-            for sel in ['[class*="visit"]', '[class*="count"]']:
-                visit_elem = await elem.query_selector(sel)
-                if visit_elem:
-                    visit_count = await visit_elem.inner_text()
-                    break
-            
-            # 사진
-            photos = []
-            photo_elems = await elem.query_selector_all('img[src*="review"], img[src*="photo"]')
-            for photo in photo_elems[:3]:
-                src = await photo.get_attribute("src")
-                if src:
-                    photos.append(src)
-            
-            # 사장님 답글
-            has_reply = False
-            reply_content = None
-            reply_date = None
-            
-            for sel in ['.owner-reply', '[class*="reply"]', '[class*="answer"]', '[class*="response"]']:
-                reply_elem = await elem.query_selector(sel)
-                if reply_elem:
-                    reply_text = await reply_elem.inner_text()
-                    if reply_text and len(reply_text) > 5:
-                        has_reply = True
-                        reply_content = reply_text
-                        
-                        # 답글 날짜
-                        reply_date_elem = await reply_elem.query_selector('time, [class*="date"]')
-                        if reply_date_elem:
-                            reply_date = await reply_date_elem.inner_text()
-                        break
+            page = await self.context.new_page()
+            await page.route("**/*", _skip_heavy_resources)
+            api_responses = []
+            page.on("response", lambda r: api_responses.append(r) if _is_review_api(r) else None)
             
-            return Review(
-                id=review_id,
-                author=author.strip()[:20],
-                rating=rating,
-                content=content.strip()[:500],
-                date=date.strip(),
-                visit_count=visit_count.strip(),
-                photos=photos,
-                has_reply=has_reply,
-                reply_content=reply_content,
-                reply_date=reply_date
-            )
+            with span("navigation", target="review_probe"):
+                await page.goto(f"{SMARTPLACE_URL}/biz/{business_id}/review/visitor",
+                                wait_until="networkidle", timeout=20000)
+            stats = await self._read_page_stats(page, api_responses)
+            content = await page.content()
         except Exception as e:
-            print(f"리뷰 요소 파싱 오류: {e}")
+            if is_browser_crash(e):
+                raise BrowserCrashedError(f"리뷰 확인 중 브라우저 오류 ({business_id}): {e}") from e
+            logger.warning(f"리뷰 확인 실패 ({business_id}): {e}")
             return None
+        finally:
+            await close_page(page)
+        
+        from .html_parser import parse_reviews_html_async
+        reviews = await parse_reviews_html_async(content, top, business_id)
+        if stats:
+            self.page_stats[business_id] = stats
+        return {
+            'total': stats.get('total'),
+            'reviews': reviews,
+            'fingerprint': review_fingerprint(stats.get('total'), reviews),
+        }
+    
+    async def _open_stream_page(self, business_id: str):
+        page = await self.context.new_page()
+        await page.route("**/*", _skip_heavy_resources)
+        with span("navigation", target="review_stream"):
+            await page.goto(f"{SMARTPLACE_URL}/biz/{business_id}/review/visitor",
+                            wait_until="networkidle", timeout=30000)
+        return page
     
-    def _parse_reviews_from_html(self, html: str, limit: int) -> List[Review]:
-        """HTML에서 리뷰 파싱 (BeautifulSoup 사용)"""
-        from bs4 import BeautifulSoup
+    async def _load_more(self, page, timeout: float) -> bool:
+        """
+        더보기를 누르고 새 리뷰 요소가 생길 때까지 대기
         
-        reviews = []
-        soup = BeautifulSoup(html, 'lxml')
+        Returns:
+            bool: 새 리뷰가 생겼는지 (더보기 버튼이 없거나 누른 뒤 사라졌으면 False - 끝까지 읽음)
+        
+        Raises:
+            LoadMoreTimeoutError: 더보기 버튼이 남아 있는데 새 리뷰가 나오지 않음
+            BrowserCrashedError: 브라우저/컨텍스트가 죽음
+        """
+        # 끝까지 읽은 것으로 보면 커서가 지워지므로 시간 초과/브라우저 오류와 구분
+        try:
+            more_btn = await page.query_selector(_MORE_BUTTON)
+            if not more_btn:
+                return False
+            await more_btn.click()
+            await page.wait_for_function(_HAS_NEW_ITEMS_JS, arg=_ITEM_SELECTOR, timeout=timeout * 1000)
+            return True
+        except Exception as e:
+            if is_browser_crash(e):
+                raise BrowserCrashedError(f"더보기 중 브라우저 오류: {e}") from e
+            error = e
+        
+        try:
+            more_btn = await page.query_selector(_MORE_BUTTON)
+            if not more_btn or not await more_btn.is_visible():
+                logger.debug(f"더보기 종료: {error}")
+                return False
+        except Exception as e:
+            if is_browser_crash(e):
+                raise BrowserCrashedError(f"더보기 중 브라우저 오류: {e}") from e
+            raise
+        raise LoadMoreTimeoutError(f"더보기 후 {timeout:.0f}초 안에 새 리뷰가 나오지 않았습니다: {error}") from error
+    
+    async def stream_reviews(
+        self,
+        business_id: str,
+        batch_size: int = 100,
+        max_reviews: Optional[int] = None,
+        prune: bool = True,
+        recycle_every: int = 200,
+        heap_limit_mb: float = 256,
+        rss_limit_mb: Optional[float] = None,
+        resume: Optional[dict] = None,
+        load_timeout: float = 10.0
+    ) -> AsyncIterator[List[Review]]:
+        """
+        리뷰를 batch_size 개씩 내보내는 메모리 제한 수집 (async for 로 사용)
+        
+        - 더보기를 누를 때마다 새로 생긴 리뷰 요소만 파싱하고 DOM 에서 떼어 내므로 페이지가 커지지 않습니다.
+        - 더보기를 recycle_every 번 눌렀거나 JS 힙이 heap_limit_mb 를 넘으면 페이지를 닫고 새로 연 뒤,
+          마지막으로 내보낸 리뷰(커서) 위치까지 파싱 없이 더보기만 눌러 이어서 수집합니다.
+        - rss_limit_mb 를 주면 브라우저 포함 전체 RSS 도 확인하고, 새로 연 페이지에서도 넘으면 MemoryLimitError.
+        
+        Args:
+            business_id: 업체 ID
+            batch_size: 한 번에 내보낼 리뷰 수
+            max_reviews: 최대 리뷰 수 (None 이면 끝까지)
+            prune: 처리한 리뷰 요소를 DOM 에서 제거 (False 면 표시만 하고 재활용 주기로만 메모리 제한)
+            recycle_every: 페이지를 새로 열기 전까지 누를 최대 더보기 수
+            heap_limit_mb: 페이지 JS 힙 상한 (MB)
+            rss_limit_mb: 현재 프로세스 + 브라우저 RSS 상한 (MB, None 이면 확인 안 함)
+            resume: 이어서 수집할 커서 {'review_id', 'clicks'} (self.stream_cursor 를 저장해 둔 값)
+            load_timeout: 더보기 후 새 리뷰를 기다리는 시간 (초)
+        
+        Yields:
+            List[Review]: 최대 batch_size 개의 리뷰
+        
+        Raises:
+            MemoryLimitError: 새로 연 페이지에서도 RSS 가 상한을 넘음
+            BrowserCrashedError: 브라우저/컨텍스트가 죽음 (stream_cursor 부터 다시 이어 수집 가능)
+            LoadMoreTimeoutError: 더보기 후 새 리뷰가 나오지 않음 (stream_cursor 부터 다시 이어 수집 가능)
+        """
+        from .html_parser import parse_reviews_html_async
         
-        # 리뷰 컨테이너 찾기
-        review_containers = soup.select('li[class*="review"], [class*="review-item"], article')
+        # 마지막으로 내보낸 리뷰와 그 리뷰가 나타날 때까지 누른 더보기 수
+        self.stream_cursor = dict(resume or {'review_id': None, 'clicks': 0})
+        self.stream_exhausted = False
+        emitted = 0
+        batch: List[Review] = []
+        # 페이지를 새로 열면 커서 근처 리뷰가 다시 보이므로 최근 ID 만 기억해 중복 제거
+        recent = deque(maxlen=batch_size * 4)
         
-        for i, container in enumerate(review_containers[:limit]):
+        while True:
+            page = await self._open_stream_page(business_id)
             try:
-                # ID
-                review_id = container.get('data-review-id') or container.get('data-id') or f"review_{i}"
-                
-                # 작성자
-                author_elem = container.select_one('[class*="name"], [class*="author"], strong')
-                author = author_elem.get_text(strip=True) if author_elem else "익명"
-                
-                # 별점
-                rating = 5
-                star_elems = container.select('[class*="star"][class*="on"], [class*="fill"]')
-                if star_elems:
-                    rating = min(len(star_elems), 5)
-                
-                # 내용
-                content_elem = container.select_one('[class*="content"], [class*="txt"], p')
-                content = content_elem.get_text(strip=True) if content_elem else ""
-                
-                # 날짜
-                date_elem = container.select_one('time, [class*="date"]')
-                date = date_elem.get_text(strip=True) if date_elem else ""
+                # 커서 직전 위치까지는 파싱 없이 더보기 + 제거만
+                clicks = 0
+                target = max(0, self.stream_cursor['clicks'] - 1)
+                with span("stream_fast_forward", clicks=target):
+                    while clicks < target:
+                        await page.evaluate(_HARVEST_JS, [_ITEM_SELECTOR, prune, False])
+                        if not await self._load_more(page, load_timeout):
+                            break
+                        clicks += 1
+                skipping = self.stream_cursor['review_id'] is not None
+                opened_at = dict(self.stream_cursor)
+                rounds = 0
                 
-                # 답글 확인
-                reply_elem = container.select_one('[class*="reply"], [class*="answer"]')
-                has_reply = reply_elem is not None
-                reply_content = reply_elem.get_text(strip=True) if reply_elem else None
-                
-                if content:
-                    reviews.append(Review(
-                        id=review_id,
-                        author=author[:20],
-                        rating=rating,
-                        content=content[:500],
-                        date=date,
-                        visit_count="",
-                        photos=[],
-                        has_reply=has_reply,
-                        reply_content=reply_content,
-                        reply_date=None
-                    ))
-            except:
+                while True:
+                    harvest = await page.evaluate(_HARVEST_JS, [_ITEM_SELECTOR, prune, True])
+                    parsed = await parse_reviews_html_async(
+                        f"<html><body>{''.join(harvest['html'])}</body></html>", harvest['count'], business_id
+                    ) if harvest['count'] else []
+                    for review in parsed:
+                        if skipping:
+                            if review.id == self.stream_cursor['review_id']:
+                                skipping = False
+                            continue
+                        if review.id in recent:
+                            continue
+                        recent.append(review.id)
+                        batch.append(review)
+                        if len(batch) >= batch_size or (max_reviews and emitted + len(batch) >= max_reviews):
+                            batch = batch[:max_reviews - emitted] if max_reviews else batch
+                            emitted += len(batch)
+                            self.stream_cursor = {'review_id': batch[-1].id, 'clicks': clicks}
+                            inc("stream_reviews", len(batch))
+                            yield batch
+                            batch = []
+                            if max_reviews and emitted >= max_reviews:
+                                return
+                    
+                    heap_mb = (harvest['heap'] or 0) / (1024 * 1024)
+                    rss_mb = process_tree_rss_mb() if rss_limit_mb else None
+                    over_rss = rss_mb is not None and rss_mb > rss_limit_mb
+                    if (over_rss or heap_mb > heap_limit_mb) and rounds == 0:
+                        used = f"RSS {rss_mb:.0f}MB" if over_rss else f"JS 힙 {heap_mb:.0f}MB"
+                        raise MemoryLimitError(f"페이지를 새로 열어도 {used} 가 상한을 넘습니다.")
+                    more = not (over_rss or heap_mb > heap_limit_mb or rounds >= recycle_every)
+                    if more and not await self._load_more(page, load_timeout):
+                        if skipping:
+                            logger.warning(f"이어서 수집할 리뷰({self.stream_cursor['review_id']})를 찾지 못했습니다.")
+                        self.stream_exhausted = True
+                        more = False
+                    
+                    if not more:
+                        # 모아 둔 리뷰를 내보내 커서를 옮긴 뒤 끝내거나 페이지를 새로 엶
+                        if batch:
+                            emitted += len(batch)
+                            self.stream_cursor = {'review_id': batch[-1].id, 'clicks': clicks}
+                            inc("stream_reviews", len(batch))
+                            yield batch
+                            batch = []
+                        if self.stream_exhausted:
+                            return
+                        if self.stream_cursor == opened_at:
+                            # 새로 연 페이지에서 커서를 한 칸도 못 옮김 (상한이 현재 위치보다 낮음)
+                            raise MemoryLimitError(
+                                f"메모리 상한 안에서 더 수집할 수 없습니다 ({emitted}개 수집, 더보기 {clicks}번)"
+                            )
+                        break
+                    clicks += 1
+                    rounds += 1
+            finally:
+                await close_page(page)
+            inc("stream_page_recycles")
+            logger.info(f"리뷰 페이지 새로 열기 ({business_id}, {emitted}개 수집, 더보기 {clicks}번)")
+    
+    @timed("scrape", mode="stream")
+    async def scrape_to_db(self, business_id: str, resume: bool = True, **options) -> dict:
+        """
+        업체 리뷰 전체를 메모리 제한 모드로 읽어 배치마다 DB 에 동기화
+        
+        커서는 배치마다 settings 에 저장하므로 중간에 끊기면 resume=True 로 다시 호출해 이어서 수집합니다.
+        
+        Args:
+            business_id: 업체 ID
+            resume: 저장된 커서에서 이어서 수집
+            **options: stream_reviews 옵션 (batch_size, max_reviews, heap_limit_mb, rss_limit_mb ...)
+        
+        Returns:
+            dict: {'reviews', 'new', 'edited', 'reply_changed', 'batches'}
+        """
+        key = f"scrape_cursor:{business_id}"
+        saved = get_setting(key) if resume else None
+        totals = {'reviews': 0, 'new': 0, 'edited': 0, 'reply_changed': 0, 'batches': 0}
+        async for batch in self.stream_reviews(business_id, resume=json.loads(saved) if saved else None, **options):
+            changes = sync_reviews(business_id, batch)
+            totals['reviews'] += len(batch)
+            totals['batches'] += 1
+            for name in ('new', 'edited', 'reply_changed'):
+                totals[name] += len(changes[name])
+            save_setting(key, json.dumps(self.stream_cursor))
+        if self.stream_exhausted:
+            # 끝까지 읽었으면 다음에는 처음부터
+            save_setting(key, '')
+        return totals
+    
+    async def _parse_review_element(self, elem, fingerprint: str = '', business_id: str = '') -> Optional[Review]:
+        """
+        리뷰 요소에서 데이터 추출
+        
+        ID/해시에 들어가는 필드는 HTML 경로(parse_reviews_html)와 같은 파서로 읽습니다.
+        두 경로가 같은 reviews 테이블에 동기화하므로, 읽는 방식이 다르면 같은 리뷰가 중복 저장되거나
+        새 리뷰/수정/삭제로 번갈아 잡힙니다. 학습된 선택자는 해시에 들어가지 않는 방문 횟수에만 씁니다.
+        
+        Returns:
+            Review: 본문이 없는 요소(리뷰가 아님)면 None
+        """
+        from .html_parser import parse_review_html
+        
+        review = parse_review_html(await elem.evaluate("e => e.outerHTML"), business_id)
+        if review is None:
+            return None
+        
+        visit_elem = await self.selectors.query(elem, 'visit_count', fingerprint)
+        if visit_elem:
+            review.visit_count = (await visit_elem.inner_text()).strip()
+        return review
+    
+    def _parse_reviews_from_html(self, html: str, limit: int, business_id: str = '') -> List[Review]:
+        """HTML에서 리뷰 파싱 (lxml + 컴파일된 XPath, 동기 버전)"""
+        from .html_parser import parse_reviews_html
+        return parse_reviews_html(html, limit, business_id)
+    
+    async def _read_page_stats(self, page, api_responses: list) -> dict:
+        """
+        열려 있는 리뷰 페이지에서 사이트 통계 읽기 (API 응답 우선, 없으면 요약 영역 텍스트)
+        
+        Returns:
+            dict: 찾은 값만 담은 {'total', 'average_rating'}
+        """
+        stats = {}
+        for response in reversed(api_responses):
+            try:
+                data = await response.json()
+            except Exception:
                 continue
+            if isinstance(data, dict):
+                total = _first_number(data, _TOTAL_KEYS)
+                average = _first_number(data, _AVERAGE_KEYS)
+                if total is not None:
+                    stats['total'] = int(total)
+                if average is not None:
+                    stats['average_rating'] = round(float(average), 2)
+                if stats:
+                    break
         
-        return reviews
+        if 'total' not in stats:
+            try:
+                total_elem = await page.query_selector('[class*="total"], [class*="count"]')
+                if total_elem:
+                    nums = re.findall(r'\d+', (await total_elem.inner_text()).replace(',', ''))
+                    if nums:
+                        stats['total'] = int(nums[0])
+            except Exception as e:
+                logger.debug(f"리뷰 합계 읽기 실패: {e}")
+        return stats
     
     async def get_review_stats(self, business_id: str) -> dict:
-        """리뷰 통계 가져오기"""
-        page = None
-        stats = {
-            'total': 0,
-            'average_rating': 0.0,
-            'no_reply_count': 0
-        }
+        """
+        리뷰 통계 (페이지를 다시 열지 않음)
         
-        try:
-            page = await self.context.new_page()
-            url = f"https://new.smartplace.naver.com/biz/{business_id}/review"
-            
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            await page.wait_for_timeout(1000)
-            
-            # 총 리뷰 수
-            total_elem = await page.query_selector('[class*="total"], [class*="count"]')
-            if total_elem:
-                total_text = await total_elem.inner_text()
-                nums = re.findall(r'\d+', total_text)
-                if nums:
-                    stats['total'] = int(nums[0])
-            
-        except Exception as e:
-            print(f"통계 조회 오류: {e}")
-        finally:
-            if page:
-                await page.close()
+        평균 별점/미답글 수는 저장된 리뷰 집계(sync_reviews 로 갱신)에서, 전체 리뷰 수는
+        마지막 get_reviews 방문에서 읽은 사이트 합계와 저장된 리뷰 수 중 큰 값을 씁니다.
         
-        return stats
+        Returns:
+            dict: {'total', 'average_rating', 'no_reply_count', 'stored'}
+        """
+        counts = get_review_counts(business_id)
+        site = self.page_stats.get(business_id, {})
+        return {
+            'total': max(site.get('total', 0), counts['total']),
+            'average_rating': counts['average_rating'] or site.get('average_rating', 0.0),
+            'no_reply_count': counts['no_reply_count'],
+            'stored': counts['total'],
+        }
+
+
+def review_fingerprint(total: Optional[int], reviews: List[Review]) -> str:
+    """리뷰 합계 + 최신 리뷰 ID/답글 해시로 만든 지문 (새 리뷰/답글이 생기면 바뀜)"""
+    parts = [str(total)] + [f"{r.id}:{r.reply_hash or ''}" for r in reviews]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()[:16]
+
+
+# 리뷰 확인에 필요 없는 요청 (HAR 재생 중이면 나머지 요청은 컨텍스트 라우트로 넘어감)
+_HEAVY_RESOURCES = {'image', 'media', 'font', 'stylesheet'}
+
+
+async def _skip_heavy_resources(route):
+    if route.request.resource_type in _HEAVY_RESOURCES:
+        await route.abort()
+    else:
+        await route.fallback()
+
+
+def _is_review_api(response) -> bool:
+    """리뷰 목록 XHR(JSON) 응답 여부"""
+    return ('review' in response.url and response.request.resource_type in ('xhr', 'fetch')
+            and 'json' in (response.headers.get('content-type') or ''))
+
+
+_TOTAL_KEYS = ('total', 'totalCount', 'total_count', 'reviewCount', 'review_count')
+_AVERAGE_KEYS = ('averageRating', 'average_rating', 'avgRating', 'ratingAvg', 'starAvg')
+
+
+def _first_number(data: dict, keys: tuple) -> Optional[float]:
+    """dict (한 단계 아래 dict 포함) 에서 keys 중 처음 찾은 숫자 값"""
+    for source in [data] + [v for v in data.values() if isinstance(v, dict)]:
+        for key in keys:
+            value = source.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value
+    return None
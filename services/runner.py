@@ -0,0 +1,550 @@
+"""
+Streamlit 없이 실행하는 일괄 처리기 (스크래핑 → 답글 생성 → 등록)
+
+    python -m services.runner --cookies "NID_AUT=...; NID_SES=..." --provider openai --dry-run
+
+cron 등 자동화용이며 Streamlit 을 import 하지 않습니다.
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+# `python services/runner.py` 로 실행해도 database/utils 를 찾을 수 있도록 프로젝트 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db import init_db, save_reply_history, sync_reviews, set_reply_draft_status
+from utils.metrics import configure_json_logging, write_prometheus
+from services.naver_auth import NaverAuth
+from services.review_scraper import ReviewScraper
+from services.ai_generator import AIReplyGenerator, AIProvider, ReplyTone, RoutingRules
+from services.reply_poster import ReplyPoster
+from services.scheduler import PriorityScheduler
+from services.drafts import agenerate_with_drafts
+from services.supervisor import BrowserSupervisor
+
+# `python -m services.runner` 로 실행하면 __name__ 이 __main__ 이므로 이름을 고정 (JSON 로그 설정 대상에 포함)
+logger = logging.getLogger("services.runner")
+
+_API_KEY_ENV = {
+    AIProvider.OPENAI: "OPENAI_API_KEY",
+    AIProvider.GEMINI: "GEMINI_API_KEY",
+}
+
+
+def build_routing(args) -> RoutingRules:
+    """템플릿/LLM 분기 기준"""
+    defaults = RoutingRules()
+    return RoutingRules(
+        enabled=not getattr(args, 'no_templates', False),
+        min_rating=getattr(args, 'template_min_rating', defaults.min_rating),
+        max_review_length=getattr(args, 'template_max_review_length', defaults.max_review_length)
+    )
+
+
+def build_generator(args) -> AIReplyGenerator:
+    """답글 생성기 (워커 프로세스에서는 문자열 설정값으로도 호출)"""
+    fallback_keys = {AIProvider(p): key for p, key in (getattr(args, 'fallback_keys', None) or {}).items()}
+    return AIReplyGenerator(
+        AIProvider(getattr(args.provider, 'value', args.provider)),
+        args.api_key,
+        routing=build_routing(args),
+        fallback_keys=fallback_keys,
+        hedge=not getattr(args, 'no_hedge', False)
+    )
+
+
+class RateLimiter:
+    """등록 요청 사이 최소 간격 보장 (여러 업체를 동시에 처리해도 계정 단위로 적용)"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._last = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            delay = self._last + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last = time.monotonic()
+
+
+class SharedRateLimiter:
+    """
+    프로세스 간 공유 등록 간격 (RateLimiter 와 같은 인터페이스)
+    
+    워커 프로세스마다 RateLimiter 를 두면 계정 기준 간격이 워커 수만큼 짧아지므로
+    DB 의 계정별 다음 등록 시각(post_slots)을 예약한 뒤 그 시각까지 기다립니다.
+    """
+
+    def __init__(self, account_key: str, interval: float):
+        self.account_key = account_key
+        self.interval = interval
+
+    async def wait(self):
+        from database.db import reserve_post_slot
+
+        delay = await asyncio.to_thread(reserve_post_slot, self.account_key, self.interval)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _new_summary(business: dict) -> dict:
+    return {
+        'business_id': business['id'],
+        'business_name': business['name'],
+        'reviews': 0,
+        'new_reviews': 0,
+        'generated': 0,
+        'posted': 0,
+        'failed': 0,
+        'items': [],
+    }
+
+
+def build_scheduler(args, budget: Optional[int] = None, max_per_store: Optional[int] = None) -> PriorityScheduler:
+    """우선순위 스케줄러 (--store-sla 로 업체별 SLA 배율 지정)"""
+    return PriorityScheduler(
+        store_sla_scale=dict(getattr(args, 'store_sla', None) or {}),
+        budget=budget,
+        max_per_store=max_per_store
+    )
+
+
+async def supervised(supervisor: Optional[BrowserSupervisor], operation: str, fn, **options):
+    """supervisor 가 있으면 시간 제한 + 브라우저 장애 복구/재시도를 거쳐 fn() 실행"""
+    if supervisor is None:
+        return await fn()
+    return await supervisor.call(fn, operation, **options)
+
+
+async def scrape_business(
+    business: dict,
+    auth: NaverAuth,
+    args,
+    summary: dict,
+    supervisor: Optional[BrowserSupervisor] = None
+) -> list:
+    """미답글 리뷰 조회 후 DB 동기화 (답글 없는 리뷰 목록 반환)"""
+    full_scan = 0
+    if getattr(args, 'full_scan', False):
+        # 전체 리뷰를 메모리 제한 모드로 먼저 DB 에 동기화 (끊기면 저장된 커서부터 이어서)
+        totals = await supervised(
+            supervisor, "full_scan",
+            lambda: ReviewScraper(auth.context).scrape_to_db(
+                business['id'],
+                heap_limit_mb=args.heap_limit_mb,
+                rss_limit_mb=args.rss_limit_mb
+            ),
+            timeout=0
+        )
+        full_scan = totals['new']
+        summary['scanned_reviews'] = totals['reviews']
+    reviews = await supervised(
+        supervisor, "scrape",
+        lambda: ReviewScraper(auth.context).get_reviews(business['id'], filter_type="no_reply", limit=args.limit)
+    )
+    changes = sync_reviews(business['id'], reviews)
+    summary['new_reviews'] = full_scan + len(changes['new'])
+    return [r for r in reviews if not r.has_reply]
+
+
+async def post_one(
+    business: dict,
+    review,
+    result: dict,
+    auth: NaverAuth,
+    limiter: RateLimiter,
+    args,
+    summary: dict,
+    supervisor: Optional[BrowserSupervisor] = None
+):
+    """생성 결과 하나를 등록하고 summary 에 기록"""
+    item = {'review_id': review.id, 'rating': review.rating}
+    reply = result['reply']
+    if not reply:
+        item.update(status='generate_failed', message=result['error'])
+        summary['failed'] += 1
+        summary['items'].append(item)
+        return
+
+    summary['generated'] += 1
+    item['reply'] = reply
+    if result.get('resumed'):
+        item['resumed'] = True
+
+    if args.dry_run:
+        item['status'] = 'dry_run'
+        summary['items'].append(item)
+        return
+
+    await limiter.wait()
+    # 등록 버튼을 누른 뒤 멈췄으면 중복 등록이 될 수 있으므로 시간 초과는 다시 시도하지 않음
+    result = await supervised(
+        supervisor, "post_reply",
+        lambda: ReplyPoster(auth.context).post_reply(business['id'], review.id, reply),
+        retry_on_timeout=False
+    )
+    item['message'] = result['message']
+    if result['success']:
+        item['status'] = 'posted'
+        summary['posted'] += 1
+        save_reply_history(
+            business_id=business['id'],
+            business_name=business['name'],
+            review_id=review.id,
+            review_author=review.author,
+            review_content=review.content,
+            review_rating=review.rating,
+            reply_content=reply,
+            ai_generated=True
+        )
+        set_reply_draft_status(business['id'], review.id, 'posted')
+    else:
+        item['status'] = 'post_failed'
+        summary['failed'] += 1
+    summary['items'].append(item)
+
+
+async def process_business(
+    business: dict,
+    auth: NaverAuth,
+    generator: AIReplyGenerator,
+    limiter: RateLimiter,
+    args,
+    supervisor: Optional[BrowserSupervisor] = None
+) -> dict:
+    """
+    업체 하나 처리: 미답글 리뷰 조회 → 우선순위 순으로 답글 생성 → 등록 (워커 프로세스용)
+
+    Returns:
+        dict: {business_id, business_name, reviews, new_reviews, generated, posted, failed, items, elapsed_s}
+    """
+    started = time.perf_counter()
+    summary = _new_summary(business)
+
+    reviews = await scrape_business(business, auth, args, summary, supervisor)
+    # 낮은 별점/오래된 리뷰가 --max-replies 에 잘리지 않도록 우선순위 순으로 정렬
+    scheduler = build_scheduler(args, max_per_store=args.max_replies)
+    for review in reviews:
+        scheduler.push_review(review, business['id'])
+    reviews = [item.payload for item in scheduler.pop_many(len(scheduler))]
+    summary['reviews'] = len(reviews)
+
+    # 비슷한 짧은 리뷰는 묶어서 한 번의 호출로 생성 (저장된 초안은 재사용, 새 답글은 바로 초안으로 저장)
+    generated = await agenerate_with_drafts(
+        generator,
+        business['id'],
+        reviews,
+        store_name=business['name'],
+        tone=args.tone,
+        include_emoji=not args.no_emoji,
+        max_length=args.max_length
+    )
+
+    for review, result in zip(reviews, generated):
+        await post_one(business, review, result, auth, limiter, args, summary, supervisor)
+
+    summary['elapsed_s'] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+async def run_scheduled(
+    businesses: list,
+    auth: NaverAuth,
+    generator: AIReplyGenerator,
+    limiter: RateLimiter,
+    args,
+    supervisor: Optional[BrowserSupervisor] = None
+) -> list:
+    """
+    모든 업체의 미답글 리뷰를 한 스케줄러에 모아 우선순위 순으로 생성/등록
+
+    - 리뷰는 낮은 별점/SLA 임박 순, 업체끼리는 번갈아 가며 꺼냅니다 (--budget 개까지, 업체당 --max-replies 개까지).
+    - 생성은 batch 단위, 등록은 생성된 것 중 가장 급한 것부터라서 나중에 생성된 긴급 답글이
+      먼저 생성된 일반 답글보다 먼저 등록됩니다.
+
+    Returns:
+        list: 업체별 summary (process_business 와 같은 형식)
+    """
+    started = time.perf_counter()
+    by_id = {b['id']: b for b in businesses}
+    summaries = {b['id']: _new_summary(b) for b in businesses}
+    pending = build_scheduler(args, budget=args.budget, max_per_store=args.max_replies)
+    ready = build_scheduler(args)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def scrape(business):
+        async with semaphore:
+            try:
+                for review in await scrape_business(business, auth, args, summaries[business['id']], supervisor):
+                    pending.push_review(review, business['id'])
+            except Exception as e:
+                logger.error(f"업체 처리 오류 ({business['id']}): {e}")
+                summaries[business['id']]['error'] = str(e)
+
+    await asyncio.gather(*(scrape(b) for b in businesses))
+
+    async def generate(business_id, items):
+        business = by_id[business_id]
+        try:
+            results = await agenerate_with_drafts(
+                generator,
+                business_id,
+                [item.payload for item in items],
+                store_name=business['name'],
+                tone=args.tone,
+                include_emoji=not args.no_emoji,
+                max_length=args.max_length
+            )
+        except Exception as e:
+            results = [{'reply': None, 'error': str(e)}] * len(items)
+        for item, result in zip(items, results):
+            ready.requeue(item, (item.payload, result))
+
+    async def produce():
+        try:
+            batch_size = max(1, args.concurrency * 4)
+            while True:
+                batch = pending.pop_many(batch_size)
+                if not batch:
+                    break
+                for item in batch:
+                    summaries[item.business_id]['reviews'] += 1
+                groups = {}
+                for item in batch:
+                    groups.setdefault(item.business_id, []).append(item)
+                # 비슷한 짧은 리뷰는 업체별로 묶어서 한 번의 호출로 생성
+                await asyncio.gather(*(generate(bid, items) for bid, items in groups.items()))
+        finally:
+            ready.close()
+
+    async def consume():
+        while (item := await ready.get()) is not None:
+            review, result = item.payload
+            summary = summaries[item.business_id]
+            try:
+                await post_one(by_id[item.business_id], review, result, auth, limiter, args, summary, supervisor)
+            except Exception as e:
+                logger.error(f"답글 등록 오류 ({item.business_id}/{review.id}): {e}")
+                summary['failed'] += 1
+                summary['items'].append({'review_id': review.id, 'rating': review.rating,
+                                         'status': 'post_failed', 'message': str(e)})
+            summary['elapsed_s'] = round(time.perf_counter() - started, 3)
+
+    await asyncio.gather(produce(), consume())
+    for summary in summaries.values():
+        summary.setdefault('elapsed_s', round(time.perf_counter() - started, 3))
+    return list(summaries.values())
+
+
+async def run(args) -> dict:
+    """전체 파이프라인 실행 후 JSON 요약 반환"""
+    started = time.perf_counter()
+    init_db()
+
+    auth = NaverAuth()
+    supervisor = None
+    try:
+        if not await auth.init_browser() or not await auth.login_with_cookies(args.cookies):
+            return {'success': False, 'message': '로그인 실패. 쿠키를 확인해주세요.', 'businesses': []}
+
+        businesses = await auth.get_business_list(use_cache=not args.refresh_businesses)
+        if args.business_id:
+            known = {b['id']: b for b in businesses}
+            businesses = [known.get(bid, {'id': bid, 'name': f'업체 {bid}', 'category': ''})
+                          for bid in args.business_id]
+
+        if args.workers > 1:
+            account_key = auth.account_key
+            await auth.close()
+            results = await asyncio.to_thread(run_in_workers, args, account_key, businesses)
+            return _summarize(args, started, results)
+
+        generator = build_generator(args)
+        limiter = RateLimiter(args.delay)
+        # 오래 걸리는 실행 중 브라우저가 죽거나 멈추면 세션을 복구하고 진행 중인 작업을 다시 실행
+        supervisor = BrowserSupervisor(auth, check_interval=args.health_interval)
+        supervisor.start()
+        results = await run_scheduled(businesses, auth, generator, limiter, args, supervisor)
+    finally:
+        if supervisor:
+            supervisor.stop()
+        await auth.close()
+
+    summary = _summarize(args, started, results)
+    summary['routes'] = {**generator.route_counts, 'template_hit_rate': round(generator.template_hit_rate(), 3)}
+    return summary
+
+
+def run_in_workers(args, account_key: str, businesses: list) -> list:
+    """
+    업체별 파이프라인 작업을 워커 프로세스 풀로 나눠 실행
+
+    업체 단위로 나눠도 등록 간격(--delay)은 DB 예약(SharedRateLimiter)으로 계정 전체 기준으로 지켜집니다.
+    """
+    from services.worker_pool import WorkerPool, KIND_PIPELINE
+
+    pool = WorkerPool(
+        num_workers=args.workers,
+        accounts={account_key: args.cookies},
+        settings={
+            'provider': args.provider.value,
+            'api_key': args.api_key,
+            'fallback_keys': args.fallback_keys,
+            'no_hedge': args.no_hedge,
+            'tone': args.tone.value,
+            'no_emoji': args.no_emoji,
+            'max_length': args.max_length,
+            'limit': args.limit,
+            'max_replies': args.max_replies,
+            'store_sla': args.store_sla,
+            'full_scan': args.full_scan,
+            'heap_limit_mb': args.heap_limit_mb,
+            'rss_limit_mb': args.rss_limit_mb,
+            'delay': args.delay,
+            'health_interval': args.health_interval,
+            'dry_run': args.dry_run,
+            'no_templates': args.no_templates,
+            'template_min_rating': args.template_min_rating,
+            'template_max_review_length': args.template_max_review_length,
+        },
+        shard_by='business'
+    )
+    batch_id = pool.submit([
+        {'kind': KIND_PIPELINE, 'account_key': account_key, 'business_id': b['id'],
+         'payload': {'business_name': b['name']}}
+        for b in businesses
+    ])
+    summary = pool.run(batch_id)
+
+    results = []
+    for row in summary['results']:
+        if row['status'] == 'done' and row['result']:
+            results.append(row['result'])
+        else:
+            results.append({'business_id': row['business_id'],
+                            'business_name': row['payload'].get('business_name', ''),
+                            'error': row['error'] or row['status']})
+    return results
+
+
+def _summarize(args, started: float, results: list) -> dict:
+    totals = {
+        key: sum(r.get(key, 0) for r in results)
+        for key in ('reviews', 'generated', 'posted', 'failed')
+    }
+    # 스크래핑 실패나 워커 작업 실패처럼 업체 전체가 실패한 경우 (failed 카운트 없이 error 만 있음)
+    totals['errors'] = sum(1 for r in results if r.get('error'))
+    return {
+        'success': True,
+        'dry_run': args.dry_run,
+        'elapsed_s': round(time.perf_counter() - started, 3),
+        'totals': totals,
+        'businesses': results,
+    }
+
+
+def _store_sla(value: str) -> tuple:
+    business_id, sep, scale = value.partition('=')
+    try:
+        if not sep or float(scale) <= 0:
+            raise ValueError
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"업체ID=배율 형식이어야 합니다: {value}")
+    return business_id, float(scale)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m services.runner",
+        description="스크래핑 → AI 답글 생성 → 등록 일괄 처리 (Streamlit 불필요)"
+    )
+    parser.add_argument('--cookies', default=os.getenv("NAVER_COOKIES"),
+                        help="네이버 쿠키 (기본값: NAVER_COOKIES 환경변수)")
+    parser.add_argument('--business-id', action='append',
+                        help="처리할 업체 ID (여러 번 지정 가능, 기본값: 계정의 모든 업체)")
+    parser.add_argument('--refresh-businesses', action='store_true', help="업체 목록 캐시 무시")
+    parser.add_argument('--provider', choices=[p.value for p in AIProvider], default="openai")
+    parser.add_argument('--api-key', help="AI API 키 (기본값: OPENAI_API_KEY / GEMINI_API_KEY)")
+    parser.add_argument('--no-failover', action='store_true',
+                        help="다른 제공자 키(OPENAI_API_KEY/GEMINI_API_KEY)가 있어도 장애 전환하지 않음")
+    parser.add_argument('--no-hedge', action='store_true', help="응답이 늦을 때 예비 요청을 보내지 않음")
+    parser.add_argument('--tone', choices=[t.value for t in ReplyTone], default="friendly")
+    parser.add_argument('--max-length', type=int, default=150, help="답글 최대 글자 수")
+    parser.add_argument('--no-emoji', action='store_true', help="이모지 사용 안 함")
+    parser.add_argument('--no-templates', action='store_true', help="템플릿 답글 없이 모두 AI로 생성")
+    parser.add_argument('--template-min-rating', type=int, default=4, help="템플릿 답글을 쓸 최소 별점")
+    parser.add_argument('--template-max-review-length', type=int, default=40,
+                        help="템플릿 답글을 쓸 최대 리뷰 길이")
+    parser.add_argument('--concurrency', type=int, default=2, help="동시에 처리할 업체 수")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="업체를 나눠 처리할 워커 프로세스 수 (1이면 현재 프로세스에서 처리)")
+    parser.add_argument('--limit', type=int, default=30, help="업체당 조회할 리뷰 수")
+    parser.add_argument('--full-scan', action='store_true',
+                        help="답글 처리 전에 업체 리뷰 전체를 메모리 제한 모드로 DB 에 동기화")
+    parser.add_argument('--heap-limit-mb', type=float, default=256, help="전체 수집 시 페이지 JS 힙 상한 (MB)")
+    parser.add_argument('--rss-limit-mb', type=float, help="전체 수집 시 브라우저 프로세스 RSS 상한 (MB)")
+    parser.add_argument('--max-replies', type=int, default=10, help="업체당 최대 답글 수")
+    parser.add_argument('--budget', type=int, help="이번 실행에서 처리할 전체 답글 수 (우선순위 높은 리뷰부터, --workers 와 함께 쓸 수 없음)")
+    parser.add_argument('--store-sla', action='append', type=_store_sla, default=[], metavar="업체ID=배율",
+                        help="업체별 답글 목표 시간 배율 (0.5 면 두 배 빨리, 여러 번 지정 가능)")
+    parser.add_argument('--delay', type=float, default=5.0, help="답글 등록 간 최소 간격 (초)")
+    parser.add_argument('--health-interval', type=float, default=60.0,
+                        help="브라우저 상태 확인 주기 (초) - 죽었거나 멈추면 세션을 복구")
+    parser.add_argument('--dry-run', action='store_true', help="답글을 생성만 하고 등록하지 않음")
+    parser.add_argument('--output', help="JSON 요약을 저장할 파일 경로")
+    parser.add_argument('--metrics-file', default=os.getenv("METRICS_FILE"),
+                        help="Prometheus 메트릭 파일 경로")
+    parser.add_argument('--log-json', action='store_true', help="로그를 JSON 한 줄 형식으로 출력")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not args.cookies:
+        parser.error("--cookies 또는 NAVER_COOKIES 환경변수가 필요합니다.")
+    if args.budget is not None and args.workers > 1:
+        # 워커는 업체 단위로 나눠 각자 처리하므로 전체 우선순위 순서로 답글 수를 제한할 수 없음
+        parser.error("--budget 은 --workers 와 함께 쓸 수 없습니다 (업체당 상한은 --max-replies 사용).")
+    args.provider = AIProvider(args.provider)
+    args.tone = ReplyTone(args.tone)
+    args.api_key = args.api_key or os.getenv(_API_KEY_ENV[args.provider])
+    if not args.api_key:
+        parser.error(f"--api-key 또는 {_API_KEY_ENV[args.provider]} 환경변수가 필요합니다.")
+    args.fallback_keys = {} if args.no_failover else {
+        provider.value: os.getenv(env)
+        for provider, env in _API_KEY_ENV.items()
+        if provider != args.provider and os.getenv(env)
+    }
+
+    if args.log_json:
+        configure_json_logging()
+    else:
+        logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                            format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    summary = asyncio.run(run(args))
+
+    output = json.dumps(summary, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    if args.metrics_file:
+        write_prometheus(args.metrics_file)
+
+    if not summary['success']:
+        return 2
+    return 1 if summary['totals']['failed'] or summary['totals']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+답글 생성/등록 우선순위 스케줄러
+
+- 리뷰마다 처리 기한(리뷰 작성 시각 + 별점별 SLA × 업체별 배율)을 정하고 기한이 이른 순으로 처리합니다.
+- 낮은 별점(기본 2점 이하)이나 기한을 넘긴 리뷰는 '긴급'으로, 다른 리뷰보다 먼저 꺼냅니다.
+- 같은 등급 안에서는 지금까지 처리한 수/가중치가 가장 적은 업체부터 꺼내 업체별로 공평하게 나눕니다.
+- 처리 중에 들어온 긴급 리뷰는 다음 pop() 에서 대기 중인 일반 리뷰보다 먼저 나옵니다 (선점).
+  이미 시작한 작업(등록 등)은 중간에 끊지 않습니다.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import asyncio
+import heapq
+import itertools
+import re
+
+# 별점별 답글 목표 시간 (시간)
+DEFAULT_SLA_HOURS = {1: 4, 2: 4, 3: 24, 4: 72, 5: 72}
+
+# 이 별점 이하는 기한과 관계없이 긴급
+URGENT_MAX_RATING = 2
+
+_DATE_PATTERN = re.compile(r'(?:(\d{2,4})[.\-/]\s*)?(\d{1,2})[.\-/]\s*(\d{1,2})')
+
+
+def parse_review_date(text: str, now: datetime = None) -> Optional[datetime]:
+    """
+    리뷰 날짜 문자열 해석 ('2024.1.15.월', '24.01.15', '1.15.월', '2024-01-15')
+
+    연도가 없으면 올해(미래가 되면 작년)로 봅니다. 해석할 수 없으면 None.
+    """
+    now = now or datetime.now()
+    match = _DATE_PATTERN.search(text or '')
+    if not match:
+        return None
+    year, month, day = match.groups()
+    if year is None:
+        year = now.year
+    else:
+        year = int(year)
+        if year < 100:
+            year += 2000
+    try:
+        parsed = datetime(year, int(month), int(day))
+    except ValueError:
+        return None
+    if match.group(1) is None and parsed > now:
+        parsed = parsed.replace(year=parsed.year - 1)
+    return parsed
+
+
+@dataclass(order=True)
+class ScheduledItem:
+    """스케줄러에 넣은 작업 (deadline, seq 순으로 정렬)"""
+    deadline: datetime
+    seq: int
+    business_id: str = field(compare=False)
+    rating: int = field(compare=False)
+    payload: Any = field(compare=False)
+
+    def is_urgent(self, now: datetime = None) -> bool:
+        return self.rating <= URGENT_MAX_RATING or self.deadline <= (now or datetime.now())
+
+
+class PriorityScheduler:
+    """별점/경과 시간/업체별 SLA 기준 우선순위 큐 (업체별 공평 분배)"""
+
+    def __init__(
+        self,
+        sla_hours: Dict[int, float] = None,
+        store_sla_scale: Dict[str, float] = None,
+        store_weights: Dict[str, float] = None,
+        budget: Optional[int] = None,
+        max_per_store: Optional[int] = None
+    ):
+        """
+        Args:
+            sla_hours: 별점별 목표 시간 {별점: 시간} (기본값: DEFAULT_SLA_HOURS)
+            store_sla_scale: 업체별 SLA 배율 {업체 ID: 배율} (0.5 면 목표 시간이 절반)
+            store_weights: 업체별 처리 비중 {업체 ID: 가중치} (기본 1, 2 면 두 배 자주 꺼냄)
+            budget: 꺼낼 수 있는 최대 작업 수 (None 이면 제한 없음)
+            max_per_store: 업체당 꺼낼 수 있는 최대 작업 수 (None 이면 제한 없음)
+        """
+        self.sla_hours = {**DEFAULT_SLA_HOURS, **(sla_hours or {})}
+        self.store_sla_scale = store_sla_scale or {}
+        self.store_weights = store_weights or {}
+        self.budget = budget
+        self.max_per_store = max_per_store
+        self.served: Dict[str, int] = {}
+        self._heaps: Dict[str, List[ScheduledItem]] = {}
+        self._seq = itertools.count()
+        self._closed = False
+        self._available = None
+
+    def __len__(self) -> int:
+        return sum(len(heap) for heap in self._heaps.values())
+
+    @property
+    def remaining_budget(self) -> Optional[int]:
+        if self.budget is None:
+            return None
+        return max(0, self.budget - sum(self.served.values()))
+
+    def deadline_for(self, business_id: str, rating: int, review_time: datetime = None) -> datetime:
+        """리뷰 처리 기한"""
+        hours = self.sla_hours.get(rating, max(self.sla_hours.values()))
+        hours *= self.store_sla_scale.get(business_id, 1.0)
+        return (review_time or datetime.now()) + timedelta(hours=hours)
+
+    def push(self, payload: Any, business_id: str, rating: int, review_time: datetime = None) -> ScheduledItem:
+        """
+        작업 추가 (처리 중에 추가해도 됨)
+
+        Args:
+            payload: 꺼낼 때 돌려받을 값 (리뷰 등)
+            business_id: 업체 ID
+            rating: 별점
+            review_time: 리뷰 작성 시각 (모르면 지금)
+        """
+        item = ScheduledItem(
+            deadline=self.deadline_for(business_id, rating, review_time),
+            seq=next(self._seq),
+            business_id=business_id,
+            rating=rating,
+            payload=payload
+        )
+        return self.requeue(item)
+
+    def requeue(self, item: ScheduledItem, payload: Any = None) -> ScheduledItem:
+        """
+        꺼낸 작업을 같은 기한으로 다시 넣기 (다음 단계 큐로 넘기거나 재시도할 때)
+
+        Args:
+            item: pop() 으로 꺼낸 작업 (다른 스케줄러의 작업도 가능)
+            payload: 바꿀 값 (None 이면 그대로)
+        """
+        if payload is not None:
+            item = ScheduledItem(item.deadline, item.seq, item.business_id, item.rating, payload)
+        heapq.heappush(self._heaps.setdefault(item.business_id, []), item)
+        if self._available is not None:
+            self._available.set()
+        return item
+
+    def push_review(self, review, business_id: str, payload: Any = None, now: datetime = None) -> ScheduledItem:
+        """Review 객체(또는 {'rating', 'date'} dict) 추가 - 작성 시각은 리뷰 날짜에서 해석"""
+        rating = review['rating'] if isinstance(review, dict) else review.rating
+        date = review.get('date') if isinstance(review, dict) else review.date
+        return self.push(review if payload is None else payload, business_id, rating,
+                         parse_review_date(date, now))
+
+    def _key(self, business_id: str, now: datetime) -> tuple:
+        head = self._heaps[business_id][0]
+        share = self.served.get(business_id, 0) / self.store_weights.get(business_id, 1.0)
+        return (0 if head.is_urgent(now) else 1, share, head.deadline, head.seq)
+
+    def pop(self, now: datetime = None) -> Optional[ScheduledItem]:
+        """가장 먼저 처리할 작업 꺼내기 (없거나 예산을 다 쓰면 None)"""
+        if self.remaining_budget == 0:
+            return None
+        now = now or datetime.now()
+        candidates = [
+            business_id for business_id, heap in self._heaps.items()
+            if heap and (self.max_per_store is None or self.served.get(business_id, 0) < self.max_per_store)
+        ]
+        if not candidates:
+            return None
+        business_id = min(candidates, key=lambda b: self._key(b, now))
+        item = heapq.heappop(self._heaps[business_id])
+        self.served[business_id] = self.served.get(business_id, 0) + 1
+        return item
+
+    def pop_many(self, count: int, now: datetime = None) -> List[ScheduledItem]:
+        """최대 count 개 꺼내기 (우선순위 순)"""
+        items = []
+        while len(items) < count:
+            item = self.pop(now)
+            if item is None:
+                break
+            items.append(item)
+        return items
+
+    def close(self):
+        """더 이상 추가하지 않음 (get() 대기 중인 쪽은 남은 작업을 다 꺼낸 뒤 None 을 받음)"""
+        self._closed = True
+        if self._available is not None:
+            self._available.set()
+
+    async def get(self) -> Optional[ScheduledItem]:
+        """작업이 들어올 때까지 기다렸다가 꺼냄 (close() 후 비었거나 예산을 다 쓰면 None)"""
+        if self._available is None:
+            self._available = asyncio.Event()
+        while True:
+            item = self.pop()
+            if item is not None or self._closed or self.remaining_budget == 0:
+                return item
+            self._available.clear()
+            await self._available.wait()
+
+
+def prioritize(reviews: Iterable, business_id: str, key: Callable = None, **options) -> list:
+    """
+    한 업체의 리뷰 목록을 처리할 순서로 정렬
+
+    Args:
+        reviews: Review 객체 또는 {'rating', 'date'} dict 목록
+        key: 리뷰에서 Review/dict 를 꺼내는 함수 (기본값: 그대로)
+        **options: PriorityScheduler 옵션 (sla_hours, store_sla_scale)
+    """
+    scheduler = PriorityScheduler(**options)
+    now = datetime.now()
+    for review in reviews:
+        scheduler.push_review(key(review) if key else review, business_id, payload=review, now=now)
+    return [item.payload for item in scheduler.pop_many(len(scheduler), now)]
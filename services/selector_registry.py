@@ -0,0 +1,225 @@
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+import hashlib
+import logging
+
+from database.db import load_selector_stats, save_selector_stats
+from utils.metrics import inc
+
+logger = logging.getLogger(__name__)
+
+# 필드별 후보 선택자 (우선순위 순서). 학습 전에는 이 순서대로 시도합니다.
+# 리뷰 ID/해시에 들어가는 필드(작성자/별점/본문/날짜/답글)는 학습 순서가 바뀌면 같은 리뷰가 새 ID 가 되므로
+# 여기 두지 않고 html_parser 의 고정 XPath 로만 읽습니다 (IDENTITY_FIELDS).
+DEFAULT_SELECTORS: Dict[str, List[str]] = {
+    # 리뷰 목록
+    'review_item': [
+        'li[class*="review"]',
+        '[class*="review-item"]',
+        '[class*="ReviewItem"]',
+        'article[class*="review"]',
+        '[data-review-id]'
+    ],
+    'visit_count': ['[class*="visit"]', '[class*="count"]'],
+    # 답글 등록
+    'reply_button': [
+        'button[class*="reply"]',
+        'a[class*="reply"]',
+        '[class*="답글"]',
+        'button:has-text("답글")',
+        '[class*="write"]'
+    ],
+    'reply_textarea': [
+        'textarea[class*="reply"]',
+        'textarea[class*="input"]',
+        '[class*="reply"] textarea',
+        'textarea',
+        '[contenteditable="true"]'
+    ],
+    'reply_submit': [
+        'button[type="submit"]',
+        'button[class*="submit"]',
+        'button[class*="register"]',
+        'button:has-text("등록")',
+        'button:has-text("완료")',
+        '[class*="submit"]'
+    ],
+}
+# 리뷰 안에서 못 찾았을 때 페이지 전체에서 찾는 답글 버튼 (같은 후보라도 범위가 다르면 적중률이 달라 따로 학습)
+DEFAULT_SELECTORS['reply_button_page'] = list(DEFAULT_SELECTORS['reply_button'])
+
+# 레이아웃 지문 계산용 스크립트: 리뷰 관련 요소의 태그/클래스 구성을 수집
+_FINGERPRINT_JS = """
+() => {
+    const tokens = new Set();
+    const elems = document.querySelectorAll('[class*="review"], [class*="Review"], [data-review-id]');
+    for (let i = 0; i < elems.length && i < 40; i++) {
+        const el = elems[i];
+        tokens.add(el.tagName);
+        el.classList.forEach(c => tokens.add(c.replace(/[0-9]+/g, '#')));
+    }
+    return Array.from(tokens).sort().join(' ');
+}
+"""
+
+
+async def layout_fingerprint(page) -> str:
+    """
+    페이지 레이아웃 지문 계산
+
+    리뷰 관련 요소의 태그/클래스 구성이 같으면 같은 지문이 나오므로,
+    레이아웃이 바뀌면 선택자 통계를 새로 학습하게 됩니다.
+    """
+    try:
+        signature = await page.evaluate(_FINGERPRINT_JS)
+    except Exception:
+        return ''
+    return hashlib.sha1(signature.encode()).hexdigest()[:12]
+
+
+# 학습 선택자로 읽으면 안 되는 필드
+IDENTITY_FIELDS = frozenset({'author', 'rating', 'content', 'date', 'owner_reply'})
+
+
+class SelectorRegistry:
+    """
+    필드/레이아웃별로 성공한 선택자를 기억하는 선택자 전략 저장소
+
+    - 성공률이 높은 선택자부터 시도하므로, 학습이 끝나면 필드당 쿼리 1회로 추출됩니다.
+    - 최근 적중률이 min_hit_rate 아래로 떨어지면 해당 필드 통계를 초기화하고 재학습합니다.
+    - 통계는 selector_stats 테이블에 저장되어 재시작 후에도 유지됩니다.
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, List[str]] = None,
+        min_hit_rate: float = 0.5,
+        window: int = 20
+    ):
+        self.defaults = defaults or DEFAULT_SELECTORS
+        learned_identity = IDENTITY_FIELDS & set(self.defaults)
+        if learned_identity:
+            raise ValueError(f"리뷰 ID/해시 필드는 학습 선택자로 읽을 수 없습니다: {sorted(learned_identity)}")
+        self.min_hit_rate = min_hit_rate
+        self.window = window
+        # (fingerprint, field) -> {selector: [hits, misses]}
+        self._stats: Dict[tuple, Dict[str, List[int]]] = {}
+        # (fingerprint, field) -> 최근 첫 시도 성공 여부
+        self._recent: Dict[tuple, deque] = {}
+        self._dirty = set()
+        self._loaded = False
+
+    def load(self):
+        """DB에서 선택자 통계 불러오기"""
+        for row in load_selector_stats():
+            key = (row['fingerprint'], row['field'])
+            self._stats.setdefault(key, {})[row['selector']] = [row['hits'], row['misses']]
+        self._loaded = True
+
+    def save(self):
+        """변경된 선택자 통계만 DB에 저장"""
+        if not self._dirty:
+            return
+        rows = []
+        for key in self._dirty:
+            fingerprint, field = key
+            for selector, (hits, misses) in self._stats.get(key, {}).items():
+                rows.append((fingerprint, field, selector, hits, misses))
+        try:
+            save_selector_stats(rows)
+            self._dirty.clear()
+        except Exception as e:
+            logger.error(f"선택자 통계 저장 오류: {e}")
+
+    def candidates(self, field: str, fingerprint: str = '') -> List[str]:
+        """성공률 순으로 정렬된 후보 선택자 목록"""
+        if not self._loaded:
+            self.load()
+
+        defaults = self.defaults[field]
+        stats = self._stats.get((fingerprint, field), {})
+
+        def score(item):
+            index, selector = item
+            hits, misses = stats.get(selector, (0, 0))
+            # 라플라스 보정: 한 번도 시도하지 않은 선택자는 0.5
+            return (-(hits + 1) / (hits + misses + 2), index)
+
+        return [selector for _, selector in sorted(enumerate(defaults), key=score)]
+
+    def record(self, field: str, fingerprint: str, selector: str, hit: bool):
+        """선택자 시도 결과 기록"""
+        key = (fingerprint, field)
+        counts = self._stats.setdefault(key, {}).setdefault(selector, [0, 0])
+        counts[0 if hit else 1] += 1
+        self._dirty.add(key)
+        inc("selector_queries", field=field, result="hit" if hit else "miss")
+
+    def _observe(self, field: str, fingerprint: str, first_hit: bool):
+        """
+        1순위 선택자 적중 여부 기록
+
+        어떤 후보든 요소를 찾았을 때만 호출합니다. (필드 자체가 없는 경우는 학습 근거가 아님)
+        """
+        key = (fingerprint, field)
+        recent = self._recent.setdefault(key, deque(maxlen=self.window))
+        recent.append(first_hit)
+        if len(recent) == self.window and sum(recent) / len(recent) < self.min_hit_rate:
+            # 학습된 선택자가 더 이상 맞지 않음 -> 통계 초기화 후 재학습
+            inc("selector_relearn", field=field)
+            for counts in self._stats.get(key, {}).values():
+                counts[0] = counts[1] = 0
+            self._dirty.add(key)
+            recent.clear()
+
+    async def query(
+        self,
+        root,
+        field: str,
+        fingerprint: str = '',
+        accept: Optional[Callable[[object], Awaitable[bool]]] = None
+    ):
+        """
+        학습된 순서대로 선택자를 시도하여 요소 하나 찾기
+
+        Args:
+            root: Playwright Page 또는 ElementHandle
+            field: 필드 이름 (DEFAULT_SELECTORS 키)
+            fingerprint: 레이아웃 지문
+            accept: 찾은 요소를 채택할지 판단하는 비동기 함수 (없으면 찾는 즉시 채택)
+
+        Returns:
+            ElementHandle: 채택된 요소. 채택된 요소가 없으면 마지막으로 찾은 요소, 그것도 없으면 None
+        """
+        last_found = None
+        for i, selector in enumerate(self.candidates(field, fingerprint)):
+            elem = await root.query_selector(selector)
+            if elem and (accept is None or await accept(elem)):
+                self.record(field, fingerprint, selector, True)
+                self._observe(field, fingerprint, first_hit=(i == 0))
+                return elem
+            if elem:
+                last_found = elem
+            self.record(field, fingerprint, selector, False)
+        return last_found
+
+    async def query_all(self, root, field: str, fingerprint: str = '') -> list:
+        """학습된 순서대로 선택자를 시도하여 처음으로 결과가 있는 요소 목록 반환"""
+        for i, selector in enumerate(self.candidates(field, fingerprint)):
+            elems = await root.query_selector_all(selector)
+            self.record(field, fingerprint, selector, bool(elems))
+            if elems:
+                self._observe(field, fingerprint, first_hit=(i == 0))
+                return elems
+        return []
+
+
+_registry: Optional[SelectorRegistry] = None
+
+
+def get_selector_registry() -> SelectorRegistry:
+    """프로세스 공용 선택자 저장소"""
+    global _registry
+    if _registry is None:
+        _registry = SelectorRegistry()
+    return _registry
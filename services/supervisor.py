@@ -0,0 +1,236 @@
+"""
+브라우저 상태 감시 + 장애 복구 (장시간 실행용)
+
+- 주기적으로 브라우저 연결과 계정 컨텍스트를 확인합니다 (빈 페이지를 열어 스크립트 실행, 시간 제한).
+  끊겼거나 응답이 없으면 마지막 세션 상태(쿠키 + localStorage)로 컨텍스트를 다시 만듭니다.
+- 브라우저 작업을 call() 로 실행하면 시간 제한을 두고, 브라우저/컨텍스트가 죽었거나(BrowserCrashedError)
+  시간 안에 끝나지 않으면 세션을 복구한 뒤 같은 작업을 다시 실행합니다.
+- 세션 상태는 로그인 직후와 상태 확인이 정상일 때마다 NaverAuth 에 갱신하며, 디스크에는 남기지 않습니다.
+- 공유 브라우저(BrowserManager)를 쓰면 계정마다 감시자 하나를 BrowserManager.supervisor() 로 함께 씁니다.
+"""
+from collections import deque
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+import time
+
+from utils.metrics import inc, span
+from .browser_manager import BrowserCrashedError, is_browser_crash, close_page
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserSupervisor:
+    """계정 하나의 브라우저 상태를 확인하고 죽으면 되살리는 감시자 (auth 는 그 계정의 로그인 세션)"""
+
+    def __init__(
+        self,
+        auth,
+        check_interval: float = 60.0,
+        check_timeout: float = 15.0,
+        op_timeout: float = 180.0,
+        max_retries: int = 2,
+        max_restarts: int = 5,
+        restart_window: float = 10 * 60
+    ):
+        """
+        Args:
+            auth: 로그인한 NaverAuth
+            check_interval: 상태 확인 주기 (초, start() 로 감시할 때)
+            check_timeout: 상태 확인 시간 제한 (초, 넘으면 멈춘 것으로 봄)
+            op_timeout: call() 작업 기본 시간 제한 (초)
+            max_retries: 작업 하나를 세션 복구 후 다시 실행할 최대 횟수
+            max_restarts: restart_window 안에 허용하는 최대 복구 횟수 (넘으면 BrowserCrashedError)
+            restart_window: 복구 횟수를 세는 구간 (초)
+        """
+        self.auth = auth
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.op_timeout = op_timeout
+        self.max_retries = max_retries
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        # 복구할 때마다 1 증가 - 같은 장애로 여러 작업이 동시에 실패해도 한 번만 복구
+        self.generation = 0
+        self.last_check: Optional[dict] = None
+        self.last_restart: Optional[dict] = None
+        self._restarts = deque()
+        self._lock_obj = None
+        self._task = None
+
+    @property
+    def _lock(self) -> asyncio.Lock:
+        # 감시자는 이벤트 루프 밖(Streamlit 스크립트 스레드)에서 만들어질 수 있으므로 처음 쓸 때 생성
+        if self._lock_obj is None:
+            self._lock_obj = asyncio.Lock()
+        return self._lock_obj
+
+    def _browser_connected(self) -> bool:
+        browser = self.auth.manager.browser if self.auth.manager else self.auth.browser
+        return bool(browser and browser.is_connected())
+
+    async def check_health(self) -> dict:
+        """
+        브라우저 연결 + 컨텍스트 응답 확인 (정상이면 세션 상태도 갱신)
+
+        Returns:
+            dict: {'healthy', 'reason', 'latency_ms', 'checked_at'}
+                  reason: None / 'disconnected' / 'context_closed' / 'hung' / 오류 메시지
+        """
+        started = time.perf_counter()
+        reason = None
+        if not self._browser_connected():
+            reason = 'disconnected'
+        elif not self.auth.context:
+            reason = 'context_closed'
+        else:
+            page = None
+            try:
+                page = await asyncio.wait_for(self.auth.context.new_page(), self.check_timeout)
+                await asyncio.wait_for(page.evaluate("() => 1 + 1"), self.check_timeout)
+                await asyncio.wait_for(self.auth.save_session_state(), self.check_timeout)
+            except asyncio.TimeoutError:
+                reason = 'hung'
+            except Exception as e:
+                reason = 'context_closed' if is_browser_crash(e) else str(e)
+            finally:
+                if page is not None:
+                    try:
+                        await asyncio.wait_for(close_page(page), self.check_timeout)
+                    except Exception as e:
+                        logger.warning(f"상태 확인 페이지 종료 오류: {e}")
+
+        self.last_check = {
+            'healthy': reason is None,
+            'reason': reason,
+            'latency_ms': round((time.perf_counter() - started) * 1000),
+            'checked_at': time.time(),
+        }
+        inc("browser_health_checks", result="ok" if reason is None else "failed")
+        return self.last_check
+
+    async def restart(self, reason: str, generation: Optional[int] = None) -> bool:
+        """
+        세션 복구 (NaverAuth.restore_session)
+
+        Args:
+            reason: 복구 이유 (로그/메트릭용)
+            generation: 실패한 작업을 시작할 때의 self.generation (그 사이 다른 작업이 복구했으면 건너뜀)
+
+        Returns:
+            bool: 복구 성공 여부
+
+        Raises:
+            BrowserCrashedError: restart_window 안에 복구를 max_restarts 번 넘게 시도함
+        """
+        async with self._lock:
+            if generation is not None and generation != self.generation:
+                return True
+            now = time.monotonic()
+            while self._restarts and now - self._restarts[0] > self.restart_window:
+                self._restarts.popleft()
+            if len(self._restarts) >= self.max_restarts:
+                raise BrowserCrashedError(
+                    f"{self.restart_window:.0f}초 안에 브라우저 세션을 {self.max_restarts}번 복구했지만 "
+                    f"계속 실패합니다 ({reason})"
+                )
+            self._restarts.append(now)
+
+            logger.warning(f"브라우저 세션 복구 ({reason})")
+            with span("browser_restart", reason=reason) as s:
+                ok = await self.auth.restore_session()
+                s.set(ok=ok)
+            inc("browser_restarts", reason=reason, result="ok" if ok else "failed")
+            self.generation += 1
+            self.last_restart = {'reason': reason, 'ok': ok, 'at': time.time()}
+            return ok
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable],
+        operation: str = "browser_op",
+        timeout: Optional[float] = None,
+        retry_on_timeout: bool = True
+    ):
+        """
+        브라우저 작업 실행 (시간 제한 + 브라우저가 죽으면 세션 복구 후 다시 실행)
+
+        Args:
+            fn: 인자 없는 코루틴 함수 - 다시 실행할 때마다 새로 호출하므로 auth.context 는 fn 안에서 읽어야 함
+            operation: 로그/메트릭용 작업 이름
+            timeout: 작업 시간 제한 (초, None 이면 op_timeout, 0 이면 제한 없음)
+            retry_on_timeout: 시간 초과 후에도 다시 실행할지 (답글 등록처럼 두 번 실행하면 안 되는 작업은 False)
+
+        Raises:
+            BrowserCrashedError: 다시 실행해도 복구되지 않음 (작업이 던진 다른 오류는 그대로 전달)
+        """
+        limit = self.op_timeout if timeout is None else timeout
+        for attempt in range(self.max_retries + 1):
+            generation = self.generation
+            try:
+                return await asyncio.wait_for(fn(), limit or None)
+            except asyncio.TimeoutError as e:
+                reason, error = 'hung', e
+            except Exception as e:
+                if not is_browser_crash(e):
+                    raise
+                reason = 'context_closed' if self._browser_connected() else 'disconnected'
+                error = e
+
+            inc("browser_op_failures", operation=operation, reason=reason)
+            logger.warning(f"{operation} 실패 ({reason}, {attempt + 1}/{self.max_retries + 1}번째): {error}")
+            # 멈춘 페이지는 컨텍스트를 다시 만들어야 풀리므로 재시도하지 않더라도 복구
+            ok = await self.restart(reason, generation)
+            if not ok or attempt == self.max_retries or (reason == 'hung' and not retry_on_timeout):
+                raise BrowserCrashedError(f"{operation} 실패 ({reason}): {error}") from error
+
+    async def run(self):
+        """check_interval 마다 상태를 확인하고 이상하면 복구 (취소될 때까지 반복)"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if not self.auth.is_logged_in:
+                # 로그아웃한 세션 - 다른 세션이 이 계정으로 다시 가져가면 그 세션으로 이어서 확인
+                continue
+            try:
+                generation = self.generation
+                health = await self.check_health()
+                if not health['healthy']:
+                    await self.restart(health['reason'], generation)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"브라우저 상태 확인 오류: {e}", exc_info=True)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        상태 감시 시작 (이미 실행 중이면 무시)
+
+        Args:
+            loop: 다른 스레드에서 실행 중인 이벤트 루프 (None 이면 현재 루프에서 실행)
+        """
+        if self.running:
+            return
+        if loop is None:
+            self._task = asyncio.ensure_future(self.run())
+        else:
+            self._task = asyncio.run_coroutine_threadsafe(self.run(), loop)
+
+    def stop(self):
+        """상태 감시 중지"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def stats(self) -> dict:
+        """현재 상태 (진단 화면용)"""
+        return {
+            'browser_connected': self._browser_connected(),
+            'generation': self.generation,
+            'recent_restarts': len(self._restarts),
+            'last_check': self.last_check,
+            'last_restart': self.last_restart,
+        }
@@ -0,0 +1,164 @@
+"""
+짧고 긍정적인 리뷰에 LLM 없이 템플릿으로 답글 작성
+
+템플릿 문법:
+- {store_name}, {keyword}, {emoji} : 업체명, 리뷰에서 찾은 키워드, 이모지 (이모지 미사용 시 빈 문자열)
+- {store_name:을}, {keyword:이} : 받침에 맞는 조사 붙이기 (을/를, 이/가, 은/는, 과/와, 으로/로)
+- [표현1|표현2|표현3] : 무작위로 하나 선택 (빈 항목도 가능: [정말 |])
+"""
+from typing import Callable, List, Optional
+import logging
+import random
+import re
+
+logger = logging.getLogger(__name__)
+
+# 리뷰에서 찾을 키워드 (표현 → 답글에 쓸 말)
+KEYWORDS = [
+    (re.compile(r'맛있|맛나|존맛|맛집|맛이 좋'), '음식 맛'),
+    (re.compile(r'친절'), '친절함'),
+    (re.compile(r'분위기'), '분위기'),
+    (re.compile(r'가성비|가격.{0,3}(착|저렴|괜찮)'), '가성비'),
+    (re.compile(r'양이 많|푸짐|넉넉'), '넉넉한 양'),
+    (re.compile(r'깨끗|청결|깔끔'), '청결함'),
+    (re.compile(r'인테리어|예쁘|이쁘'), '인테리어'),
+    (re.compile(r'커피'), '커피'),
+    (re.compile(r'디저트|케이크|빵'), '디저트'),
+    (re.compile(r'서비스'), '서비스'),
+    (re.compile(r'주차'), '주차'),
+]
+
+EMOJIS = [' 😊', ' 🙏', ' 😄', ' ❤️', ' 🥰']
+
+# DB에 템플릿이 없을 때 쓰는 기본 템플릿 (별점 4~5점용)
+DEFAULT_TEMPLATES = [
+    {'content': "[소중한 리뷰|좋은 리뷰|따뜻한 후기] 남겨주셔서 [정말 |진심으로 |]감사합니다! "
+                "{keyword:을} 좋게 봐주셔서 [기쁩니다|힘이 납니다]. [다음에도|또] [꼭 |]찾아주세요{emoji}",
+     'tone': None, 'for_rating': None},
+    {'content': "[방문해주셔서|찾아주셔서] 감사합니다! {store_name}에서 좋은 시간 보내셨다니 [기쁩니다|다행입니다]. "
+                "[다음 방문 때도|언제든] 만족하실 수 있도록 노력하겠습니다{emoji}",
+     'tone': None, 'for_rating': None},
+    {'content': "[좋은 말씀|소중한 후기] 감사합니다{emoji} 앞으로도 [변함없는 맛과 서비스로|한결같은 모습으로] "
+                "보답하겠습니다. [또 뵙겠습니다|다음에 또 찾아주세요]!",
+     'tone': None, 'for_rating': None},
+    {'content': "[와|우와] {keyword} 칭찬 감사해요{emoji} [또 놀러 오세요|다음에 또 봬요]!",
+     'tone': 'casual', 'for_rating': None},
+]
+
+_CHOICE_PATTERN = re.compile(r'\[([^\[\]]*\|[^\[\]]*)\]')
+_PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)(?::(\w+))?\}')
+_JOSA = {'을': ('을', '를'), '를': ('을', '를'), '이': ('이', '가'), '가': ('이', '가'),
+         '은': ('은', '는'), '는': ('은', '는'), '과': ('과', '와'), '와': ('과', '와'),
+         '으로': ('으로', '로'), '로': ('으로', '로')}
+
+
+def attach_josa(word: str, josa: str) -> str:
+    """받침 여부에 맞춰 조사 붙이기 (예: '분위기' + '을' → '분위기를')"""
+    with_final, without_final = _JOSA.get(josa, (josa, josa))
+    last = word[-1:] if word else ''
+    if not ('가' <= last <= '힣'):
+        return word + without_final
+    final = (ord(last) - ord('가')) % 28
+    # 'ㄹ' 받침은 '로' 를 씀
+    if with_final == '으로' and final == 8:
+        return word + '로'
+    return word + (with_final if final else without_final)
+
+
+def extract_keyword(review_content: str) -> Optional[str]:
+    """리뷰에서 칭찬한 부분 키워드 찾기 (없으면 None)"""
+    for pattern, keyword in KEYWORDS:
+        if pattern.search(review_content or ''):
+            return keyword
+    return None
+
+
+def render_template(template: str, values: dict, rng: random.Random = None) -> Optional[str]:
+    """
+    템플릿 채우기
+
+    Returns:
+        str: 완성된 답글 (필요한 값이 없으면 None)
+    """
+    rng = rng or random
+    text = _CHOICE_PATTERN.sub(lambda m: rng.choice(m.group(1).split('|')), template)
+
+    missing = False
+
+    def replace(match):
+        nonlocal missing
+        value = values.get(match.group(1))
+        if value is None:
+            missing = True
+            return ''
+        return attach_josa(value, match.group(2)) if match.group(2) and value else value
+
+    text = _PLACEHOLDER_PATTERN.sub(replace, text)
+    if missing:
+        return None
+    return ' '.join(text.split())
+
+
+class TemplateEngine:
+    """reply_templates 테이블(없으면 기본 템플릿)로 답글 작성"""
+
+    def __init__(self, loader: Callable[[], List[dict]] = None, seed: int = None):
+        """
+        Args:
+            loader: 템플릿 목록을 돌려주는 함수 (기본값: database.db.get_reply_templates)
+            seed: 무작위 표현 선택 시드 (테스트/재현용)
+        """
+        self._loader = loader
+        self._templates = None
+        self.rng = random.Random(seed)
+
+    def templates(self) -> List[dict]:
+        """템플릿 목록 (처음 한 번만 불러오고 invalidate() 전까지 재사용)"""
+        if self._templates is None:
+            templates = []
+            try:
+                if self._loader is None:
+                    from database.db import get_reply_templates
+                    templates = get_reply_templates()
+                else:
+                    templates = self._loader()
+            except Exception as e:
+                logger.warning(f"템플릿 조회 오류: {e}")
+            self._templates = templates or DEFAULT_TEMPLATES
+        return self._templates
+
+    def invalidate(self):
+        """템플릿이 추가/수정/삭제되었을 때 호출"""
+        self._templates = None
+
+    def render(
+        self,
+        review_content: str,
+        store_name: str,
+        rating: int,
+        tone: str = None,
+        include_emoji: bool = True,
+        max_length: int = 150
+    ) -> Optional[str]:
+        """
+        조건에 맞는 템플릿 중 하나로 답글 작성
+
+        Returns:
+            str: 답글 (쓸 수 있는 템플릿이 없으면 None)
+        """
+        candidates = [
+            t for t in self.templates()
+            if (t.get('tone') in (None, '', tone)) and (t.get('for_rating') in (None, rating))
+        ]
+        self.rng.shuffle(candidates)
+
+        values = {
+            'store_name': store_name,
+            'keyword': extract_keyword(review_content),
+            'emoji': self.rng.choice(EMOJIS) if include_emoji else '',
+        }
+        for template in candidates:
+            reply = render_template(template['content'], values, self.rng)
+            if reply and len(reply) <= max_length:
+                return reply
+        return None
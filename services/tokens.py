@@ -0,0 +1,86 @@
+"""
+로컬 토큰 계산과 입력 길이 제한
+
+tiktoken 이 설치되어 있으면 정확히 세고, 없으면 한국어 기준 근사치(보수적으로 크게)를 씁니다.
+"""
+from typing import Optional
+import math
+import re
+
+_SENTENCE_END = re.compile(r'(?<=[.!?~…\n])\s+')
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken 인코딩 (패키지가 없으면 None, 한 번만 시도)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """텍스트 토큰 수"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # 근사치: 영문/숫자는 4글자당 1토큰, 한글 등은 글자당 1.2토큰
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) * 1.2)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " … ") -> str:
+    """
+    토큰 수가 넘치면 문장 단위로 앞부분과 뒷부분을 남기고 가운데를 생략
+
+    리뷰는 보통 첫 문장에 총평, 마지막 문장에 재방문 의사가 있으므로 양 끝을 유지합니다.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = [s for s in _SENTENCE_END.split(text.strip()) if s]
+    head_budget = int(max_tokens * 0.7)
+    tail_budget = max_tokens - head_budget - count_tokens(marker)
+
+    head, used = [], 0
+    for sentence in sentences:
+        tokens = count_tokens(sentence)
+        if used + tokens > head_budget:
+            break
+        head.append(sentence)
+        used += tokens
+
+    tail, used = [], 0
+    for sentence in reversed(sentences[len(head):]):
+        tokens = count_tokens(sentence)
+        if used + tokens > tail_budget:
+            break
+        tail.insert(0, sentence)
+        used += tokens
+
+    if not head:
+        # 첫 문장부터 너무 길면 글자 단위로 자름
+        chars = len(text)
+        while chars > 0 and count_tokens(text[:chars]) > max_tokens - count_tokens(marker):
+            chars = int(chars * 0.9)
+        return text[:chars].rstrip() + marker.rstrip()
+    return ' '.join(head) + marker + ' '.join(tail) if tail else ' '.join(head) + marker.rstrip()
+
+
+def completion_budget(max_length: int, count: int = 1) -> int:
+    """
+    답글 글자 수 제한에 맞춘 max_tokens
+
+    한글은 글자당 1~2토큰이고 이모지는 여러 토큰이므로 여유를 둡니다.
+    """
+    per_reply = math.ceil(max_length * 1.5) + 16
+    return per_reply * count + (8 * count if count > 1 else 0)
@@ -0,0 +1,226 @@
+"""
+새 리뷰 백그라운드 감시
+
+- 업체마다 리뷰 첫 페이지만 가볍게 열어(ReviewScraper.probe) 합계 + 최신 리뷰 지문을 비교합니다.
+- 지문이 바뀐 경우에만 첫 페이지 리뷰를 저장된 리뷰와 동기화하고, 첫 페이지가 전부 새 리뷰면
+  더 깊게 한 번 더 가져옵니다. 두 조회 모두 같은 HTML 파서(html_parser)를 씁니다.
+  새 리뷰가 있으면 watch_events 에 알림을 남깁니다.
+- 확인 간격은 업체별 새 리뷰 빈도(시간당, 지수 이동 평균)에 맞춰 정합니다.
+  리뷰가 자주 달리는 업체는 자주, 조용한 업체는 드물게 (min_interval ~ max_interval) 확인합니다.
+"""
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+from database.db import (sync_reviews, get_review_counts, get_watch_state, save_watch_state,
+                         add_watch_event)
+from utils.metrics import inc, span
+from .browser_manager import BrowserCrashedError
+from .review_scraper import ReviewScraper
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewWatcher:
+    """계정 하나의 업체들을 주기적으로 확인해 새 리뷰를 찾는 감시자"""
+
+    def __init__(
+        self,
+        auth,
+        businesses: List[dict],
+        min_interval: float = 60,
+        max_interval: float = 30 * 60,
+        target_new: float = 0.5,
+        smoothing: float = 0.3,
+        sync_limit: int = 30,
+        on_change: Callable[[dict, list], None] = None,
+        supervisor=None
+    ):
+        """
+        Args:
+            auth: 로그인한 NaverAuth (공유 브라우저를 쓰면 확인할 때만 컨텍스트를 빌림)
+            businesses: 감시할 업체 목록 [{'id', 'name'}, ...]
+            min_interval / max_interval: 확인 간격 범위 (초)
+            target_new: 확인 한 번에 기대하는 새 리뷰 수 (작을수록 자주 확인)
+            smoothing: 새 리뷰 빈도 이동 평균 가중치 (0~1, 클수록 최근 확인을 크게 반영)
+            sync_limit: 첫 페이지가 전부 새 리뷰일 때 더 가져올 리뷰 수
+            on_change: 새 리뷰를 찾으면 호출 (업체, 새 리뷰 ID 목록) - 이벤트 루프 스레드에서 호출됨
+            supervisor: 계정 브라우저 감시자 (있으면 확인을 감시자를 거쳐 실행하고 복구도 맡김)
+        """
+        self.auth = auth
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new = target_new
+        self.smoothing = smoothing
+        self.sync_limit = sync_limit
+        self.on_change = on_change
+        self.supervisor = supervisor
+        self.businesses: Dict[str, dict] = {}
+        self.next_check: Dict[str, float] = {}
+        self._task = None
+        self.set_businesses(businesses)
+
+    def set_businesses(self, businesses: List[dict]):
+        """감시할 업체 교체 (새 업체는 저장된 상태 기준으로 확인 시각을 정함)"""
+        self.businesses = {b['id']: b for b in businesses}
+        now = time.time()
+        for business_id in self.businesses:
+            if business_id not in self.next_check:
+                state = get_watch_state(business_id)
+                if state.get('last_checked_at'):
+                    self.next_check[business_id] = state['last_checked_at'] + (state['interval_s'] or 0)
+                else:
+                    self.next_check[business_id] = now
+        for business_id in list(self.next_check):
+            if business_id not in self.businesses:
+                del self.next_check[business_id]
+
+    def next_interval(self, review_rate: float) -> float:
+        """새 리뷰 빈도(시간당)에 맞춘 다음 확인 간격 (초, ±10% 흔들어 업체끼리 몰리지 않게)"""
+        interval = self.target_new / review_rate * 3600 if review_rate > 0 else self.max_interval
+        interval *= random.uniform(0.9, 1.1)
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    async def _borrow_context(self):
+        if self.auth.manager:
+            return await self.auth.manager.acquire(self.auth.account_key, self.auth.cookies)
+        return self.auth.context
+
+    async def _return_context(self):
+        if self.auth.manager:
+            await self.auth.manager.release(self.auth.account_key)
+
+    async def check(self, business_id: str) -> dict:
+        """
+        업체 하나 확인 (지문이 바뀌었을 때만 동기화)
+
+        Returns:
+            dict: {'changed', 'new', 'interval_s'} (확인 실패 시 changed 는 None)
+        """
+        # DB 호출은 스레드에서 실행 (공용 브라우저 루프를 막지 않도록)
+        state = await asyncio.to_thread(get_watch_state, business_id)
+        now = time.time()
+        new_ids = []
+        context = await self._borrow_context()
+        try:
+            scraper = ReviewScraper(context)
+            with span("watch_check") as s:
+                probe = await scraper.probe(business_id)
+                changed = None if probe is None else probe['fingerprint'] != state.get('fingerprint')
+                s.set(changed=changed)
+                if changed:
+                    # 처음 감시하는 업체인데 저장된 리뷰도 없으면 기준만 잡고 알리지 않음
+                    baseline = not state and not (await asyncio.to_thread(get_review_counts, business_id))['total']
+                    new_ids = (await asyncio.to_thread(sync_reviews, business_id, probe['reviews']))['new']
+                    grown = (probe['total'] or 0) - (state.get('site_total') or 0)
+                    if not baseline and probe['reviews'] and (
+                            len(new_ids) == len(probe['reviews']) or grown > len(new_ids)):
+                        # probe 와 같은 HTML 경로(stream_reviews)로 읽어 ID/해시 규칙을 맞춤
+                        deeper = []
+                        async for batch in scraper.stream_reviews(
+                                business_id, batch_size=self.sync_limit, max_reviews=self.sync_limit):
+                            deeper.extend(batch)
+                        synced = await asyncio.to_thread(sync_reviews, business_id, deeper)
+                        new_ids = list(dict.fromkeys(new_ids + synced['new']))
+                    if baseline:
+                        new_ids = []
+        finally:
+            await self._return_context()
+
+        if changed is None:
+            # 확인 실패 (로그아웃/네트워크) - 상태는 그대로 두고 최대 간격 뒤에 다시
+            inc("watch_checks", result="error")
+            return {'changed': None, 'new': [], 'interval_s': self.max_interval}
+
+        # 새 리뷰 빈도(시간당) 이동 평균
+        rate = state.get('review_rate') or 0.0
+        if state.get('last_checked_at'):
+            hours = max(now - state['last_checked_at'], self.min_interval) / 3600
+            rate = self.smoothing * (len(new_ids) / hours) + (1 - self.smoothing) * rate
+        elif new_ids:
+            rate = len(new_ids) / (self.max_interval / 3600)
+        interval = self.next_interval(rate)
+        await asyncio.to_thread(save_watch_state, business_id, probe['fingerprint'], probe['total'], rate,
+                                interval, now, now if changed else None)
+        inc("watch_checks", result="changed" if changed else "unchanged")
+
+        if new_ids:
+            await asyncio.to_thread(add_watch_event, business_id, new_ids)
+            inc("watch_new_reviews", len(new_ids))
+            business = self.businesses.get(business_id, {'id': business_id, 'name': business_id})
+            logger.info(f"새 리뷰 {len(new_ids)}개 ({business['name']})")
+            if self.on_change:
+                try:
+                    self.on_change(business, new_ids)
+                except Exception as e:
+                    logger.warning(f"새 리뷰 알림 처리 오류: {e}")
+        return {'changed': changed, 'new': new_ids, 'interval_s': interval}
+
+    async def run(self, tick: float = 5.0):
+        """확인 시각이 된 업체를 하나씩 확인 (취소될 때까지 반복)"""
+        while True:
+            if not self.next_check:
+                await asyncio.sleep(tick)
+                continue
+            business_id, due = min(self.next_check.items(), key=lambda item: item[1])
+            wait = due - time.time()
+            if wait > 0:
+                # 업체 목록이 바뀌어도 반영되도록 tick 단위로 깸
+                await asyncio.sleep(min(wait, tick))
+                continue
+            try:
+                if self.supervisor:
+                    # 같은 계정 세션들과 복구 세대/횟수를 공유 (브라우저가 죽으면 한 번만 복구 후 다시 확인)
+                    result = await self.supervisor.call(lambda: self.check(business_id), "watch_check")
+                else:
+                    result = await self.check(business_id)
+                interval = result['interval_s']
+            except asyncio.CancelledError:
+                raise
+            except BrowserCrashedError as e:
+                # 죽은 컨텍스트를 저장된 세션으로 다시 만들고 곧 다시 확인
+                logger.warning(f"리뷰 감시 중 브라우저 오류 ({business_id}): {e}")
+                inc("watch_checks", result="crashed")
+                if self.supervisor:
+                    # 감시자가 이미 복구를 시도했는데도 실패
+                    interval = self.max_interval
+                else:
+                    restored = await self.auth.restore_session()
+                    interval = self.min_interval if restored else self.max_interval
+            except Exception as e:
+                logger.error(f"리뷰 감시 오류 ({business_id}): {e}")
+                interval = self.max_interval
+            if business_id in self.next_check:
+                self.next_check[business_id] = time.time() + interval
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        감시 시작 (이미 실행 중이면 무시)
+
+        Args:
+            loop: 다른 스레드에서 실행 중인 이벤트 루프 (None 이면 현재 루프에서 실행)
+        """
+        if self.running:
+            return
+        if loop is None:
+            self._task = asyncio.ensure_future(self.run())
+        else:
+            self._task = asyncio.run_coroutine_threadsafe(self.run(), loop)
+
+    def stop(self):
+        """감시 중지"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def seconds_until_next(self) -> Optional[float]:
+        """가장 가까운 다음 확인까지 남은 시간 (초)"""
+        if not self.next_check:
+            return None
+        return max(0.0, min(self.next_check.values()) - time.time())
@@ -0,0 +1,311 @@
+"""
+여러 워커 프로세스에 계정/업체를 나눠 스크래핑·등록을 병렬 처리
+
+- 코디네이터가 SQLite work_queue 테이블에 작업을 넣고 워커 프로세스 N개를 띄웁니다.
+- 워커는 각자 브라우저 하나(계정별 컨텍스트)를 띄우고, 자기 샤드 작업을 먼저 가져가며
+  자기 샤드가 비면 다른 샤드 작업을 가져가 부하를 맞춥니다.
+- 결과는 work_queue.result 와 reviews / reply_history 테이블에 기록됩니다.
+"""
+from argparse import Namespace
+from pathlib import Path
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+import uuid
+import zlib
+
+from database import db
+from database.db import (init_db, enqueue_work, claim_work, finish_work, requeue_worker_tasks,
+                         get_work_results, count_work, sync_reviews, save_reply_history)
+
+logger = logging.getLogger(__name__)
+
+# 작업 종류
+KIND_SCRAPE = "scrape"
+KIND_POST = "post"
+KIND_PIPELINE = "pipeline"
+
+
+def shard_for(account_key: str, business_id: str, num_shards: int, shard_by: str = "account") -> int:
+    """
+    작업 샤드 번호
+
+    기본값(account)은 한 계정의 작업을 한 워커에 모아 컨텍스트를 재사용합니다.
+    등록 간격은 샤드 기준과 무관하게 프로세스 간에 공유됩니다 (SharedRateLimiter).
+    business 로 나누면 업체 단위로 더 고르게 퍼집니다.
+    """
+    key = account_key if shard_by == "account" else f"{account_key}:{business_id}"
+    return zlib.crc32((key or '').encode()) % max(1, num_shards)
+
+
+class _Worker:
+    """워커 프로세스 안에서 작업을 실행 (계정별 로그인 세션 유지)"""
+
+    def __init__(self, accounts: Dict[str, str], settings: dict):
+        from services.browser_manager import BrowserManager
+
+        self.accounts = accounts
+        self.settings = settings
+        self.manager = BrowserManager(max_contexts=max(1, len(accounts)))
+        self.auths = {}
+        self.supervisors = {}
+        self.generator = None
+        self.limiters = {}
+
+    async def get_auth(self, account_key: str):
+        from services.naver_auth import NaverAuth
+
+        auth = self.auths.get(account_key)
+        if auth is None:
+            cookies = self.accounts.get(account_key)
+            if not cookies:
+                raise RuntimeError(f"계정 쿠키가 없습니다: {account_key}")
+            auth = NaverAuth(manager=self.manager)
+            if not await auth.login_with_cookies(cookies):
+                raise RuntimeError(f"로그인 실패: {account_key}")
+            self.auths[account_key] = auth
+            # 브라우저가 죽거나 멈추면 저장된 세션으로 복구 (워커를 다시 띄우지 않고 계속 처리)
+            supervisor = self.manager.supervisor(auth, check_interval=self.settings.get('health_interval', 60.0))
+            supervisor.start()
+            self.supervisors[account_key] = supervisor
+        return auth
+
+    def get_generator(self):
+        from services.runner import build_generator
+
+        if self.generator is None:
+            self.generator = build_generator(Namespace(**self.settings))
+        return self.generator
+
+    def get_limiter(self, account_key: str):
+        from services.runner import SharedRateLimiter
+
+        # 같은 계정을 여러 워커가 처리할 수 있으므로 등록 간격은 프로세스 간에 공유
+        if account_key not in self.limiters:
+            self.limiters[account_key] = SharedRateLimiter(account_key, self.settings.get('delay', 5.0))
+        return self.limiters[account_key]
+
+    async def handle(self, task: dict) -> dict:
+        from services.review_scraper import ReviewScraper
+        from services.reply_poster import ReplyPoster
+
+        payload = task['payload']
+        auth = await self.get_auth(task['account_key'])
+        supervisor = self.supervisors[task['account_key']]
+
+        if task['kind'] == KIND_SCRAPE:
+            if payload.get('full_scan'):
+                # 전체 수집은 배치마다 DB 에 바로 저장 (목록을 메모리에 모으지 않음, 복구 후 커서부터 이어서)
+                return await supervisor.call(
+                    lambda: ReviewScraper(auth.context).scrape_to_db(
+                        task['business_id'],
+                        heap_limit_mb=payload.get('heap_limit_mb', 256),
+                        rss_limit_mb=payload.get('rss_limit_mb')
+                    ),
+                    "full_scan",
+                    timeout=0
+                )
+            reviews = await supervisor.call(
+                lambda: ReviewScraper(auth.context).get_reviews(
+                    task['business_id'],
+                    filter_type=payload.get('filter_type', 'all'),
+                    limit=payload.get('limit', 30)
+                ),
+                "scrape"
+            )
+            changes = sync_reviews(task['business_id'], reviews)
+            return {'reviews': len(reviews), **{key: len(ids) for key, ids in changes.items()}}
+
+        if task['kind'] == KIND_POST:
+            await self.get_limiter(task['account_key']).wait()
+            result = await supervisor.call(
+                lambda: ReplyPoster(auth.context).post_reply(
+                    task['business_id'], payload['review_id'], payload['content']
+                ),
+                "post_reply",
+                retry_on_timeout=False
+            )
+            if result['success']:
+                save_reply_history(
+                    business_id=task['business_id'],
+                    business_name=payload.get('business_name', ''),
+                    review_id=payload['review_id'],
+                    review_author=payload.get('review_author', ''),
+                    review_content=payload.get('review_content', ''),
+                    review_rating=payload.get('review_rating', 0),
+                    reply_content=payload['content'],
+                    ai_generated=payload.get('ai_generated', False)
+                )
+            return result
+
+        if task['kind'] == KIND_PIPELINE:
+            from services.runner import process_business
+            from services.ai_generator import ReplyTone
+
+            args = Namespace(**{**self.settings, 'tone': ReplyTone(self.settings['tone'])})
+            business = {'id': task['business_id'], 'name': payload.get('business_name', '')}
+            return await process_business(
+                business, auth, self.get_generator(), self.get_limiter(task['account_key']), args, supervisor
+            )
+
+        raise ValueError(f"알 수 없는 작업 종류: {task['kind']}")
+
+    async def close(self):
+        # 감시자는 관리자가 닫을 때 함께 멈춤
+        for auth in self.auths.values():
+            await auth.close()
+        await self.manager.close()
+
+
+async def _worker_loop(index: int, batch_id: str, accounts: Dict[str, str], settings: dict):
+    worker_id = f"pid-{os.getpid()}"
+    worker = _Worker(accounts, settings)
+    try:
+        while True:
+            task = claim_work(batch_id, worker_id, index)
+            if not task:
+                break
+            try:
+                result = await worker.handle(task)
+                finish_work(task['id'], result=result)
+            except Exception as e:
+                logger.error(f"작업 실패 ({task['kind']} {task['business_id']}): {e}")
+                finish_work(task['id'], error=str(e))
+    finally:
+        await worker.close()
+
+
+def _worker_main(index: int, batch_id: str, accounts: Dict[str, str], settings: dict, db_path: str):
+    """워커 프로세스 진입점 (spawn 으로 실행되므로 모듈 최상위 함수여야 함)"""
+    db.DATABASE_PATH = Path(db_path)
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s %(levelname)s worker-{index}: %(message)s")
+    asyncio.run(_worker_loop(index, batch_id, accounts, settings))
+
+
+class WorkerPool:
+    """
+    워커 프로세스 풀 코디네이터
+
+    예:
+        pool = WorkerPool(num_workers=4, accounts={key: cookies}, settings={...})
+        batch_id = pool.submit([{'kind': 'scrape', 'account_key': key, 'business_id': '123'}])
+        summary = pool.run(batch_id)
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        accounts: Dict[str, str] = None,
+        settings: dict = None,
+        shard_by: str = "account",
+        poll_interval: float = 0.5,
+        max_restarts: int = 3
+    ):
+        """
+        Args:
+            num_workers: 워커 프로세스 수 (기본값: CPU 코어 수)
+            accounts: {account_key: 쿠키 문자열} - 쿠키는 DB에 저장하지 않고 워커에 직접 전달
+            settings: 작업 설정 (provider, api_key, tone, limit, max_replies, delay, dry_run ...)
+            shard_by: 샤드 기준 ('account' 또는 'business')
+            poll_interval: 워커 상태 확인 주기 (초)
+            max_restarts: 비정상 종료한 워커 재시작 최대 횟수 (워커별)
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.accounts = accounts or {}
+        self.settings = settings or {}
+        self.shard_by = shard_by
+        self.poll_interval = poll_interval
+        self.max_restarts = max_restarts
+
+    def submit(self, tasks: List[dict]) -> str:
+        """
+        작업 등록
+
+        Args:
+            tasks: [{'kind', 'account_key', 'business_id', 'payload'}, ...]
+
+        Returns:
+            str: 배치 ID
+        """
+        init_db()
+        batch_id = uuid.uuid4().hex[:12]
+        for task in tasks:
+            task['shard'] = shard_for(task.get('account_key'), task.get('business_id'),
+                                      self.num_workers, self.shard_by)
+        enqueue_work(batch_id, tasks)
+        return batch_id
+
+    def run(self, batch_id: str, timeout: Optional[float] = None) -> dict:
+        """
+        워커를 띄워 배치를 끝까지 처리하고 결과 요약 반환
+
+        Returns:
+            dict: {'batch_id', 'counts', 'elapsed_s', 'results': [...]}
+        """
+        started = time.perf_counter()
+        ctx = multiprocessing.get_context("spawn")
+        db_path = str(db.DATABASE_PATH)
+
+        def start(index):
+            proc = ctx.Process(
+                target=_worker_main,
+                args=(index, batch_id, self.accounts, self.settings, db_path),
+                name=f"review-worker-{index}",
+                daemon=True
+            )
+            proc.start()
+            return proc
+
+        procs = {i: start(i) for i in range(self.num_workers)}
+        restarts = {i: 0 for i in procs}
+
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                counts = count_work(batch_id)
+
+                for index, proc in list(procs.items()):
+                    if proc.is_alive():
+                        continue
+                    if proc.exitcode not in (0, None):
+                        requeued = requeue_worker_tasks(batch_id, f"pid-{proc.pid}")
+                        logger.warning(f"워커 {index} 비정상 종료 (exit {proc.exitcode}), 작업 {requeued}개 재등록")
+                        counts = count_work(batch_id)
+                    if counts['pending'] and restarts[index] < self.max_restarts:
+                        restarts[index] += 1
+                        procs[index] = start(index)
+                    else:
+                        del procs[index]
+
+                if not procs or (counts['pending'] == 0 and counts['running'] == 0):
+                    break
+                if timeout and time.perf_counter() - started > timeout:
+                    logger.warning(f"배치 {batch_id} 시간 초과")
+                    break
+        finally:
+            for proc in procs.values():
+                proc.join(timeout=30)
+                if proc.is_alive():
+                    proc.terminate()
+
+        return {
+            'batch_id': batch_id,
+            'counts': count_work(batch_id),
+            'elapsed_s': round(time.perf_counter() - started, 3),
+            'results': [
+                {
+                    'id': row['id'],
+                    'kind': row['kind'],
+                    'business_id': row['business_id'],
+                    'payload': row['payload'],
+                    'status': row['status'],
+                    'result': row['result'],
+                    'error': row['error'],
+                }
+                for row in get_work_results(batch_id)
+            ],
+        }
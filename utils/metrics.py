@@ -0,0 +1,297 @@
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+import functools
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger("smartplace.metrics")
+
+# 지연 시간 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key: _LabelKey, extra: dict = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in items
+    )
+    return '{' + body + '}'
+
+
+class _Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    프로세스 내 메트릭 저장소 (카운터, 히스토그램, 최근 스팬)
+
+    Prometheus 텍스트 형식과 JSON 로그로 내보낼 수 있습니다.
+    """
+
+    def __init__(self, max_spans: int = 1000):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[_LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[_LabelKey, _Histogram]] = {}
+        self._spans = deque(maxlen=max_spans)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """카운터 증가"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """히스토그램에 값 기록"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram()
+            series[key].observe(value)
+
+    def record_span(self, name: str, duration: float, status: str, labels: dict, attrs: dict):
+        """완료된 스팬 기록 (히스토그램/카운터 갱신 + JSON 로그)"""
+        self.observe(f"{name}_seconds", duration, **labels)
+        self.inc(f"{name}_total", status=status, **labels)
+        span = {
+            'ts': round(time.time(), 3),
+            'span': name,
+            'duration_ms': round(duration * 1000, 2),
+            'status': status,
+            **{k: v for k, v in labels.items() if v is not None},
+            **attrs,
+        }
+        with self._lock:
+            self._spans.append(span)
+        logger.info(json.dumps(span, ensure_ascii=False, default=str))
+
+    def recent_spans(self, limit: int = 100) -> list:
+        with self._lock:
+            return list(self._spans)[-limit:]
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._spans.clear()
+
+    def summary(self) -> list:
+        """
+        스팬 이름별 요약 (진단 화면용)
+
+        Returns:
+            list: [{span, count, errors, total_s, avg_ms, p50_ms, p95_ms}, ...] (총 시간 내림차순)
+        """
+        with self._lock:
+            spans = list(self._spans)
+            histograms = {
+                name[:-len('_seconds')]: series
+                for name, series in self._histograms.items() if name.endswith('_seconds')
+            }
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        durations: Dict[str, list] = {}
+        for span in spans:
+            durations.setdefault(span['span'], []).append(span['duration_ms'])
+
+        rows = []
+        for name, series in histograms.items():
+            count = sum(h.count for h in series.values())
+            total = sum(h.sum for h in series.values())
+            errors = sum(
+                v for k, v in counters.get(f"{name}_total", {}).items() if ('status', 'error') in k
+            )
+            recent = sorted(durations.get(name, []))
+            rows.append({
+                'span': name,
+                'count': count,
+                'errors': int(errors),
+                'total_s': round(total, 3),
+                'avg_ms': round(total / count * 1000, 1) if count else 0.0,
+                'p50_ms': _percentile(recent, 50),
+                'p95_ms': _percentile(recent, 95),
+            })
+        rows.sort(key=lambda r: r['total_s'], reverse=True)
+        return rows
+
+    def export_prometheus(self) -> str:
+        """Prometheus 텍스트 형식으로 내보내기"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"smartplace_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in series.items():
+                    lines.append(f"{metric}{_format_labels(key)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                metric = f"smartplace_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, hist in series.items():
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        lines.append(f"{metric}_bucket{_format_labels(key, {'le': f'{bound:g}'})} {count}")
+                    lines.append(f"{metric}_bucket{_format_labels(key, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{metric}_sum{_format_labels(key)} {hist.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(key)} {hist.count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+metrics = MetricsRegistry()
+
+
+class _Span:
+    """span() 안에서 속성을 추가할 때 쓰는 핸들"""
+
+    def __init__(self):
+        self.attrs = {}
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    코드 블록 실행 시간을 스팬으로 기록 (동기/비동기 코드 모두 사용 가능)
+
+    예:
+        with span("navigation", target="review_page") as s:
+            await page.goto(url)
+            s.set(url=url)
+    """
+    handle = _Span()
+    status = 'ok'
+    start = time.perf_counter()
+    try:
+        yield handle
+    except BaseException as e:
+        status = 'error'
+        handle.attrs.setdefault('error', f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        metrics.record_span(name, time.perf_counter() - start, status, labels, handle.attrs)
+
+
+def timed(name: str, **labels):
+    """함수 실행 시간을 스팬으로 기록하는 데코레이터 (async 함수 지원)"""
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, **labels):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def inc(name: str, value: float = 1.0, **labels):
+    metrics.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    metrics.observe(name, value, **labels)
+
+
+def write_prometheus(path: str):
+    """Prometheus 텍스트 파일로 저장 (node_exporter textfile collector 용)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(metrics.export_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record):
+        message = record.getMessage()
+        if message.startswith('{'):
+            return message
+        return json.dumps({
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': message,
+        }, ensure_ascii=False)
+
+
+def configure_json_logging(level: int = logging.INFO):
+    """서비스 로그와 스팬을 한 줄짜리 JSON으로 출력"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(_JsonFormatter())
+    for name in ("smartplace", "services"):
+        log = logging.getLogger(name)
+        log.handlers = [handler]
+        log.setLevel(level)
+        log.propagate = False
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """/metrics 엔드포인트를 백그라운드 스레드로 제공 (이미 실행 중이면 재사용)"""
+    global _server
+    if _server is not None:
+        return _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = metrics.export_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
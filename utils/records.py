@@ -0,0 +1,49 @@
+"""
+리뷰 레코드 공용 헬퍼
+
+- 스크래퍼는 Review 데이터클래스를, 워커 작업과 DB 조회는 dict 를 넘기므로
+  리뷰 목록을 받는 함수는 두 형식을 모두 받습니다.
+- 리뷰 ID/해시는 공백을 모두 뺀 정규화 텍스트로 만들어, 파서마다 줄바꿈(<br>)이나
+  공백을 다르게 읽어도 같은 리뷰는 같은 ID/해시가 됩니다.
+"""
+from typing import Optional
+import hashlib
+import re
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_field(record, name: str, default=None):
+    """Review 객체 속성 또는 dict 키 값 (없으면 default)"""
+    if isinstance(record, dict):
+        return record.get(name, default)
+    return getattr(record, name, default)
+
+
+def canonical_text(text: Optional[str]) -> str:
+    """ID/해시용 정규화 텍스트 (공백/줄바꿈을 모두 제거)"""
+    return _WHITESPACE.sub('', text or '')
+
+
+def make_review_id(author: str, date: str, content: str, business_id: str = '') -> str:
+    """
+    data-review-id 가 없을 때 쓰는 안정적인 리뷰 ID
+
+    업체/작성자/날짜/정규화한 본문만 사용하므로 답글이 달려도 ID가 바뀌지 않습니다.
+    (본문이 수정되면 새 ID가 되므로 수정 감지는 data-review-id 가 있을 때만 가능)
+    """
+    key = '\x1f'.join(canonical_text(part) for part in (business_id, author, date, content))
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+def make_content_hash(rating: int, content: str) -> str:
+    """리뷰 본문 해시 (공백 차이는 무시)"""
+    key = f"{rating}\x1f{canonical_text(content)}"
+    return hashlib.md5(key.encode()).hexdigest()[:16]
+
+
+def make_reply_hash(reply_content: Optional[str]) -> Optional[str]:
+    """답글 해시 (답글이 없으면 None)"""
+    if not reply_content:
+        return None
+    return hashlib.md5(canonical_text(reply_content).encode()).hexdigest()[:16]